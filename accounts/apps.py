@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     name = 'accounts'
+
+    def ready(self):
+        from django.contrib.auth.password_validation import get_default_password_validators
+        from . import signals  # noqa: F401
+
+        # Build the validators (and read the 20k common-password list) at
+        # startup instead of inside the first registration request
+        get_default_password_validators()
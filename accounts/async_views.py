@@ -0,0 +1,120 @@
+"""
+Async versions of RegisterView and LoginView, routed in place of the
+sync views by healthcare_backend.asgi_urls. authenticate() and
+create_user() run on the bounded pool in accounts.hashing so the event
+loop never blocks on PBKDF2. Request and response bodies match the DRF
+views.
+"""
+import json
+from asgiref.sync import sync_to_async
+from django.contrib.auth import authenticate
+from django.db import IntegrityError
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import user_cache
+from .hashing import run_with_db_in_hashing_pool
+from .serializers import UserRegistrationSerializer, UserSerializer
+
+
+def _response(data, status_code):
+    return HttpResponse(
+        JSONRenderer().render(data),
+        status=status_code,
+        content_type='application/json'
+    )
+
+
+def _method_not_allowed(request):
+    return _response(
+        {'detail': f'Method "{request.method}" not allowed.'},
+        status.HTTP_405_METHOD_NOT_ALLOWED
+    )
+
+
+def _request_data(request):
+    """
+    (data, error response): the body as DRF's JSON and form parsers read it
+    """
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}'), None
+        except ValueError as exc:
+            return None, _response(
+                {'detail': f'JSON parse error - {exc}'}, status.HTTP_400_BAD_REQUEST
+            )
+    return request.POST.dict(), None
+
+
+@csrf_exempt
+async def register(request):
+    """
+    Async user registration
+    """
+    if request.method != 'POST':
+        return _method_not_allowed(request)
+
+    data, error = _request_data(request)
+    if error is not None:
+        return error
+
+    serializer = UserRegistrationSerializer(data=data)
+    # Field validators include a unique-email query, so run them off the loop
+    if not await sync_to_async(serializer.is_valid)():
+        return _response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    try:
+        # UserManager.create_user, as RegisterView runs it, hashing included
+        user = await run_with_db_in_hashing_pool(serializer.save)
+    except IntegrityError:
+        # Registered concurrently, after the unique-email check
+        return _response(
+            {'email': ['user with this email already exists.']},
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    return _response({
+        'user': UserSerializer(user).data,
+        'message': 'User registered successfully'
+    }, status.HTTP_201_CREATED)
+
+
+@csrf_exempt
+async def login(request):
+    """
+    Async login with JWT token generation
+    """
+    if request.method != 'POST':
+        return _method_not_allowed(request)
+
+    data, error = _request_data(request)
+    if error is not None:
+        return error
+    if not isinstance(data, dict):
+        data = {}
+    email = data.get('email')
+    password = data.get('password')
+
+    if not email or not password:
+        return _response({
+            'error': 'Please provide both email and password'
+        }, status.HTTP_400_BAD_REQUEST)
+
+    # The auth backends, their checks, signals and hash upgrades, as in LoginView
+    user = await run_with_db_in_hashing_pool(authenticate, request, username=email, password=password)
+    if user is None:
+        return _response({
+            'error': 'Invalid email or password'
+        }, status.HTTP_401_UNAUTHORIZED)
+
+    user_cache.set(user.pk, user)
+    refresh = RefreshToken.for_user(user)
+
+    return _response({
+        'user': UserSerializer(user).data,
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+        'message': 'Login successful'
+    }, status.HTTP_200_OK)
@@ -0,0 +1,126 @@
+import copy
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+User = get_user_model()
+
+
+class UserCache:
+    """
+    Small in-process TTL cache of User rows keyed by id
+
+    Entries are evicted by the User post_save/post_delete signal in this
+    process; other worker processes pick up changes within `ttl` seconds.
+    """
+
+    def __init__(self, ttl, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            self.evict(user_id)
+            return None
+        return user
+
+    def set(self, user_id, user):
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._entries.clear()
+            self._entries[user_id] = (time.monotonic() + self.ttl, user)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(ttl=getattr(settings, 'AUTH_USER_CACHE_TTL', 30))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that reads the user from an in-process cache
+
+    The token's user id claim picks the cached row, so most requests make
+    no user query at all. Deactivation and password changes still lock
+    the user out: is_active and the token's password-hash claim
+    (CHECK_REVOKE_TOKEN) are checked against the cached row.
+    """
+
+    async def aauthenticate(self, request):
+        """
+        Async counterpart of authenticate() for the native async views
+
+        Token validation is pure CPU; only a user-cache miss touches the
+        database, through the async ORM.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None and user_cache.get(user_id) is None:
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            user_cache.set(user_id, user)
+
+        return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        """
+        Return a per-request copy of the cached user for the token
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            user_cache.set(user_id, user)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        # Tokens issued before the claim was enabled carry no hash; they
+        # expire within ACCESS_TOKEN_LIFETIME
+        password_hash = validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+        if (
+            api_settings.CHECK_REVOKE_TOKEN
+            and password_hash is not None
+            and password_hash != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+
+        # Views may mutate request.user; never hand out the shared instance
+        return copy.copy(user)
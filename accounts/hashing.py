@@ -0,0 +1,49 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.db import connections
+
+_executor = None
+
+
+def get_executor():
+    """
+    Bounded pool for password hashing, created on first use
+
+    PBKDF2 runs in OpenSSL with the GIL released, so threads give real
+    parallelism across cores without blocking the event loop.
+    """
+    global _executor
+    if _executor is None:
+        workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 1
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _executor
+
+
+async def run_in_hashing_pool(func, *args, executor=None, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor or get_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_with_db_in_hashing_pool(func, *args, **kwargs):
+    """
+    run_in_hashing_pool() for code that also queries the database
+
+    Connections are per thread, so the pool thread's are handed back
+    (to core.db's pool, or closed) once `func` returns.
+    """
+    return await run_in_hashing_pool(_release_connections, func, *args, **kwargs)
+
+
+def _release_connections(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        connections.close_all()
+
+
+async def acheck_password(password, encoded, executor=None):
+    return await run_in_hashing_pool(check_password, password, encoded, executor=executor)
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from accounts.hashing import acheck_password
+from accounts.models import User
+from core.benchmarking import client_settings, format_table, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput of the async auth path as the password "
+        "hashing pool grows from 1 worker to the number of cores"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200,
+                            help='Password checks per pool size')
+        parser.add_argument('--workers', default='',
+                            help='Comma separated pool sizes (default: 1, 2, 4, ... up to CPU count)')
+        parser.add_argument('--end-to-end', action='store_true',
+                            help='Also drive POST /api/auth/login/ through the ASGI URLconf '
+                                 '(creates and removes a benchmark user)')
+
+    def handle(self, *args, **options):
+        pool_sizes = self.get_pool_sizes(options['workers'])
+        encoded = make_password('bench-login-password')
+
+        rows = []
+        baseline = None
+        for size in pool_sizes:
+            rate = asyncio.run(self.measure_pool(size, encoded, options['logins']))
+            baseline = baseline or rate
+            rows.append([size, f'{rate:.1f}', f'{rate / baseline:.2f}x'])
+
+        self.stdout.write(f'CPU count: {os.cpu_count()}')
+        self.stdout.write(format_table(['workers', 'logins/s', 'speedup'], rows))
+
+        if options['end_to_end']:
+            self.stdout.write('')
+            self.stdout.write(self.end_to_end(options['logins'], max(pool_sizes)))
+
+    def get_pool_sizes(self, raw):
+        if raw:
+            return [int(value) for value in raw.split(',')]
+        sizes = []
+        size = 1
+        while size < (os.cpu_count() or 1):
+            sizes.append(size)
+            size *= 2
+        sizes.append(os.cpu_count() or 1)
+        return sizes
+
+    async def measure_pool(self, size, encoded, logins):
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            start = time.perf_counter()
+            await asyncio.gather(*[
+                acheck_password('bench-login-password', encoded, executor=executor)
+                for _ in range(logins)
+            ])
+            return logins / (time.perf_counter() - start)
+
+    def end_to_end(self, logins, concurrency):
+        email = 'bench-login@example.com'
+        password = 'bench-Login-pass-42'
+        User.objects.filter(email=email).delete()
+        User.objects.create_user(email=email, username=email, name='Bench', password=password)
+
+        async def run():
+            client = AsyncClient()
+            latencies = []
+
+            async def one():
+                start = time.perf_counter()
+                response = await client.post(
+                    '/api/auth/login/',
+                    {'email': email, 'password': password},
+                    content_type='application/json'
+                )
+                assert response.status_code == 200, response.content
+                latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for offset in range(0, logins, concurrency):
+                await asyncio.gather(*[one() for _ in range(min(concurrency, logins - offset))])
+            return summarize(latencies, time.perf_counter() - start)
+
+        try:
+            with client_settings(ROOT_URLCONF='healthcare_backend.asgi_urls'):
+                result = asyncio.run(run())
+        finally:
+            User.objects.filter(email=email).delete()
+
+        return format_table(
+            ['endpoint', 'logins/s', 'p50 ms', 'p95 ms', 'p99 ms'],
+            [[
+                'POST /api/auth/login/ (ASGI)',
+                f"{result['throughput']:.1f}",
+                f"{result['p50_ms']:.1f}",
+                f"{result['p95_ms']:.1f}",
+                f"{result['p99_ms']:.1f}",
+            ]]
+        )
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from core.instrumentation import TimedRepresentationMixin
+from core.nested import SharedRepresentationMixin
 
 User = get_user_model()
 
@@ -66,9 +68,11 @@ class UserLoginSerializer(serializers.Serializer):
     access = serializers.CharField(read_only=True)
     refresh = serializers.CharField(read_only=True)
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SharedRepresentationMixin, TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Basic user serializer for displaying user info
+
+    Nested, e.g. as created_by, each user is serialized once per response.
     """
     class Meta:
         model = User
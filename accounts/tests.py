@@ -1,3 +1,204 @@
-from django.test import TestCase
+import json
+import time
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .authentication import CachedJWTAuthentication, user_cache
+from .models import User
 
-# Create your tests here.
+
+class CachedJWTAuthenticationTests(TestCase):
+    """
+    The cached user row is reused, but deactivation and password changes
+    lock the user out on the next request
+    """
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password='s3cure-pass-123'
+        )
+        self.token = self.issue_token()
+
+    def issue_token(self):
+        return str(RefreshToken.for_user(self.user).access_token)
+
+    def get(self, token=None):
+        return APIClient().get('/api/patients/', headers={'Authorization': f'Bearer {token or self.token}'})
+
+    def async_get(self, token=None):
+        with override_settings(ROOT_URLCONF='healthcare_backend.asgi_urls'):
+            return async_to_sync(AsyncClient().get)(
+                '/api/patients/', headers={'Authorization': f'Bearer {token or self.token}'}
+            )
+
+    def assertRejected(self, response, code):
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], code)
+
+    def user_queries(self, queries):
+        return [query for query in queries if f'FROM "{User._meta.db_table}"' in query['sql']]
+
+    def test_cached_user_is_reused(self):
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(self.get().status_code, 200)
+        with CaptureQueriesContext(connection) as second:
+            self.assertEqual(self.get().status_code, 200)
+        self.assertEqual(len(self.user_queries(first)), 1)
+        self.assertEqual(self.user_queries(second), [])
+
+    def test_deactivated_user_is_rejected(self):
+        for get in (self.get, self.async_get):
+            with self.subTest(get=get.__name__):
+                self.user.is_active = True
+                self.user.save()
+                self.assertEqual(get().status_code, 200)
+
+                # The post_save signal evicts the cached row
+                self.user.is_active = False
+                self.user.save()
+                self.assertRejected(get(), 'user_inactive')
+
+    def test_changed_password_revokes_issued_tokens(self):
+        for get in (self.get, self.async_get):
+            with self.subTest(get=get.__name__):
+                old_token = self.issue_token()
+                self.assertEqual(get(old_token).status_code, 200)
+
+                self.user.set_password(f'an0ther-pass-{get.__name__}')
+                self.user.save()
+                # CHECK_REVOKE_TOKEN: the token's password hash no longer matches
+                self.assertRejected(get(old_token), 'password_changed')
+                self.assertEqual(get(self.issue_token()).status_code, 200)
+
+    def test_deleted_user_is_rejected(self):
+        self.assertEqual(self.get().status_code, 200)
+        self.user.delete()
+        self.assertRejected(self.get(), 'user_not_found')
+
+    def test_changes_without_signals_apply_after_the_ttl(self):
+        self.assertEqual(self.get().status_code, 200)
+        # As if written by another worker process: no eviction here
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.get().status_code, 200)
+
+        expired = time.monotonic() + user_cache.ttl + 1
+        with mock.patch('accounts.authentication.time.monotonic', return_value=expired):
+            self.assertRejected(self.get(), 'user_inactive')
+
+    def test_requests_get_their_own_copy(self):
+        self.assertEqual(self.get().status_code, 200)
+        user = CachedJWTAuthentication().get_user(AccessToken(self.token))
+        user.name = 'Changed by a view'
+        self.assertEqual(user_cache.get(self.user.pk).name, 'Owner')
+
+
+class AuthViewParityTests(TransactionTestCase):
+    """
+    The async register/login views (healthcare_backend.asgi_urls) answer
+    exactly as RegisterView and LoginView do
+
+    Transactional: authenticate() and create_user() run on the hashing
+    pool, whose threads use their own database connections.
+    """
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password='s3cure-pass-123'
+        )
+
+    def request(self, asynchronous, method, path, data=None, content_type='application/json'):
+        if data is not None and not isinstance(data, str):
+            data = json.dumps(data)
+        if not asynchronous:
+            return getattr(APIClient(), method)(path, data, content_type=content_type)
+        with override_settings(ROOT_URLCONF='healthcare_backend.asgi_urls'):
+            client = AsyncClient()
+            if method == 'get':
+                return async_to_sync(client.get)(path)
+            return async_to_sync(client.post)(path, data, content_type=content_type)
+
+    def both(self, method, path, data=None, **kwargs):
+        """
+        (sync response, async response) for the same request
+        """
+        return tuple(self.request(asynchronous, method, path, data, **kwargs) for asynchronous in (False, True))
+
+    def assertSame(self, responses, status_code):
+        sync, asynchronous = responses
+        self.assertEqual((sync.status_code, asynchronous.status_code), (status_code, status_code))
+        self.assertEqual(asynchronous.json(), sync.json())
+        self.assertEqual(asynchronous['Content-Type'], sync['Content-Type'])
+
+    def registration(self, email):
+        return {'name': 'New', 'email': email, 'password': 'An0ther-pass-123', 'password2': 'An0ther-pass-123'}
+
+    def test_register(self):
+        bodies = []
+        for asynchronous in (False, True):
+            email = f'new{int(asynchronous)}@example.com'
+            response = self.request(asynchronous, 'post', '/api/auth/register/', self.registration(email))
+            self.assertEqual(response.status_code, 201)
+            body = response.json()
+            user = User.objects.get(email=email)
+            self.assertEqual(body['user']['id'], user.id)
+            self.assertTrue(user.check_password('An0ther-pass-123'))
+            self.assertEqual(user.username, email)
+            body['user'] = {key: value for key, value in body['user'].items() if key == 'name'}
+            bodies.append(body)
+        self.assertEqual(bodies[0], bodies[1])
+
+    def test_register_errors(self):
+        self.assertSame(self.both('post', '/api/auth/register/', self.registration('owner@example.com')), 400)
+        weak = {**self.registration('weak@example.com'), 'password': 'abc', 'password2': 'abc'}
+        self.assertSame(self.both('post', '/api/auth/register/', weak), 400)
+        self.assertSame(self.both('post', '/api/auth/register/', '{"email": '), 400)
+        self.assertFalse(User.objects.filter(email='weak@example.com').exists())
+
+    def test_login(self):
+        credentials = {'email': 'owner@example.com', 'password': 's3cure-pass-123'}
+        sync, asynchronous = self.both('post', '/api/auth/login/', credentials)
+        self.assertEqual((sync.status_code, asynchronous.status_code), (200, 200))
+        for response in (sync, asynchronous):
+            body = response.json()
+            self.assertEqual(AccessToken(body['access'])['user_id'], self.user.id)
+            self.assertEqual(body['user'], sync.json()['user'])
+            self.assertEqual(body['message'], 'Login successful')
+
+    def test_login_failures(self):
+        failures = []
+        receiver = lambda sender, credentials, **kwargs: failures.append(credentials['username'])
+        user_login_failed.connect(receiver)
+        self.addCleanup(user_login_failed.disconnect, receiver)
+
+        for credentials in (
+            {'email': 'owner@example.com', 'password': 'wrong-password'},
+            {'email': 'nobody@example.com', 'password': 's3cure-pass-123'},
+        ):
+            with self.subTest(email=credentials['email']):
+                self.assertSame(self.both('post', '/api/auth/login/', credentials), 401)
+        # authenticate() runs on both paths, signals included
+        self.assertEqual(failures, ['owner@example.com'] * 2 + ['nobody@example.com'] * 2)
+
+        self.assertSame(self.both('post', '/api/auth/login/', {'email': 'owner@example.com'}), 400)
+        self.assertSame(self.both('post', '/api/auth/login/', '{"email": '), 400)
+
+    def test_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        credentials = {'email': 'owner@example.com', 'password': 's3cure-pass-123'}
+        self.assertSame(self.both('post', '/api/auth/login/', credentials), 401)
+
+    def test_get_is_not_allowed(self):
+        for path in ('/api/auth/register/', '/api/auth/login/'):
+            with self.subTest(path=path):
+                self.assertSame(self.both('get', path), 405)
@@ -5,6 +5,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserSerializer
+from .authentication import user_cache
 
 class RegisterView(APIView):
     """
@@ -63,6 +64,9 @@ class LoginView(APIView):
         if user is not None:
             # User authenticated successfully
             
+            # Warm the auth cache so the first API call needs no user query
+            user_cache.set(user.pk, user)
+
             # Generate JWT tokens
             refresh = RefreshToken.for_user(user)
             
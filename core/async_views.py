@@ -0,0 +1,196 @@
+"""
+Native async read endpoints that mirror DRF viewset actions
+
+Querysets, permissions and serializers come from the sync viewset itself
+(instantiated, never dispatched), so the async path can't drift from it;
+only the database I/O moves to the async ORM. So do the action's response
+cache and ETag/Last-Modified validators: entries are shared with the sync
+view. HEAD is answered by the GET handler, as on the sync views; other
+methods fall through to the sync viewset.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+from accounts.authentication import CachedJWTAuthentication
+from .conditional import precondition_response, set_validators
+from .replicas import ReplicaReadMixin, choose_replica, read_alias
+
+
+class AsyncViewSetView(View):
+    """
+    Base class: subclasses set `viewset_class`, `action`, `detail` and
+    implement `read(viewset, request, **kwargs)` returning a response
+    (usually `self.render(data)`)
+    """
+    viewset_class = None
+    action = None
+    detail = False
+    basename = None
+    # method -> action on the sync viewset for everything except GET
+    fallback_actions = {}
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            token = read_alias.set(None)
+            try:
+                response = await self.get(request, *args, **kwargs)
+            finally:
+                read_alias.reset(token)
+            if request.method == 'HEAD':
+                # The GET's headers, Content-Length included, without its body
+                response['Content-Length'] = len(response.content)
+                response.content = b''
+            return response
+        if request.method.lower() not in self.fallback_actions:
+            return self.error_response(exceptions.MethodNotAllowed(request.method))
+
+        fallback = self.viewset_class.as_view(
+            self.fallback_actions,
+            basename=self.basename,
+            detail=self.detail
+        )
+        return await sync_to_async(fallback)(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        authenticator = CachedJWTAuthentication()
+        try:
+            result = await authenticator.aauthenticate(request)
+            drf_request = Request(request, authenticators=[])
+            drf_request.user = result[0] if result else None
+
+            viewset = self.viewset_class(
+                request=drf_request,
+                args=args,
+                kwargs=kwargs,
+                format_kwarg=None,
+                action=self.action,
+                basename=self.basename,
+                detail=self.detail
+            )
+            viewset.headers = {}
+            if drf_request.user is None:
+                raise exceptions.NotAuthenticated()
+            viewset.check_permissions(drf_request)
+            if settings.REPLICA_DATABASES and isinstance(viewset, ReplicaReadMixin):
+                # Seen by the async ORM's worker threads too (copied context)
+                read_alias.set(await sync_to_async(choose_replica)(drf_request.user.pk))
+
+            return await self.respond(viewset, drf_request, **kwargs)
+        except exceptions.APIException as exc:
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                exc.auth_header = authenticator.authenticate_header(request)
+            return self.error_response(exc)
+
+    async def respond(self, viewset, request, **kwargs):
+        """
+        read() behind the sync action's cache_response/conditional_response
+
+        Same keys, entries and validators as the sync view: a hit, or a
+        304 for it, runs no query; a miss computes the validators first.
+        """
+        handler = getattr(type(viewset), self.action)
+        response_cache = getattr(handler, 'response_cache', None)
+        conditional = getattr(handler, 'conditional', False)
+
+        key = None
+        if response_cache is not None:
+            key = await sync_to_async(response_cache.make_key)(request, self.action, kwargs)
+            entry = await sync_to_async(response_cache.get)(key)
+            if entry is not None and (not conditional or 'etag' in entry):
+                validators = (entry['etag'], entry['last_modified']) if conditional else None
+                if validators is not None:
+                    precondition = precondition_response(request, *validators, self.detail)
+                    if precondition is not None:
+                        return precondition
+                response = self.render(entry['data'], headers={'X-Cache': 'HIT'})
+                return set_validators(response, *validators) if validators is not None else response
+
+        validators = None
+        if conditional:
+            validators = await self.get_validators(viewset, **kwargs)
+            precondition = precondition_response(request, *validators, self.detail)
+            if precondition is not None:
+                return precondition
+
+        response = await self.read(viewset, request, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            entry = {'data': response.data}
+            if validators is not None:
+                set_validators(response, *validators)
+                entry.update(etag=validators[0], last_modified=validators[1])
+            if key is not None:
+                await sync_to_async(response_cache.set)(key, entry)
+        if key is not None:
+            response['X-Cache'] = 'MISS'
+        return response
+
+    async def get_validators(self, viewset, **kwargs):
+        """
+        (etag, last_modified) as ConditionalRequestMixin computes them
+        """
+        if self.detail:
+            lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+            obj = await aget_object(viewset, **{viewset.lookup_field: kwargs[lookup_url_kwarg]})
+            # modified_fields may follow relations
+            return await sync_to_async(viewset.get_object_validators)(obj)
+        return await viewset.aget_list_validators(viewset.get_queryset())
+
+    async def read(self, viewset, request, **kwargs):
+        raise NotImplementedError
+
+    def render(self, data, status_code=status.HTTP_200_OK, headers=None):
+        response = HttpResponse(
+            JSONRenderer().render(data),
+            status=status_code,
+            content_type='application/json'
+        )
+        # Stored by respond(), as DRF's Response.data is by cache_response
+        response.data = data
+        for name, value in (headers or {}).items():
+            response[name] = value
+        return response
+
+    def error_response(self, exc):
+        """
+        Same body and status DRF's exception handler would produce
+        """
+        response = exception_handler(exc, {})
+        # The unrendered Response still has HttpResponse's text/html type
+        headers = {name: value for name, value in response.items() if name != 'Content-Type'}
+        return self.render(response.data, response.status_code, headers)
+
+
+async def apaginate(viewset, queryset):
+    """
+    Run the viewset's paginator over `queryset` with the async ORM
+
+    Returns (rows, paginator); paginator.get_page_links() and
+    get_paginated_response() work as on the sync path.
+    """
+    paginator = viewset.paginator
+    page_queryset = paginator.get_page_queryset(queryset, viewset.request, view=viewset)
+    rows = [row async for row in page_queryset]
+    return paginator.build_page(rows), paginator
+
+
+async def aget_object(viewset, **lookup):
+    """
+    Async get_object(): 404 on a missing row or malformed lookup value
+
+    Fetched once per request, like ConditionalRequestMixin.get_object().
+    """
+    obj = getattr(viewset, '_conditional_object', None)
+    if obj is not None:
+        return obj
+    try:
+        obj = await viewset.get_queryset().aget(**lookup)
+    except (viewset.get_queryset().model.DoesNotExist, ValueError, TypeError, ValidationError):
+        raise exceptions.NotFound()
+    viewset._conditional_object = obj
+    return obj
@@ -0,0 +1,179 @@
+"""
+Helpers shared by the benchmark management commands
+"""
+import math
+import re
+import resource
+import sys
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection, connections
+from django.test import override_settings
+
+# Vocabulary for generated benchmark rows
+FIRST_NAMES = (
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda',
+    'William', 'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica',
+    'Thomas', 'Sarah', 'Charles', 'Karen', 'Aarav', 'Priya', 'Rohan', 'Ananya',
+    'Vikram', 'Meera', 'Arjun', 'Kavya', 'Mohammed', 'Fatima', 'Wei', 'Mei',
+    'Carlos', 'Maria', 'Luis', 'Sofia', 'Olga', 'Ivan', 'Kenji', 'Yuki',
+)
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+    'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson',
+    'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin', 'Sharma', 'Patel', 'Khatri',
+    'Singh', 'Gupta', 'Reddy', 'Iyer', 'Nair', 'Khan', 'Ali', 'Chen', 'Wang',
+    'Li', 'Zhang', 'Kim', 'Park', 'Nguyen', 'Tanaka', 'Sato', 'Ivanov',
+)
+STREETS = (
+    'Oak', 'Maple', 'Cedar', 'Pine', 'Elm', 'Lake', 'Hill', 'Park', 'River', 'Station',
+)
+CONDITIONS = (
+    'Type 2 diabetes, on metformin',
+    'Hypertension, managed with lisinopril',
+    'Asthma since childhood',
+    'Seasonal allergies',
+    'Migraine with aura',
+    'Hypothyroidism',
+    'Chronic lower back pain',
+    'Penicillin allergy',
+    'Arrhythmia under observation',
+    'Osteoarthritis of the knee',
+    'Anxiety disorder',
+    '',
+)
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of `values` (need not be sorted)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed):
+    """
+    Throughput and latency percentiles (ms) for one run
+    """
+    return {
+        'requests': len(latencies),
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+# Metric -> True when a higher value is better. p99 is reported but too
+# noisy at a few hundred requests to gate on
+TRACKED_METRICS = {
+    'p50_ms': False,
+    'p95_ms': False,
+    'throughput': True,
+    'queries': False,
+}
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def server_timing_queries(response):
+    """
+    Query count from the Server-Timing header set by
+    QueryInstrumentationMiddleware (None if absent)
+    """
+    match = SERVER_TIMING_QUERIES.search(response.get('Server-Timing', ''))
+    return int(match.group(1)) if match else None
+
+
+def find_regressions(results, baseline, threshold, min_delta_ms=2.0):
+    """
+    Compare nested {scale: {endpoint: {metric: value}}} results against a
+    baseline of the same shape
+
+    A metric regresses when it is worse than the baseline by more than
+    `threshold` (a fraction); latencies must also be `min_delta_ms` worse
+    so sub-millisecond noise does not fail a run. Query counts regress on
+    any increase. Entries missing from either side are skipped.
+    """
+    regressions = []
+    for scale, endpoints in results.items():
+        for endpoint, metrics in endpoints.items():
+            before = baseline.get(scale, {}).get(endpoint)
+            if not before:
+                continue
+            for metric, higher_is_better in TRACKED_METRICS.items():
+                old, new = before.get(metric), metrics.get(metric)
+                if old is None or new is None:
+                    continue
+                if metric == 'queries':
+                    worse = new > old
+                elif higher_is_better:
+                    worse = new < old * (1 - threshold)
+                else:
+                    worse = new > old * (1 + threshold) and new - old >= min_delta_ms
+                if worse:
+                    regressions.append(f'{scale} {endpoint} {metric}: {old:.1f} -> {new:.1f}')
+    return regressions
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def format_table(headers, rows):
+    """
+    Plain-text table for command output
+    """
+    cells = [[str(value) for value in row] for row in rows]
+    widths = [
+        max(len(headers[i]), *(len(row[i]) for row in cells)) if cells else len(headers[i])
+        for i in range(len(headers))
+    ]
+    lines = ['  '.join(header.ljust(width) for header, width in zip(headers, widths))]
+    lines.append('  '.join('-' * width for width in widths))
+    for row in cells:
+        lines.append('  '.join(value.ljust(width) for value, width in zip(row, widths)))
+    return '\n'.join(lines)
+
+
+def client_settings(**overrides):
+    """
+    override_settings() that lets the test client's 'testserver' host in
+    """
+    return override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+        **overrides
+    )
+
+
+@contextmanager
+def throwaway_database(keepdb=False):
+    """
+    Run the block against a fresh test database and a private cache
+
+    Benchmarks that seed and delete rows must not touch the configured
+    database, nor bump the generations of the live response caches.
+    With `keepdb` the test database (and its rows) survives for the next
+    run, as `manage.py test --keepdb` does.
+    """
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb, serialize=False)
+    private_caches = {
+        alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'benchmark-{alias}'}
+        for alias in settings.CACHES
+    }
+    try:
+        with override_settings(CACHES=private_caches):
+            yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
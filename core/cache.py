@@ -0,0 +1,143 @@
+import hashlib
+import time
+from functools import wraps
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from .metrics import observe_cache
+
+
+class ResponseCache:
+    """
+    Generation-versioned cache for serialized API responses
+
+    Every key embeds the namespace's current generation number, so an
+    invalidation is a single counter bump: old entries are never read
+    again and simply age out. Works with any Django cache backend
+    (local-memory, file-based, ...).
+
+    With `per_user=True` each user has their own generation and keys are
+    scoped to request.user, so invalidation stays O(1) per write.
+    """
+
+    def __init__(self, namespace, timeout=300, per_user=False, depends_on=(), alias='default'):
+        self.namespace = namespace
+        self.timeout = timeout
+        # One generation per user: a write only invalidates its owner's entries
+        self.per_user = per_user
+        # Caches whose data is embedded in ours (e.g. doctors in mappings)
+        self.depends_on = tuple(depends_on)
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def generation_key(self, user_id=None):
+        if self.per_user:
+            return f'{self.namespace}:generation:{user_id}'
+        return f'{self.namespace}:generation'
+
+    def generation(self, user_id=None):
+        """
+        Current generation, created on first use
+
+        Seeded from the clock so a generation lost to eviction can't
+        restart at a value that old entries were stored under.
+        """
+        key = self.generation_key(user_id)
+        value = self.cache.get(key)
+        if value is None:
+            self.cache.add(key, time.time_ns() // 1000, timeout=None)
+            value = self.cache.get(key)
+        return value
+
+    def invalidate(self, user_id=None):
+        """
+        Bump the generation now and again once the transaction commits
+
+        The second bump drops anything cached from a read that ran
+        between the write and its commit.
+        """
+        self._bump(user_id)
+        transaction.on_commit(lambda: self._bump(user_id))
+
+    def invalidate_users(self, user_ids):
+        for user_id in set(user_ids):
+            self.invalidate(user_id)
+
+    def _bump(self, user_id=None):
+        key = self.generation_key(user_id)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.add(key, time.time_ns() // 1000, timeout=None)
+
+    def make_key(self, request, action, kwargs):
+        """
+        Key on generation(s), action, URL kwargs and query params
+        """
+        user_id = request.user.pk if self.per_user else None
+        generations = [self.generation(user_id)]
+        generations += [dependency.generation() for dependency in self.depends_on]
+
+        params = sorted(request.query_params.lists())
+        raw = repr((request.get_host(), generations, sorted(kwargs.items()), params))
+        digest = hashlib.sha1(raw.encode()).hexdigest()
+        scope = f'{user_id}:' if self.per_user else ''
+        return f'{self.namespace}:{scope}{action}:{digest}'
+
+    def get(self, key):
+        data = self.cache.get(key)
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        observe_cache(self.namespace, data is not None)
+        return data
+
+    def set(self, key, data):
+        self.cache.set(key, data, self.timeout)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+        }
+
+
+def cache_response(response_cache):
+    """
+    Cache a viewset action's 200 response data in `response_cache`
+
+    Runs after authentication/permissions (it wraps the handler, not
+    dispatch), and sets `X-Cache: HIT|MISS` on the response. Entries are
+    dicts: {'data': ...}, plus the validators when conditional_response
+    is stacked above (it then does the caching itself, see there).
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            key = response_cache.make_key(request, self.action, kwargs)
+
+            entry = response_cache.get(key)
+            if entry is not None:
+                response = Response(entry['data'], status=status.HTTP_200_OK)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                response_cache.set(key, {'data': response.data})
+            response['X-Cache'] = 'MISS'
+            return response
+        # For conditional_response
+        wrapper.response_cache = response_cache
+        wrapper.uncached = method
+        return wrapper
+    return decorator
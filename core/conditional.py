@@ -0,0 +1,202 @@
+import hashlib
+from functools import wraps
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource has changed since you last fetched it.'
+    default_code = 'precondition_failed'
+
+
+class ConditionalRequestMixin:
+    """
+    ETag / Last-Modified validators computed without rendering the body
+
+    - detail: strong ETag from the object's pk and `modified_fields`
+    - list: weak ETag from COUNT(*) and MAX() of each `modified_fields`
+      entry over the viewset's queryset (a superset of any action's rows,
+      so it can only change too often, never too rarely), scoped to the
+      user unless the action's response cache is shared by every user
+
+    Related timestamps (e.g. 'doctor__updated_at') cover embedded objects.
+    PUT/PATCH honour If-Match against the current object's ETag.
+    """
+    modified_fields = ('updated_at',)
+
+    def get_object(self):
+        """
+        Fetch once per request and check If-Match on writes
+        """
+        if getattr(self, '_conditional_object', None) is None:
+            obj = super().get_object()
+            if self.request.method in ('PUT', 'PATCH'):
+                self.check_write_preconditions(obj)
+            self._conditional_object = obj
+        return self._conditional_object
+
+    def check_write_preconditions(self, obj):
+        etag, last_modified = self.get_object_validators(obj)
+        response = get_conditional_response(
+            self.request._request,
+            etag=etag,
+            last_modified=last_modified
+        )
+        if response is not None:
+            raise PreconditionFailed()
+
+    def get_object_validators(self, obj):
+        timestamps = [self._resolve(obj, field) for field in self.modified_fields]
+        timestamps = [value for value in timestamps if value is not None]
+        etag = self._make_etag(type(obj).__name__, obj.pk, *timestamps)
+        return f'"{etag}"', self._to_timestamp(max(timestamps, default=None))
+
+    def get_list_validators(self, queryset):
+        result = queryset.order_by().aggregate(**self._list_aggregates())
+        return self._list_validators(result)
+
+    async def aget_list_validators(self, queryset):
+        result = await queryset.order_by().aaggregate(**self._list_aggregates())
+        return self._list_validators(result)
+
+    def _list_aggregates(self):
+        aggregates = {
+            f'max_{index}': Max(field)
+            for index, field in enumerate(self.modified_fields)
+        }
+        return {'rows': Count('pk'), **aggregates}
+
+    def _list_validators(self, result):
+        timestamps = [value for key, value in result.items() if key != 'rows' and value]
+
+        params = sorted(self.request.query_params.lists())
+        etag = self._make_etag(
+            self.action, self._etag_user(), self.kwargs, params,
+            result['rows'], *timestamps
+        )
+        return f'W/"{etag}"', self._to_timestamp(max(timestamps, default=None))
+
+    def _etag_user(self):
+        """
+        None when one cache entry (and so one ETag) serves every user,
+        e.g. the doctor directory; otherwise the user's pk
+        """
+        response_cache = getattr(getattr(type(self), self.action, None), 'response_cache', None)
+        if response_cache is not None and not response_cache.per_user:
+            return None
+        return self.request.user.pk
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """
+        Hand out the new ETag after a successful PUT/PATCH
+        """
+        response = super().finalize_response(request, response, *args, **kwargs)
+        obj = getattr(self, '_conditional_object', None)
+        if (
+            obj is not None
+            and request.method in ('PUT', 'PATCH')
+            and response.status_code == status.HTTP_200_OK
+        ):
+            set_validators(response, *self.get_object_validators(obj))
+        return response
+
+    @staticmethod
+    def _resolve(obj, path):
+        for name in path.split('__'):
+            obj = getattr(obj, name, None)
+            if obj is None:
+                return None
+        return obj
+
+    @staticmethod
+    def _make_etag(*parts):
+        return hashlib.sha1(repr(parts).encode()).hexdigest()[:32]
+
+    @staticmethod
+    def _to_timestamp(value):
+        return int(value.timestamp()) if value is not None else None
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def precondition_response(request, etag, last_modified, honour_last_modified=True):
+    """
+    Django's 304 (or 412 for If-Match) for these validators, or None
+
+    The 304 carries ETag and Last-Modified, as the 200 would.
+    """
+    validators = set_validators(HttpResponse(), etag, last_modified)
+    response = get_conditional_response(
+        request._request,
+        etag=etag,
+        last_modified=last_modified if honour_last_modified else None,
+        response=validators
+    )
+    # Handed back unchanged when no precondition applies
+    return None if response is validators else response
+
+
+def conditional_response(method):
+    """
+    Answer If-None-Match / If-Modified-Since with 304 before the action runs
+
+    Stacked above cache_response, the validators are stored in the cache
+    entry next to the data, under the same generation key: a hit, and a
+    304 for it, run no query at all. Validators are computed (one
+    aggregate or object lookup) only on a miss.
+    If-Modified-Since is only honoured on detail actions: a deleted row
+    does not move MAX(updated_at), so list clients must use If-None-Match.
+    """
+    response_cache = getattr(method, 'response_cache', None)
+    handler = method.uncached if response_cache is not None else method
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        key = None
+        if response_cache is not None:
+            key = response_cache.make_key(request, self.action, kwargs)
+            entry = response_cache.get(key)
+            if entry is not None and 'etag' in entry:
+                etag, last_modified = entry['etag'], entry['last_modified']
+                precondition = precondition_response(request, etag, last_modified, self.detail)
+                if precondition is not None:
+                    return precondition
+                response = Response(entry['data'], status=status.HTTP_200_OK)
+                response['X-Cache'] = 'HIT'
+                return set_validators(response, etag, last_modified)
+
+        if self.detail:
+            etag, last_modified = self.get_object_validators(self.get_object())
+        else:
+            etag, last_modified = self.get_list_validators(self.get_queryset())
+        precondition = precondition_response(request, etag, last_modified, self.detail)
+        if precondition is not None:
+            return precondition
+
+        response = handler(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_validators(response, etag, last_modified)
+            if key is not None:
+                response_cache.set(key, {
+                    'data': response.data,
+                    'etag': etag,
+                    'last_modified': last_modified,
+                })
+        if key is not None:
+            response['X-Cache'] = 'MISS'
+        return response
+    # For the async views (core.async_views), which do the same
+    wrapper.response_cache = response_cache
+    wrapper.conditional = True
+    return wrapper
@@ -0,0 +1,57 @@
+"""
+PostgreSQL backend that draws connections from a per-process pool
+
+    'ENGINE': 'core.db',
+    'OPTIONS': {'pool': {'min_size': 2, 'max_size': 10, 'max_idle': 300, 'timeout': 10}},
+
+Django 5.0 only reuses connections per thread (CONN_MAX_AGE), which
+ASGI can't use and which grows with the thread count. Here CONN_MAX_AGE
+stays 0: closing the connection at the end of a request hands it back to
+a pool bounded per process (core.db.pool), and the next request, on any
+thread or event loop, checks it out again. With CONN_HEALTH_CHECKS a
+reused connection runs `SELECT 1` first. OPTIONS['pool'] takes the same
+keys as Django 5.1's psycopg 3 pool.
+"""
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+from .creation import DatabaseCreation
+from .pool import get_pool
+
+
+def health_check(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    if not connection.autocommit:
+        # Django switches autocommit on next, which psycopg2 refuses
+        # inside the transaction the SELECT just opened
+        connection.rollback()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    pool = None
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        # Pool settings, not a libpq parameter
+        conn_params.pop('pool', None)
+        return conn_params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict['OPTIONS']
+        self.pool = get_pool(
+            self.alias, conn_params, options.get('pool', True),
+            check=health_check if self.settings_dict['CONN_HEALTH_CHECKS'] else None
+        )
+        # Set by the parent for new connections; reused ones skip it
+        self.isolation_level = base.IsolationLevel(
+            options.get('isolation_level', base.IsolationLevel.READ_COMMITTED)
+        )
+        connect = super().get_new_connection
+        return self.pool.getconn(lambda: connect(conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
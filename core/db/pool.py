@@ -0,0 +1,276 @@
+"""
+Bounded, thread-safe pool of psycopg connections, one per database and
+process (see core.db.base)
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# connection.info.transaction_status, the same in psycopg 2 and 3
+IDLE, ACTIVE, INTRANS, INERROR, UNKNOWN = range(5)
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    At most `max_size` connections, idle or checked out
+
+    getconn() hands out the most recently returned idle connection, opens
+    a new one while below max_size and otherwise waits up to `timeout`
+    seconds. Returned connections are rolled back if a transaction was
+    left open and discarded if broken. Whenever one comes back,
+    connections idle for longer than `max_idle` seconds are closed, down
+    to `min_size`. `check(connection)` runs on every reused connection and
+    raises if it's unusable; a fresh connection then takes its place.
+    """
+
+    def __init__(self, name, min_size=2, max_size=10, max_idle=300, timeout=10, check=None, dbname=None):
+        if max_size < 1 or not 0 <= min_size <= max_size:
+            raise ImproperlyConfigured(
+                f'Connection pool needs 0 <= min_size <= max_size and max_size >= 1 '
+                f'(got min_size={min_size}, max_size={max_size})'
+            )
+        self.name = name
+        self.dbname = dbname
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.check = check
+        self.pid = os.getpid()
+        self.closed = False
+
+        self._condition = threading.Condition()
+        # (connection, returned at); most recently returned on the right
+        self._idle = deque()
+        # Open connections, idle or checked out
+        self._size = 0
+        self._in_use = 0
+
+        self.checkouts = 0
+        self.opened = 0
+        self.failed_checks = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.peak_in_use = 0
+
+    def getconn(self, connect):
+        """
+        Check out a connection; `connect()` opens a new one when needed
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        connection = None
+        with self._condition:
+            while True:
+                if self.closed:
+                    raise OperationalError(f'Connection pool {self.name!r} is closed')
+                if self._idle:
+                    connection, _ = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Reserve the slot; the connection is opened outside the lock
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    metrics.DB_POOL_TIMEOUTS.labels(self.name).inc()
+                    raise PoolTimeout(
+                        f'No connection free in pool {self.name!r} after {self.timeout}s '
+                        f'({self.max_size} checked out)'
+                    )
+                self._condition.wait(remaining)
+
+            waited = time.monotonic() - start
+            self._in_use += 1
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            self.peak_in_use = max(self.peak_in_use, self._in_use)
+            self._update_gauges()
+        metrics.DB_POOL_CHECKOUTS.labels(self.name).inc()
+        metrics.DB_POOL_WAIT.labels(self.name).observe(waited)
+
+        try:
+            if connection is not None and self.check is not None:
+                try:
+                    self.check(connection)
+                except Exception:
+                    logger.warning('Discarding unusable pooled connection', exc_info=True)
+                    self.failed_checks += 1
+                    _close_quietly(connection)
+                    connection = None
+            if connection is None:
+                connection = connect()
+                self.opened += 1
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._in_use -= 1
+                self._update_gauges()
+                self._condition.notify()
+            raise
+        return connection
+
+    def putconn(self, connection):
+        """
+        Return a checked-out connection
+        """
+        if os.getpid() != self.pid:
+            # Inherited over fork(): the socket is the parent's
+            return
+        keep = not self.closed and _reset(connection)
+        to_close = [] if keep else [connection]
+        with self._condition:
+            self._in_use -= 1
+            if keep:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._size -= 1
+            to_close.extend(self._expire())
+            self._update_gauges()
+            self._condition.notify()
+        for stale in to_close:
+            _close_quietly(stale)
+
+    def close(self):
+        """
+        Close the idle connections; checked-out ones close when returned
+        """
+        with self._condition:
+            self.closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._update_gauges()
+            self._condition.notify_all()
+        for connection in idle:
+            _close_quietly(connection)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'max_size': self.max_size,
+                'saturation': self._in_use / self.max_size,
+                'peak_in_use': self.peak_in_use,
+                'checkouts': self.checkouts,
+                'opened': self.opened,
+                'failed_checks': self.failed_checks,
+                'timeouts': self.timeouts,
+                'wait_seconds': self.wait_seconds,
+                'max_wait_seconds': self.max_wait_seconds,
+            }
+
+    def _expire(self):
+        # Caller holds the lock; the oldest returned are on the left
+        if not self.max_idle:
+            return []
+        cutoff = time.monotonic() - self.max_idle
+        expired = []
+        while self._idle and self._size > self.min_size and self._idle[0][1] < cutoff:
+            expired.append(self._idle.popleft()[0])
+            self._size -= 1
+        return expired
+
+    def _update_gauges(self):
+        metrics.DB_POOL_CONNECTIONS.labels(self.name, 'idle').set(len(self._idle))
+        metrics.DB_POOL_CONNECTIONS.labels(self.name, 'in_use').set(self._in_use)
+        metrics.DB_POOL_SATURATION.labels(self.name).set(self._in_use / self.max_size)
+
+
+def _reset(connection):
+    """
+    Make a returned connection reusable, or report that it isn't
+    """
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status in (INTRANS, INERROR):
+        try:
+            connection.rollback()
+        except Exception:
+            return False
+        return True
+    return status == IDLE
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+# Pools copied into a forked child; kept referenced so garbage collection
+# never closes the parent's sockets from here
+_inherited = []
+
+
+def get_pool(alias, conn_params, options, check=None):
+    """
+    The process-wide pool for these connection parameters
+
+    `options` is OPTIONS['pool']: True for the defaults, or a dict of
+    min_size, max_size, max_idle and timeout.
+    """
+    key = (alias, repr(sorted(conn_params.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = options if isinstance(options, dict) else {}
+            pool = _pools[key] = ConnectionPool(
+                alias, check=check, dbname=conn_params.get('dbname'), **options
+            )
+        return pool
+
+
+def close_pools(dbname=None):
+    """
+    Close and forget the pools (for one database name only, if given),
+    e.g. before DROP DATABASE
+    """
+    with _pools_lock:
+        pools = [
+            (key, pool) for key, pool in _pools.items()
+            if dbname is None or pool.dbname == dbname
+        ]
+        for key, _ in pools:
+            del _pools[key]
+    for _, pool in pools:
+        pool.close()
+
+
+def pool_stats():
+    """
+    stats() of every pool in this process, by alias and database name
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {f'{pool.name}:{pool.dbname}': pool.stats() for pool in pools}
+
+
+def _after_fork_in_child():
+    global _pools_lock
+    _inherited.extend(_pools.values())
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import threading
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyStore:
+    """
+    Storage for the first response to each idempotency key
+
+    An entry is a dict: {'fingerprint', 'status', 'data', 'headers'}, with
+    status None while the first request is still running (a claim).
+    claim() must be atomic across every process that serves requests:
+    exactly one caller gets None back and executes.
+    """
+    # A claim older than this is abandoned (e.g. the worker died)
+    lock_timeout = 60
+
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = ttl if ttl is not None else settings.IDEMPOTENCY_TTL
+        self.max_entries = max_entries if max_entries is not None else settings.IDEMPOTENCY_MAX_ENTRIES
+
+    def claim(self, key, fingerprint):
+        """
+        Claim `key` and return None, or return the existing entry
+        """
+        raise NotImplementedError
+
+    def complete(self, key, entry):
+        raise NotImplementedError
+
+    def release(self, key):
+        """
+        Drop a claim so a retry executes again
+        """
+        raise NotImplementedError
+
+
+class CacheIdempotencyStore(IdempotencyStore):
+    """
+    Entries in a Django cache (IDEMPOTENCY_CACHE_ALIAS)
+
+    cache.add() is the claim, so concurrent duplicates are only caught
+    across workers when the cache is shared (e.g. Redis, Memcached, file
+    based). Size is bounded by the backend's own eviction (MAX_ENTRIES,
+    culling, maxmemory).
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.IDEMPOTENCY_CACHE_ALIAS]
+
+    def claim(self, key, fingerprint):
+        claim = {'fingerprint': fingerprint, 'status': None}
+        if self.cache.add(key, claim, timeout=self.lock_timeout):
+            return None
+        # Released or expired in between: claiming again is still safe
+        return self.cache.get(key) or self.claim(key, fingerprint)
+
+    def complete(self, key, entry):
+        self.cache.set(key, entry, timeout=self.ttl)
+
+    def release(self, key):
+        self.cache.delete(key)
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """
+    Entries in the core_idempotencyrecord table
+
+    The primary key makes claims atomic across every worker. Every
+    `prune_every` claims a process deletes expired rows and, above
+    `max_entries`, the oldest ones.
+    """
+    prune_every = 100
+    _claims = 0
+    _lock = threading.Lock()
+
+    def claim(self, key, fingerprint):
+        from .models import IdempotencyRecord
+        self._maybe_prune()
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=self.lock_timeout),
+                )
+            return None
+        except IntegrityError:
+            pass
+
+        record = IdempotencyRecord.objects.filter(key=key).first()
+        if record is not None and record.expires_at <= now:
+            # Expired, or a claim abandoned by a dead worker: whoever
+            # deletes it claims the key next
+            if IdempotencyRecord.objects.filter(key=key, expires_at__lte=now).delete()[0]:
+                return self.claim(key, fingerprint)
+            record = IdempotencyRecord.objects.filter(key=key).first()
+        if record is None:
+            # Released in between
+            return self.claim(key, fingerprint)
+        return record.as_entry()
+
+    def complete(self, key, entry):
+        from .models import IdempotencyRecord
+        IdempotencyRecord.objects.filter(key=key).update(
+            status_code=entry['status'],
+            response={'data': entry['data'], 'headers': entry['headers']},
+            expires_at=timezone.now() + timedelta(seconds=self.ttl),
+        )
+
+    def release(self, key):
+        from .models import IdempotencyRecord
+        IdempotencyRecord.objects.filter(key=key, status_code__isnull=True).delete()
+
+    def _maybe_prune(self):
+        with self._lock:
+            DatabaseIdempotencyStore._claims += 1
+            if DatabaseIdempotencyStore._claims % self.prune_every:
+                return
+        self.prune()
+
+    def prune(self):
+        """
+        Delete expired entries, then the oldest beyond max_entries
+        """
+        from .models import IdempotencyRecord
+        IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).delete()
+        cutoff = (
+            IdempotencyRecord.objects
+            .order_by('-created_at')
+            .values_list('created_at', flat=True)[self.max_entries:self.max_entries + 1]
+        )
+        if cutoff:
+            IdempotencyRecord.objects.filter(created_at__lte=cutoff[0], status_code__isnull=False).delete()
+
+
+_stores = {}
+
+
+def get_store():
+    """
+    The configured IDEMPOTENCY_STORE, one instance per class per process
+    """
+    path = settings.IDEMPOTENCY_STORE
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
+
+
+def fingerprint(request):
+    """
+    Hash of the parsed body, so formatting differences don't count
+    """
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def idempotent(method):
+    """
+    Honour an Idempotency-Key header on a POST viewset action
+
+    The first response (including 4xx, which a retry would repeat) is
+    stored per user, route and key; a retry with the same body gets it
+    back with `Idempotent-Replayed: true` and nothing runs again. The same
+    key with a different body is a 422, and a duplicate arriving while the
+    first is still running a 409 with Retry-After. 5xx and unexpected
+    errors release the key so the client can retry.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        client_key = request.headers.get(HEADER)
+        if client_key is None:
+            return method(self, request, *args, **kwargs)
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{HEADER} must be 1-{MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        store = get_store()
+        raw = f'{request.user.pk}:{request.method}:{request.path}:{client_key}'
+        key = 'idempotency:' + hashlib.sha256(raw.encode()).hexdigest()
+        body_hash = fingerprint(request)
+
+        entry = store.claim(key, body_hash)
+        if entry is not None:
+            return replay(entry, body_hash)
+
+        try:
+            try:
+                response = method(self, request, *args, **kwargs)
+            except APIException as exc:
+                # Validation errors are part of the stored outcome
+                response = self.handle_exception(exc)
+        except Exception:
+            store.release(key)
+            raise
+
+        if response.status_code >= 500:
+            store.release(key)
+            return response
+        headers = {name: response[name] for name in ('Location',) if response.has_header(name)}
+        data = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+        store.complete(key, {
+            'fingerprint': body_hash,
+            'status': response.status_code,
+            'data': data,
+            'headers': headers,
+        })
+        return response
+    return wrapper
+
+
+def replay(entry, body_hash):
+    if entry['fingerprint'] != body_hash:
+        return Response(
+            {'error': f'{HEADER} was already used with a different request body'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if entry['status'] is None:
+        response = Response(
+            {'error': 'A request with this Idempotency-Key is still in progress'},
+            status=status.HTTP_409_CONFLICT
+        )
+        response['Retry-After'] = '1'
+        return response
+
+    response = Response(entry['data'], status=entry['status'], headers=entry['headers'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
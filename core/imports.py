@@ -0,0 +1,363 @@
+import csv
+import io
+from typing import NamedTuple
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+
+# Literal patterns embedded in the validation SQL (no quotes or '%')
+DIGITS = '^[0-9]+$'
+INTEGER = '^-?[0-9]{1,9}$'
+EMAIL = r'^[^@\s]+@[^@\s]+[.][^@\s]+$'
+
+TRUE_VALUES = sorted({value.lower() for value in serializers.BooleanField.TRUE_VALUES if isinstance(value, str)})
+FALSE_VALUES = sorted({value.lower() for value in serializers.BooleanField.FALSE_VALUES if isinstance(value, str)})
+
+
+class CsvImportError(Exception):
+    """
+    The file as a whole is unusable (header, CSV syntax, encoding);
+    nothing was imported
+    """
+
+
+class Rule(NamedTuple):
+    """
+    Rows matching `condition` get `message` for `field`
+    """
+    field: str
+    message: str
+    condition: str
+    params: tuple = ()
+
+
+def copy_from(cursor, sql, stream, chunk_size=1 << 16):
+    """
+    Run COPY ... FROM STDIN reading `stream` (file-like) on a Django cursor
+
+    Driver errors are raised as Django's DatabaseError subclasses.
+    """
+    raw = cursor.cursor
+    with cursor.db.wrap_database_errors:
+        if hasattr(raw, 'copy_expert'):  # psycopg2
+            raw.copy_expert(sql, stream, size=chunk_size)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                while chunk := stream.read(chunk_size):
+                    copy.write(chunk)
+
+
+class StagedImport:
+    """
+    Import a CSV file through a temporary staging table
+
+    1. COPY the file into a text-only staging table (batched INSERTs on
+       databases without COPY); each row keeps its position in the file
+    2. Trim every cell; empty cells become NULL
+    3. Run each validation rule as one INSERT ... SELECT into an errors
+       table; like a serializer, a field reports only its first error
+    4. Delete the invalid rows from staging and upsert the rest in one
+       statement (write())
+
+    Subclasses declare `columns`, `required_columns`, rules() and write().
+    With mode='all_or_nothing' a single invalid row blocks the import.
+    """
+    model = None
+    columns = ()
+    required_columns = ()
+    # Rows listed in the report; the counts cover every row
+    max_reported_rows = 1000
+    batch_size = 5000
+
+    staging = 'import_staging'
+    errors = 'import_errors'
+
+    def __init__(self, user=None, mode='all_or_nothing', dry_run=False):
+        self.user = user
+        self.mode = mode
+        self.dry_run = dry_run
+        self.header = ()
+
+    def run(self, stream):
+        """
+        Import the text stream and return the report
+        """
+        try:
+            self.header = self.read_header(stream)
+            with transaction.atomic(), connection.cursor() as cursor:
+                self.cursor = cursor
+                self.create_tables()
+                self.load(stream)
+                self.normalize()
+                self.validate()
+                report = self.build_report()
+                report['importable'] = report['valid_rows'] > 0 and (
+                    self.mode == 'partial' or report['invalid_rows'] == 0
+                )
+                written = report['importable'] and not self.dry_run
+                report['created'], report['updated'] = (0, 0)
+                if written:
+                    self.execute(
+                        f'DELETE FROM {self.staging} WHERE csv_row IN (SELECT csv_row FROM {self.errors})'
+                    )
+                    report['created'], report['updated'] = self.write(timezone.now())
+                self.execute(f'DROP TABLE {self.errors}')
+                self.execute(f'DROP TABLE {self.staging}')
+        except UnicodeDecodeError:
+            raise CsvImportError('The file must be UTF-8 encoded')
+        if written:
+            self.invalidate_caches()
+        return report
+
+    def read_header(self, stream):
+        try:
+            header = next(csv.reader([stream.readline()]))
+        except StopIteration:
+            header = []
+        header = [name.strip().lower() for name in header]
+        if not any(header):
+            raise CsvImportError('The file is empty')
+
+        unknown = [name for name in header if name not in self.columns]
+        missing = [name for name in self.required_columns if name not in header]
+        duplicated = sorted({name for name in header if header.count(name) > 1})
+        problems = []
+        if unknown:
+            problems.append(f"unknown column(s) {', '.join(unknown)}")
+        if missing:
+            problems.append(f"missing column(s) {', '.join(missing)}")
+        if duplicated:
+            problems.append(f"repeated column(s) {', '.join(duplicated)}")
+        if problems:
+            raise CsvImportError(
+                f"Bad header: {'; '.join(problems)}. Columns: {', '.join(self.columns)}"
+            )
+        return tuple(header)
+
+    def create_tables(self):
+        # PostgreSQL numbers the COPYed rows itself
+        row_type = 'serial' if connection.vendor == 'postgresql' else 'integer'
+        columns = ', '.join(f'{self.q(name)} text' for name in self.columns)
+        for table in (self.staging, self.errors):
+            self.execute(f'DROP TABLE IF EXISTS {table}')
+        self.execute(f'CREATE TEMPORARY TABLE {self.staging} (csv_row {row_type} PRIMARY KEY, {columns})')
+        self.execute(f'CREATE TEMPORARY TABLE {self.errors} (csv_row integer, field text, message text)')
+        self.execute(f'CREATE INDEX {self.errors}_field ON {self.errors} (field, csv_row)')
+
+    def load(self, stream):
+        columns = ', '.join(self.q(name) for name in self.header)
+        if connection.vendor == 'postgresql':
+            try:
+                copy_from(
+                    self.cursor,
+                    f'COPY {self.staging} ({columns}) FROM STDIN WITH (FORMAT csv)',
+                    stream
+                )
+            except DatabaseError as exc:
+                # e.g. 'extra data after last expected column' + the line number
+                raise CsvImportError(' '.join(str(exc).split()))
+            self.execute(f'ANALYZE {self.staging}')
+            return
+
+        sql = (
+            f'INSERT INTO {self.staging} (csv_row, {columns}) '
+            f"VALUES (%s, {', '.join(['%s'] * len(self.header))})"
+        )
+        batch = []
+        for number, row in enumerate(csv.reader(stream), start=1):
+            if len(row) != len(self.header):
+                raise CsvImportError(
+                    f'Row {number}: expected {len(self.header)} columns, got {len(row)}'
+                )
+            batch.append([number, *row])
+            if len(batch) >= self.batch_size:
+                self.cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            self.cursor.executemany(sql, batch)
+
+    def normalize(self):
+        assignments = ', '.join(
+            f"{self.q(name)} = NULLIF(TRIM({self.q(name)}), '')" for name in self.header
+        )
+        self.execute(f'UPDATE {self.staging} SET {assignments}')
+
+    def validate(self):
+        for rule in self.rules():
+            self.execute(
+                f'INSERT INTO {self.errors} (csv_row, field, message) '
+                f'SELECT {self.staging}.csv_row, %s, %s FROM {self.staging} '
+                f'WHERE ({rule.condition}) AND {self.staging}.csv_row NOT IN '
+                f'(SELECT {self.errors}.csv_row FROM {self.errors} WHERE {self.errors}.field = %s)',
+                [rule.field, rule.message, *rule.params, rule.field]
+            )
+
+    def build_report(self):
+        total = self.fetch_value(f'SELECT COUNT(*) FROM {self.staging}')
+        invalid = self.fetch_value(f'SELECT COUNT(DISTINCT csv_row) FROM {self.errors}')
+        self.cursor.execute(
+            f'SELECT csv_row, field, message FROM {self.errors} '
+            f'WHERE csv_row IN (SELECT DISTINCT csv_row FROM {self.errors} ORDER BY csv_row LIMIT %s) '
+            f'ORDER BY csv_row, field',
+            [self.max_reported_rows]
+        )
+        errors = {}
+        for row, field, message in self.cursor.fetchall():
+            errors.setdefault(row, {}).setdefault(field, []).append(message)
+        return {
+            'rows': total,
+            'valid_rows': total - invalid,
+            'invalid_rows': invalid,
+            'errors': [{'row': row, 'errors': fields} for row, fields in errors.items()],
+            'dry_run': self.dry_run,
+        }
+
+    def rules(self):
+        raise NotImplementedError
+
+    def write(self, now):
+        """
+        Upsert the staging rows, all valid by now; return (created, updated)
+        """
+        raise NotImplementedError
+
+    def invalidate_caches(self):
+        """
+        The raw SQL writes skip the model signals
+        """
+
+    # SQL building blocks for rules() and write(); staging columns are
+    # qualified with the table name so subqueries can't capture them
+
+    def q(self, name):
+        return connection.ops.quote_name(name)
+
+    def col(self, name):
+        return f'{self.staging}.{self.q(name)}'
+
+    def matches(self, name, pattern):
+        # '~ %s' on PostgreSQL, 'REGEXP %s' on SQLite (Python re)
+        literal = f"'{pattern}'"
+        return f"{self.col(name)} {connection.operators['regex'] % literal}"
+
+    def as_integer(self, name):
+        # Guarded so the cast never sees a row that failed the integer rule
+        return f'CASE WHEN {self.matches(name, INTEGER)} THEN CAST({self.col(name)} AS integer) END'
+
+    def as_boolean(self, name, default=True):
+        values = ', '.join(f"'{value}'" for value in TRUE_VALUES)
+        return (
+            f'CASE WHEN {self.col(name)} IS NULL THEN {self.boolean(default)} '
+            f'WHEN LOWER({self.col(name)}) IN ({values}) THEN {self.boolean(True)} '
+            f'ELSE {self.boolean(False)} END'
+        )
+
+    @staticmethod
+    def boolean(value):
+        if connection.vendor == 'postgresql':
+            return 'TRUE' if value else 'FALSE'
+        return '1' if value else '0'
+
+    def blank(self, name):
+        return Rule(name, 'This field may not be blank.', f'{self.col(name)} IS NULL')
+
+    def too_long(self, name, max_length):
+        return Rule(
+            name, f'Ensure this field has no more than {max_length} characters.',
+            f'LENGTH({self.col(name)}) > %s', (max_length,)
+        )
+
+    def length_outside(self, name, low, high, message):
+        return Rule(name, message, f'LENGTH({self.col(name)}) NOT BETWEEN %s AND %s', (low, high))
+
+    def not_matching(self, name, pattern, message):
+        return Rule(name, message, f'{self.col(name)} IS NOT NULL AND NOT ({self.matches(name, pattern)})')
+
+    def not_in(self, name, values, message):
+        placeholders = ', '.join(['%s'] * len(values))
+        return Rule(name, message, f'{self.col(name)} NOT IN ({placeholders})', tuple(values))
+
+    def integer(self, name, message='A valid integer is required.'):
+        return Rule(name, message, f'{self.col(name)} IS NULL OR NOT ({self.matches(name, INTEGER)})')
+
+    def integer_where(self, name, comparison, value, message):
+        return Rule(name, message, f'{self.as_integer(name)} {comparison} %s', (value,))
+
+    def boolean_rule(self, name):
+        values = ', '.join(f"'{value}'" for value in TRUE_VALUES + FALSE_VALUES)
+        return Rule(name, 'Must be a valid boolean.', f'LOWER({self.col(name)}) NOT IN ({values})')
+
+    def repeated(self, name, message):
+        """
+        Every occurrence of a value after its first row
+        """
+        return Rule(
+            name, message,
+            f'{self.col(name)} IS NOT NULL AND {self.staging}.csv_row NOT IN '
+            f'(SELECT MIN(earlier.csv_row) FROM {self.staging} earlier '
+            f'WHERE earlier.{self.q(name)} IS NOT NULL GROUP BY earlier.{self.q(name)})'
+        )
+
+    def execute(self, sql, params=None):
+        self.cursor.execute(sql, params)
+
+    def fetch_value(self, sql, params=None):
+        self.cursor.execute(sql, params)
+        return self.cursor.fetchone()[0]
+
+
+class CsvImportSerializer(serializers.Serializer):
+    """
+    Multipart body of the import endpoints
+    """
+    file = serializers.FileField()
+    mode = serializers.ChoiceField(
+        choices=['all_or_nothing', 'partial'],
+        default='all_or_nothing'
+    )
+    dry_run = serializers.BooleanField(default=False)
+
+
+class ImportMixin:
+    """
+    Adds POST {prefix}/import/ taking a CSV upload (multipart field `file`)
+
+    `import_class` (a StagedImport) does the work; the response is its
+    report: row counts, created/updated and per-row errors keyed by the
+    row's position in the file (1 = first row after the header).
+    """
+    import_class = None
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_csv(self, request):
+        """
+        Validate and upsert a CSV file
+        """
+        envelope = CsvImportSerializer(data=request.data)
+        envelope.is_valid(raise_exception=True)
+        upload = envelope.validated_data['file']
+        importer = self.import_class(
+            user=request.user,
+            mode=envelope.validated_data['mode'],
+            dry_run=envelope.validated_data['dry_run'],
+        )
+
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            report = importer.run(stream)
+        except CsvImportError as exc:
+            raise ValidationError({'file': [str(exc)]})
+
+        name = self.basename
+        if not report['importable']:
+            report['message'] = f'No {name}s imported'
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        if report['dry_run']:
+            report['message'] = f"{report['valid_rows']} {name}s would be imported"
+        else:
+            report['message'] = f"{report['created']} {name}s created, {report['updated']} updated"
+        return Response(report, status=status.HTTP_200_OK)
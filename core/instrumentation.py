@@ -0,0 +1,107 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Metrics of the request being handled in this context. asgiref copies the
+# context into sync_to_async threads, so queries issued by async views
+# are attributed to their request as well.
+current_metrics = ContextVar('current_metrics', default=None)
+
+# Only reads are N+1 signatures: batched writes (bulk_create's INSERT per
+# batch, savepoints) repeat one statement by design
+N_PLUS_ONE_STATEMENTS = ('SELECT',)
+
+
+class RequestMetrics:
+    """
+    Query count, SQL time and per-phase timings of one request
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view = ''
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.phases = Counter()
+        self._active = set()
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        if sql.lstrip().upper().startswith(N_PLUS_ONE_STATEMENTS):
+            self.statements[sql] += 1
+
+    def repeated_statements(self, threshold):
+        """
+        SELECTs executed at least `threshold` times (placeholders, not values)
+        """
+        return [
+            {'sql': sql, 'count': count}
+            for sql, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+def record_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper timing every statement into the current request
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, time.perf_counter() - start)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """
+    connection_created receiver: add record_queries to the connection
+
+    This is the hook connection.execute_wrapper() uses, registered once
+    per connection instead of per request so it also covers connections
+    owned by the threads async views run their ORM calls in.
+    """
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in the block to `phase` of the current request
+
+    Re-entrant: nested blocks of the same phase are only counted once.
+    """
+    metrics = current_metrics.get()
+    if metrics is None or phase in metrics._active:
+        yield
+        return
+
+    metrics._active.add(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.phases[phase] += time.perf_counter() - start
+        metrics._active.discard(phase)
+
+
+class TimedRepresentationMixin:
+    """
+    Count a serializer's to_representation() as 'serialize' time
+
+    Nested serializers and list items run inside the outermost block, so
+    each object is only counted once. Lazy-loaded relations make queries
+    here too; those show up in both db and serialize time.
+    """
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
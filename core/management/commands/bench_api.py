@@ -0,0 +1,277 @@
+import json
+import logging
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import User
+from core.benchmarking import (
+    client_settings,
+    find_regressions,
+    format_table,
+    peak_rss_mb,
+    server_timing_queries,
+    summarize,
+)
+from core.seeding import SyntheticDataset
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+
+# Patients per scale; users, doctors and mappings are derived in dataset_sizes()
+SCALES = {'1k': 1_000, '100k': 100_000, '1M': 1_000_000}
+PREFIX = 'bench'
+SEED = 42
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Scenario(NamedTuple):
+    """
+    One endpoint to drive; path and payload take the request index
+    """
+    name: str
+    method: str
+    path: Callable[[int], str]
+    payload: Optional[Callable[[int], dict]] = None
+    status: int = 200
+    cap: Optional[int] = None  # at most this many requests
+    on_response: Optional[Callable] = None
+    authenticated: bool = True
+
+
+def dataset_sizes(patients):
+    return {
+        'users': max(10, patients // 100),
+        'doctors': max(100, patients // 10),
+        'patients': patients,
+        'mappings_per_patient': 2,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database at each scale and drive every API "
+        "endpoint with concurrent clients. Reports p50/p95/p99 latency, "
+        "throughput, queries per request and peak RSS; compares against a "
+        "JSON baseline and fails when a tracked metric regresses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', action='append', choices=list(SCALES),
+                            help='Dataset size in patients (repeatable, default 1k)')
+        parser.add_argument('--requests', type=int, default=300,
+                            help='Requests per endpoint (login is capped at 50)')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--baseline', default='benchmarks/api-baseline.json')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Write the results to --baseline instead of comparing')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed regression as a fraction (0.25 = 25%%)')
+        parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                            help='Ignore latency regressions smaller than this')
+        parser.add_argument('--cache', action='store_true',
+                            help='Keep the configured response cache (default: disabled)')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the test database; reused when it holds the same scale')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='seed_data COPY workers (PostgreSQL)')
+
+    def handle(self, *args, **options):
+        scales = options['scale'] or ['1k']
+        results, memory = {}, {}
+        request_log = logging.getLogger('core.requests')
+        log_disabled, request_log.disabled = request_log.disabled, True
+        try:
+            for scale in sorted(scales, key=SCALES.get):
+                results[scale] = self.run_scale(scale, options)
+                memory[scale] = round(peak_rss_mb(), 1)
+                self.report(scale, results[scale], memory[scale], options)
+        finally:
+            request_log.disabled = log_disabled
+
+        document = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'vendor': connection.vendor,
+                'python': platform.python_version(),
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'cache': options['cache'],
+            },
+            'peak_rss_mb': memory,
+            'results': results,
+        }
+        self.check_baseline(document, options)
+
+    def run_scale(self, scale, options):
+        """
+        Seed a test database at `scale` and benchmark every endpoint on it
+        """
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'], serialize=False
+        )
+        try:
+            sizes = dataset_sizes(SCALES[scale])
+            self.seed(sizes, options)
+            caches = {} if options['cache'] else {'CACHES': NO_CACHE}
+            with client_settings(SERVER_TIMING=True, **caches):
+                return self.run_endpoints(options)
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+    def seed(self, sizes, options):
+        if (
+            Patient.objects.count() == sizes['patients']
+            and User.objects.filter(email__endswith=f'@{PREFIX}.example.com').count() == sizes['users']
+        ):
+            self.stdout.write(f"Reusing kept dataset ({sizes['patients']} patients)")
+            return
+        call_command('flush', interactive=False, verbosity=0)
+        self.stdout.write(f"Seeding {sizes['patients']} patients...")
+        seed_options = {'seed': SEED, 'prefix': PREFIX, 'stdout': self.stdout}
+        if options['workers']:
+            seed_options['workers'] = options['workers']
+        call_command('seed_data', **sizes, **seed_options)
+
+    def run_endpoints(self, options):
+        user = User.objects.order_by('id').filter(email__endswith=f'@{PREFIX}.example.com').first()
+        token = str(RefreshToken.for_user(user).access_token)
+        patient_ids = list(
+            Patient.objects.filter(created_by=user).order_by('id').values_list('id', flat=True)
+        )
+        if not patient_ids:
+            raise CommandError(f'Benchmark user {user.email} owns no patients')
+        created = []
+
+        def patient_payload(i):
+            return {
+                'name': f'Bench Patient {i}',
+                'age': 20 + i % 60,
+                'gender': 'MFO'[i % 3],
+                'contact': '5551234567',
+                'address': '1 Bench Street',
+            }
+
+        def remember(response):
+            created.append(response.json()['patient']['id'])
+
+        scenarios = [
+            Scenario('auth.login', 'post', lambda i: '/api/auth/login/',
+                     payload=lambda i: {'email': user.email, 'password': SyntheticDataset.default_password},
+                     cap=50, authenticated=False),
+            Scenario('patients.create', 'post', lambda i: '/api/patients/',
+                     payload=patient_payload, status=201, on_response=remember),
+            Scenario('patients.list', 'get', lambda i: '/api/patients/'),
+            Scenario('patients.retrieve', 'get',
+                     lambda i: f'/api/patients/{patient_ids[i % len(patient_ids)]}/'),
+            Scenario('patients.update', 'put',
+                     lambda i: f'/api/patients/{patient_ids[i % len(patient_ids)]}/',
+                     payload=patient_payload),
+            # Removes what patients.create added
+            Scenario('patients.delete', 'delete', lambda i: f'/api/patients/{created[i]}/'),
+            Scenario('doctors.list', 'get', lambda i: '/api/doctors/'),
+            Scenario('doctors.available', 'get', lambda i: '/api/doctors/available/'),
+            Scenario('doctors.by_specialization', 'get',
+                     lambda i: '/api/doctors/by_specialization/?specialization=CARDIOLOGY'),
+            Scenario('mappings.by_patient', 'get',
+                     lambda i: f'/api/mappings/patient/{patient_ids[i % len(patient_ids)]}/'),
+            Scenario('mappings.active', 'get', lambda i: '/api/mappings/active/'),
+        ]
+
+        results = {}
+        for scenario in scenarios:
+            requests = min(options['requests'], scenario.cap or options['requests'])
+            if scenario.name == 'patients.delete':
+                requests = min(requests, len(created))
+            concurrency = options['concurrency']
+            if connection.vendor == 'sqlite' and scenario.method != 'get':
+                # SQLite's shared in-memory test database locks concurrent writers
+                concurrency = 1
+            results[scenario.name] = self.run_endpoint(scenario, token, requests, concurrency)
+        return results
+
+    def run_endpoint(self, scenario, token, requests, concurrency):
+        headers = {'Authorization': f'Bearer {token}'} if scenario.authenticated else {}
+
+        def one(i):
+            kwargs = {'headers': headers}
+            if scenario.payload is not None:
+                kwargs.update(data=scenario.payload(i), content_type='application/json')
+            path = scenario.path(i)
+            start = time.perf_counter()
+            response = getattr(Client(), scenario.method)(path, **kwargs)
+            elapsed = time.perf_counter() - start
+            if response.status_code != scenario.status:
+                raise CommandError(
+                    f'{scenario.method.upper()} {path} returned {response.status_code}: '
+                    f'{response.content[:200]!r}'
+                )
+            if scenario.on_response is not None:
+                scenario.on_response(response)
+            return elapsed, server_timing_queries(response)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(one, range(requests)))
+            # Worker threads opened their own connections
+            list(executor.map(lambda _: connections.close_all(), range(concurrency)))
+        result = summarize([elapsed for elapsed, _ in outcomes], time.perf_counter() - start)
+        queries = [count for _, count in outcomes if count is not None]
+        result['queries'] = max(queries) if queries else None
+        return result
+
+    def report(self, scale, results, memory, options):
+        rows = [
+            [
+                name,
+                f"{result['throughput']:.1f}",
+                f"{result['p50_ms']:.1f}",
+                f"{result['p95_ms']:.1f}",
+                f"{result['p99_ms']:.1f}",
+                result['queries'] if result['queries'] is not None else '-',
+            ]
+            for name, result in results.items()
+        ]
+        self.stdout.write(
+            f"\nscale={scale} ({SCALES[scale]} patients) concurrency={options['concurrency']} "
+            f"peak RSS={memory:.1f} MB"
+        )
+        self.stdout.write(format_table(['endpoint', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries'], rows))
+
+    def check_baseline(self, document, options):
+        path = Path(options['baseline'])
+        if options['save_baseline']:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(document, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {path}'))
+            return
+        if not path.exists():
+            self.stdout.write(f'No baseline at {path}; run with --save-baseline to create one')
+            return
+
+        baseline = json.loads(path.read_text())
+        for key in ('vendor', 'requests', 'concurrency', 'cache'):
+            if baseline['meta'].get(key) != document['meta'][key]:
+                self.stdout.write(self.style.WARNING(
+                    f"Baseline {key}={baseline['meta'].get(key)!r} differs from this run "
+                    f"({document['meta'][key]!r}); comparisons may be meaningless"
+                ))
+        regressions = find_regressions(
+            document['results'], baseline['results'],
+            options['threshold'], options['min_delta_ms'],
+        )
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} metric(s) regressed more than '
+                f"{options['threshold']:.0%} against {path}:\n  " + '\n  '.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {path}'))
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import User
+from core.benchmarking import client_settings, format_table, summarize, throwaway_database
+from doctors.models import Doctor
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+
+BENCH_EMAIL = 'bench-async@example.com'
+BENCH_DOCTOR_DOMAIN = '@bench-async.example.com'
+
+# Response caching would turn both sides into cache reads; measure the views
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/sec and latency of the hot read endpoints on the "
+        "sync WSGI path (thread pool) against the native async views under "
+        "ASGI at the same concurrency. Runs in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Requests per endpoint and mode')
+        parser.add_argument('--concurrency', type=int, default=64,
+                            help='Requests in flight at once')
+        parser.add_argument('--patients', type=int, default=200)
+        parser.add_argument('--doctors', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            rows = self.compare(options)
+
+        self.stdout.write(f"concurrency={options['concurrency']} requests={options['requests']}")
+        self.stdout.write(format_table(['endpoint', 'mode', 'req/s', 'p50 ms', 'p99 ms'], rows))
+
+    def compare(self, options):
+        user = self.seed(options['patients'], options['doctors'])
+        token = str(RefreshToken.for_user(user).access_token)
+        patient_id = Patient.objects.owned_by(user).order_by('id').values_list('id', flat=True)[0]
+
+        endpoints = [
+            '/api/patients/',
+            f'/api/patients/{patient_id}/',
+            '/api/doctors/',
+            '/api/doctors/available/',
+            '/api/doctors/by_specialization/?specialization=Cardiology',
+            f'/api/mappings/patient/{patient_id}/',
+            '/api/mappings/active/',
+        ]
+
+        rows = []
+        for path in endpoints:
+            with client_settings(CACHES=NO_CACHE):
+                sync = self.run_sync(path, token, options['requests'], options['concurrency'])
+            with client_settings(CACHES=NO_CACHE, ROOT_URLCONF='healthcare_backend.asgi_urls'):
+                native = asyncio.run(
+                    self.run_async(path, token, options['requests'], options['concurrency'])
+                )
+            for mode, result in (('wsgi', sync), ('asgi', native)):
+                rows.append([
+                    path, mode,
+                    f"{result['throughput']:.1f}",
+                    f"{result['p50_ms']:.1f}",
+                    f"{result['p99_ms']:.1f}",
+                ])
+        return rows
+
+    def seed(self, patients, doctors):
+        user = User.objects.create_user(
+            email=BENCH_EMAIL, username=BENCH_EMAIL, name='Bench', password=None
+        )
+        specializations = ['Cardiology', 'Neurology', 'Orthopedics', 'Pediatrics']
+        doctor_rows = Doctor.objects.bulk_create([
+            Doctor(
+                name=f'Dr Bench {i}',
+                specialization=specializations[i % len(specializations)],
+                contact='5550000000',
+                email=f'doctor{i}{BENCH_DOCTOR_DOMAIN}',
+                experience_years=i % 30,
+                qualification='MD',
+                available=i % 3 != 0,
+            )
+            for i in range(doctors)
+        ])
+        patient_rows = Patient.objects.bulk_create([
+            Patient(
+                name=f'Bench Patient {i}',
+                age=20 + i % 60,
+                gender='M' if i % 2 else 'F',
+                contact='5551111111',
+                address='1 Bench Street',
+                created_by=user,
+            )
+            for i in range(patients)
+        ])
+        PatientDoctorMapping.objects.bulk_create([
+            PatientDoctorMapping(patient=patient, doctor=doctor_rows[(i + k) % len(doctor_rows)])
+            for i, patient in enumerate(patient_rows)
+            for k in range(3)
+        ], ignore_conflicts=True)
+        return user
+
+    def run_sync(self, path, token, requests, concurrency):
+        headers = {'Authorization': f'Bearer {token}'}
+
+        def one(_):
+            start = time.perf_counter()
+            response = Client().get(path, headers=headers)
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(one, range(requests)))
+            # Worker threads opened their own connections
+            list(executor.map(lambda _: connections.close_all(), range(concurrency)))
+        return summarize(latencies, time.perf_counter() - start)
+
+    async def run_async(self, path, token, requests, concurrency):
+        client = AsyncClient()
+        headers = {'Authorization': f'Bearer {token}'}
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                assert response.status_code == 200, response.content
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[one() for _ in range(requests)])
+        return summarize(latencies, time.perf_counter() - start)
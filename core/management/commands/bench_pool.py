@@ -0,0 +1,158 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import User
+from core.benchmarking import client_settings, format_table, summarize, throwaway_database
+from core.db.pool import close_pools, pool_stats
+from doctors.models import Doctor
+from patients.models import Patient
+
+BENCH_EMAIL = 'bench-pool@example.com'
+BENCH_DOCTOR_DOMAIN = '@bench-pool.example.com'
+
+# Measure the database round trips, not cache reads
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+POSTGRES_ENGINES = ('django.db.backends.postgresql', 'core.db')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request latency of API reads when every request opens "
+        "its own PostgreSQL connection against connections checked out of "
+        "the core.db pool, at the same concurrency. Runs in a throwaway "
+        "test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000,
+                            help='Requests per endpoint and mode')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Requests in flight at once')
+        parser.add_argument('--pool-size', type=int, default=None,
+                            help='Pool max_size (default: --concurrency)')
+
+    def handle(self, *args, **options):
+        if connections.settings[DEFAULT_DB_ALIAS]['ENGINE'] not in POSTGRES_ENGINES:
+            raise CommandError('bench_pool needs PostgreSQL')
+
+        pool_size = options['pool_size'] or options['concurrency']
+        with throwaway_database():
+            rows, pools = self.compare(options, pool_size)
+
+        self.stdout.write(
+            f"concurrency={options['concurrency']} requests={options['requests']} "
+            f"pool max_size={pool_size}"
+        )
+        self.stdout.write(format_table(['endpoint', 'mode', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'], rows))
+        self.stdout.write('')
+        self.stdout.write(format_table([
+            'endpoint', 'pool', 'opened', 'checkouts', 'mean wait ms', 'max wait ms',
+            'peak saturation', 'timeouts',
+        ], pools))
+
+    def compare(self, options, pool_size):
+        # Inside throwaway_database(), so NAME is the test database's
+        base = connections.settings[DEFAULT_DB_ALIAS]
+        user = self.seed()
+        token = str(RefreshToken.for_user(user).access_token)
+        patient_id = Patient.objects.owned_by(user).values_list('id', flat=True).first()
+        endpoints = ['/api/doctors/', f'/api/patients/{patient_id}/']
+        # Start each mode without this thread's connection or pool
+        connections.close_all()
+        close_pools()
+
+        pool_options = {
+            **(base['OPTIONS'].get('pool') or {}),
+            'max_size': pool_size,
+        }
+        options_without_pool = {
+            name: value for name, value in base['OPTIONS'].items() if name != 'pool'
+        }
+        modes = {
+            # What every request did before pooling
+            'direct': {
+                'ENGINE': 'django.db.backends.postgresql',
+                'OPTIONS': options_without_pool,
+            },
+            'pooled': {
+                'ENGINE': 'core.db',
+                'OPTIONS': {**options_without_pool, 'pool': pool_options},
+            },
+        }
+
+        rows, pools = [], []
+        request_log = logging.getLogger('core.requests')
+        log_disabled, request_log.disabled = request_log.disabled, True
+        try:
+            for path in endpoints:
+                for mode, overrides in modes.items():
+                    # Threads started below build their connections from this
+                    connections.settings[DEFAULT_DB_ALIAS] = {**base, **overrides, 'CONN_MAX_AGE': 0}
+                    with client_settings(CACHES=NO_CACHE):
+                        result = self.run(path, token, options['requests'], options['concurrency'])
+                    stats = pool_stats()
+                    close_pools()
+                    rows.append([
+                        path, mode,
+                        f"{result['throughput']:.1f}",
+                        f"{result['p50_ms']:.2f}",
+                        f"{result['p95_ms']:.2f}",
+                        f"{result['p99_ms']:.2f}",
+                    ])
+                    for name, pool in stats.items():
+                        pools.append([
+                            path, name,
+                            pool['opened'],
+                            pool['checkouts'],
+                            f"{pool['wait_seconds'] / max(pool['checkouts'], 1) * 1000:.3f}",
+                            f"{pool['max_wait_seconds'] * 1000:.1f}",
+                            f"{pool['peak_in_use'] / pool['max_size']:.0%}",
+                            pool['timeouts'],
+                        ])
+        finally:
+            connections.settings[DEFAULT_DB_ALIAS] = base
+            request_log.disabled = log_disabled
+        return rows, pools
+
+    def seed(self):
+        user = User.objects.create_user(
+            email=BENCH_EMAIL, username=BENCH_EMAIL, name='Bench', password=None
+        )
+        Doctor.objects.bulk_create([
+            Doctor(
+                name=f'Dr Pool {i}',
+                specialization='CARDIOLOGY',
+                contact='5550000000',
+                email=f'doctor{i}{BENCH_DOCTOR_DOMAIN}',
+                experience_years=i % 30,
+                qualification='MD',
+            )
+            for i in range(50)
+        ])
+        Patient.objects.create(
+            name='Pool Patient', age=40, gender='F', contact='5551111111',
+            address='1 Bench Street', created_by=user
+        )
+        return user
+
+    def run(self, path, token, requests, concurrency):
+        headers = {'Authorization': f'Bearer {token}'}
+
+        def one(_):
+            start = time.perf_counter()
+            response = Client().get(path, headers=headers)
+            # The test client skips request_finished's cleanup; a server
+            # closes (or returns to the pool) the connection here
+            close_old_connections()
+            assert response.status_code == 200, response.content
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(one, range(requests)))
+            list(executor.map(lambda _: connections.close_all(), range(concurrency)))
+        return summarize(latencies, time.perf_counter() - start)
@@ -0,0 +1,165 @@
+import time
+from itertools import cycle
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import User
+from core.benchmarking import (
+    CONDITIONS, FIRST_NAMES, LAST_NAMES, STREETS,
+    client_settings, format_table, summarize, throwaway_database,
+)
+from patients.models import Patient
+from patients.views import PatientViewSet
+
+BENCH_EMAIL = 'bench-search@example.com'
+
+# Typos, partial names, contact fragments and full-text terms
+SEARCH_TERMS = (
+    'jonh smith', 'Patel', 'mria garcia', 'Khatri', 'olga ivanov',
+    '5550001', 'migraine', 'penicillin allergy', 'wiliams', 'hypothyroidism',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed patients for one user (1M by default) and measure "
+        "GET /api/patients/search/ latency per query, in a throwaway test "
+        "database. On PostgreSQL the seed is a single INSERT ... SELECT "
+        "generate_series."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=200,
+                            help='Requests per search term')
+        parser.add_argument('--target-ms', type=float, default=50.0,
+                            help='p99 latency each term must stay under')
+        parser.add_argument('--explain', action='store_true',
+                            help='Print EXPLAIN ANALYZE for each term (PostgreSQL)')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the test database and its rows for the next run')
+
+    def handle(self, *args, **options):
+        with throwaway_database(keepdb=options['keep']):
+            rows, failed = self.compare(options)
+
+        self.stdout.write(
+            f"{connection.vendor}, {options['patients']} patients, "
+            f"{options['queries']} requests per term"
+        )
+        self.stdout.write(format_table(['q', 'results', 'p50 ms', 'p95 ms', 'p99 ms'], rows))
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                f"p99 above {options['target_ms']:.0f}ms for: {', '.join(failed)}"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"All terms under {options['target_ms']:.0f}ms at p99"
+            ))
+
+    def compare(self, options):
+        user = User.objects.filter(email=BENCH_EMAIL).first()
+        if user is None:
+            user = User.objects.create_user(
+                email=BENCH_EMAIL, username=BENCH_EMAIL, name='Bench', password=None
+            )
+
+        existing = Patient.objects.owned_by(user).count()
+        if existing < options['patients']:
+            start = time.perf_counter()
+            self.seed(user, existing, options['patients'])
+            self.stdout.write(
+                f"Seeded {options['patients'] - existing} patients "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+        rows = []
+        failed = []
+        with client_settings():
+            client = Client()
+            for term in SEARCH_TERMS:
+                result, count = self.measure(client, headers, term, options['queries'])
+                if result['p99_ms'] > options['target_ms']:
+                    failed.append(term)
+                rows.append([
+                    term, count,
+                    f"{result['p50_ms']:.1f}",
+                    f"{result['p95_ms']:.1f}",
+                    f"{result['p99_ms']:.1f}",
+                ])
+                if options['explain'] and connection.vendor == 'postgresql':
+                    self.explain(user, term)
+        return rows, failed
+
+    def measure(self, client, headers, term, queries):
+        latencies = []
+        count = 0
+        start = time.perf_counter()
+        for _ in range(queries):
+            request_start = time.perf_counter()
+            response = client.get('/api/patients/search/', {'q': term}, headers=headers)
+            latencies.append(time.perf_counter() - request_start)
+            assert response.status_code == 200, response.content
+            count = response.json()['count']
+        return summarize(latencies, time.perf_counter() - start), count
+
+    def explain(self, user, term):
+        queryset = PatientViewSet().search_queryset(Patient.objects.owned_by(user), term)[:20]
+        self.stdout.write(f'-- EXPLAIN q={term!r}')
+        self.stdout.write(queryset.explain(analyze=True))
+
+    def seed(self, user, start, stop):
+        if connection.vendor == 'postgresql':
+            self.seed_postgresql(user, start, stop)
+        else:
+            self.seed_orm(user, start, stop)
+
+    def seed_postgresql(self, user, start, stop):
+        table = connection.ops.quote_name(Patient._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (
+                    name, age, gender, contact, address, medical_history,
+                    created_by_id, created_at, updated_at
+                )
+                SELECT
+                    (%(first)s::text[])[1 + i %% %(n_first)s] || ' ' ||
+                        (%(last)s::text[])[1 + (i / %(n_first)s) %% %(n_last)s],
+                    1 + i %% 90,
+                    (ARRAY['M', 'F', 'O'])[1 + i %% 3],
+                    '555' || lpad(i::text, 7, '0'),
+                    (1 + i %% 999)::text || ' ' || (%(streets)s::text[])[1 + i %% %(n_streets)s] || ' Street',
+                    NULLIF((%(conditions)s::text[])[1 + i %% %(n_conditions)s], ''),
+                    %(user)s,
+                    now() - (i || ' seconds')::interval,
+                    now()
+                FROM generate_series(%(start)s, %(stop)s - 1) AS i
+                """,
+                {
+                    'first': list(FIRST_NAMES), 'n_first': len(FIRST_NAMES),
+                    'last': list(LAST_NAMES), 'n_last': len(LAST_NAMES),
+                    'streets': list(STREETS), 'n_streets': len(STREETS),
+                    'conditions': list(CONDITIONS), 'n_conditions': len(CONDITIONS),
+                    'user': user.pk, 'start': start, 'stop': stop,
+                }
+            )
+            cursor.execute(f'ANALYZE {table}')
+
+    def seed_orm(self, user, start, stop, batch_size=10000):
+        for offset in range(start, stop, batch_size):
+            Patient.objects.bulk_create([
+                Patient(
+                    name=f'{FIRST_NAMES[i % len(FIRST_NAMES)]} '
+                         f'{LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]}',
+                    age=1 + i % 90,
+                    gender='MFO'[i % 3],
+                    contact=f'555{i:07d}',
+                    address=f'{1 + i % 999} {STREETS[i % len(STREETS)]} Street',
+                    medical_history=CONDITIONS[i % len(CONDITIONS)] or None,
+                    created_by=user,
+                )
+                for i in range(offset, min(offset + batch_size, stop))
+            ])
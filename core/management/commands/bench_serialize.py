@@ -0,0 +1,132 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.renderers import JSONRenderer
+from accounts.models import User
+from core.benchmarking import FIRST_NAMES, LAST_NAMES, STREETS, format_table, throwaway_database
+from core.projection import projection_for
+from doctors.models import Doctor
+from doctors.serializers import DoctorSerializer
+from mappings.models import PatientDoctorMapping
+from mappings.serializers import PatientDoctorMappingListSerializer
+from mappings.views import PatientDoctorMappingViewSet
+from patients.models import Patient
+from patients.serializers import PatientSerializer
+from patients.views import PatientViewSet
+
+BENCH_EMAIL = 'bench-serialize@example.com'
+BENCH_DOCTOR_DOMAIN = '@bench-serialize.example.com'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/sec of the list serializers against their values() "
+        "projections (core.projection) on lists of --rows patients, doctors "
+        "and mappings, and check both render the same JSON bytes. Runs in "
+        "a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Runs per path; the fastest counts')
+        parser.add_argument('--target', type=float, default=5.0,
+                            help='Speedup every list must reach')
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            rows, failed = self.compare(options)
+
+        self.stdout.write(f"{connection.vendor}, best of {options['repeat']} runs, fetch + serialize")
+        self.stdout.write(format_table(
+            ['list', 'rows', 'serializer rows/s', 'projection rows/s', 'speedup', 'same JSON'], rows
+        ))
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                f"Below {options['target']:.0f}x or different output for: {', '.join(failed)}"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Every list at least {options['target']:.0f}x faster with identical output"
+            ))
+
+    def compare(self, options):
+        user = self.seed(options['rows'])
+        # The querysets the list actions serialize
+        cases = [
+            ('patients', PatientSerializer, PatientViewSet().apply_action_relations(
+                Patient.objects.owned_by(user), 'list')),
+            ('doctors', DoctorSerializer, Doctor.objects.filter(email__endswith=BENCH_DOCTOR_DOMAIN)),
+            ('mappings', PatientDoctorMappingListSerializer, PatientDoctorMappingViewSet().apply_action_relations(
+                PatientDoctorMapping.objects.owned_by(user), 'list')),
+        ]
+
+        rows, failed = [], []
+        for name, serializer_class, queryset in cases:
+            projection = projection_for(serializer_class)
+            serialized, serializer_seconds = self.measure(
+                lambda: serializer_class(list(queryset), many=True).data, options['repeat']
+            )
+            projected, projection_seconds = self.measure(
+                lambda: projection.represent_many(projection.project(queryset)), options['repeat']
+            )
+            identical = JSONRenderer().render(serialized) == JSONRenderer().render(projected)
+            speedup = serializer_seconds / projection_seconds
+            if not identical or speedup < options['target']:
+                failed.append(name)
+            rows.append([
+                name, len(projected),
+                f'{len(serialized) / serializer_seconds:,.0f}',
+                f'{len(projected) / projection_seconds:,.0f}',
+                f'{speedup:.1f}x',
+                'yes' if identical else 'NO',
+            ])
+        return rows, failed
+
+    def measure(self, run, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
+
+    def seed(self, count, batch_size=5000):
+        user = User.objects.create_user(
+            email=BENCH_EMAIL, username=BENCH_EMAIL, name='Bench', password=None
+        )
+        specializations = [code for code, _ in Doctor.SPECIALIZATION_CHOICES]
+        Doctor.objects.bulk_create([
+            Doctor(
+                name=f'Dr {LAST_NAMES[i % len(LAST_NAMES)]} {i}',
+                specialization=specializations[i % len(specializations)],
+                contact=f'555{i:07d}',
+                email=f'doctor{i}{BENCH_DOCTOR_DOMAIN}',
+                experience_years=i % 40,
+                qualification='MBBS, MD',
+                available=bool(i % 3),
+            )
+            for i in range(count)
+        ], batch_size=batch_size)
+        Patient.objects.bulk_create([
+            Patient(
+                name=f'{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[i % len(LAST_NAMES)]}',
+                age=1 + i % 90,
+                gender='MFO'[i % 3],
+                contact=f'555{i:07d}',
+                address=f'{1 + i % 999} {STREETS[i % len(STREETS)]} Street',
+                medical_history=None if i % 2 else 'Asthma',
+                created_by=user,
+            )
+            for i in range(count)
+        ], batch_size=batch_size)
+        doctor_ids = Doctor.objects.filter(
+            email__endswith=BENCH_DOCTOR_DOMAIN
+        ).order_by('id').values_list('id', flat=True)
+        patient_ids = Patient.objects.owned_by(user).order_by('id').values_list('id', flat=True)
+        PatientDoctorMapping.objects.bulk_create([
+            PatientDoctorMapping(patient_id=patient_id, doctor_id=doctor_id)
+            for patient_id, doctor_id in zip(patient_ids, doctor_ids)
+        ], batch_size=batch_size)
+        return user
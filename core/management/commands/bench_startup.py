@@ -0,0 +1,104 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmarking import format_table
+
+PROFILES = ('development', 'production')
+MEASURES = ('import_ms', 'setup_ms', 'load_ms', 'startup_ms', 'process_ms', 'request_us', 'rss_mb')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure settings import, django.setup() and app load time in fresh "
+        "interpreters for each SETTINGS_PROFILE, plus the per-request "
+        "overhead of each middleware stack (core.startup_probe). Fails when "
+        "the production profile starts slower than --budget-ms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5,
+                            help='Fresh interpreters per profile (medians are reported)')
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Timed requests per interpreter')
+        parser.add_argument('--budget-ms', type=float, default=1500,
+                            help='Max production startup (import + setup + load); 0 disables')
+
+    def handle(self, *args, **options):
+        results = {}
+        for profile in PROFILES:
+            samples = [self.probe(profile, options['requests']) for _ in range(options['runs'])]
+            results[profile] = {
+                measure: statistics.median(sample[measure] for sample in samples)
+                for measure in MEASURES
+            }
+            results[profile]['modules'] = samples[-1]['modules']
+            results[profile]['middleware'] = samples[-1]['middleware']
+
+        rows = [
+            [
+                profile,
+                result['middleware'],
+                result['modules'],
+                f"{result['import_ms']:.0f}",
+                f"{result['setup_ms']:.0f}",
+                f"{result['load_ms']:.0f}",
+                f"{result['startup_ms']:.0f}",
+                f"{result['process_ms']:.0f}",
+                f"{result['request_us']:.0f}",
+                f"{result['rss_mb']:.1f}",
+            ]
+            for profile, result in results.items()
+        ]
+        self.stdout.write(f"runs={options['runs']} requests={options['requests']} (medians)")
+        self.stdout.write(format_table([
+            'profile', 'middleware', 'modules', 'import ms', 'setup ms', 'load ms',
+            'startup ms', 'process ms', 'request us', 'rss MB',
+        ], rows))
+
+        development, production = results['development'], results['production']
+        saved = development['request_us'] - production['request_us']
+        self.stdout.write(
+            f"production saves {saved:.0f}us per request "
+            f"({saved / development['request_us']:.0%} of the stack overhead)"
+        )
+
+        budget = options['budget_ms']
+        if budget and production['startup_ms'] > budget:
+            raise CommandError(
+                f"Production startup {production['startup_ms']:.0f}ms is over the {budget:.0f}ms budget"
+            )
+        if budget:
+            self.stdout.write(self.style.SUCCESS(
+                f"Production startup {production['startup_ms']:.0f}ms is within the {budget:.0f}ms budget"
+            ))
+
+    def probe(self, profile, requests):
+        env = {
+            **os.environ,
+            'SETTINGS_PROFILE': profile,
+            # The probe's test client calls itself 'testserver'
+            'ALLOWED_HOSTS': 'testserver',
+        }
+        # The production profile refuses to start without these; the probe
+        # signs nothing and doesn't scrape /metrics
+        env.setdefault('SECRET_KEY', 'bench-startup-probe')
+        env.setdefault('METRICS_TOKEN', 'bench-startup-probe')
+
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, '-m', 'core.startup_probe', str(requests)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - start
+        if completed.returncode:
+            raise CommandError(f'{profile} probe failed:\n{completed.stderr[-2000:]}')
+
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        # Whole interpreter, including Python's own startup and the requests
+        result['process_ms'] = elapsed * 1000
+        return result
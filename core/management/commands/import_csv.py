@@ -0,0 +1,68 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import User
+from core.imports import CsvImportError
+from doctors.imports import DoctorImport
+from patients.imports import PatientImport
+
+IMPORTERS = {
+    'doctors': DoctorImport,
+    'patients': PatientImport,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Import doctors (upserted on email) or patients from a CSV file "
+        "through a COPY-loaded staging table validated in SQL. Prints the "
+        "per-row error report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(IMPORTERS))
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument('--owner', help='Email of the user the patients belong to')
+        parser.add_argument('--mode', choices=['all_or_nothing', 'partial'], default='all_or_nothing',
+                            help='partial imports the valid rows even if others fail')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only')
+        parser.add_argument('--show-errors', type=int, default=20,
+                            help='Rows of the error report to print')
+
+    def handle(self, *args, **options):
+        owner = None
+        if options['kind'] == 'patients':
+            if not options['owner']:
+                raise CommandError('--owner is required for patients')
+            try:
+                owner = User.objects.get(email=options['owner'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user with email {options['owner']}")
+
+        importer = IMPORTERS[options['kind']](
+            user=owner, mode=options['mode'], dry_run=options['dry_run']
+        )
+        start = time.perf_counter()
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                report = importer.run(stream)
+        except (OSError, CsvImportError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - start
+
+        for entry in report['errors'][:options['show_errors']]:
+            problems = '; '.join(
+                f"{field}: {' '.join(messages)}" for field, messages in entry['errors'].items()
+            )
+            self.stdout.write(f"row {entry['row']}: {problems}")
+        if report['invalid_rows'] > options['show_errors']:
+            self.stdout.write(f"... {report['invalid_rows'] - options['show_errors']} more invalid rows")
+
+        summary = (
+            f"{report['rows']} rows, {report['invalid_rows']} invalid; "
+            f"{report['created']} created, {report['updated']} updated in {elapsed:.1f}s"
+        )
+        if not report['importable']:
+            raise CommandError(f'Nothing imported: {summary}')
+        if options['dry_run']:
+            summary = f"Dry run, nothing written: {report['valid_rows']} rows would be imported"
+        self.stdout.write(self.style.SUCCESS(summary))
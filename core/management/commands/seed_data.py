@@ -0,0 +1,185 @@
+import multiprocessing
+import os
+import time
+from datetime import datetime, timezone as dt_timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+from core.imports import copy_from
+from core.seeding import SyntheticDataset
+from doctors.cache import doctor_directory_cache
+
+
+def _init_worker(database_name):
+    # Spawned workers (macOS, Windows) start without Django configured
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    # Follow the parent onto a test database (e.g. from bench_api)
+    connection.settings_dict['NAME'] = database_name
+
+
+def _copy_chunk(task):
+    """
+    COPY one chunk of a table on this worker's own connection
+    """
+    params, table, chunk = task
+    dataset = SyntheticDataset(**params)
+    rows = list(dataset.rows(table, chunk))
+    copy_rows(dataset, table, rows)
+    return table, len(rows)
+
+
+def copy_rows(dataset, table, rows):
+    model = dataset.model(table)
+    columns = ', '.join(
+        connection.ops.quote_name(model._meta.get_field(name).column)
+        for name in dataset.columns(table)
+    )
+    sql = (
+        f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) '
+        f'FROM STDIN WITH (FORMAT csv)'
+    )
+    with connection.cursor() as cursor:
+        copy_from(cursor, sql, dataset.to_csv(rows))
+
+
+def insert_rows(dataset, table, rows, batch_size):
+    """
+    INSERT rows as given, batched with executemany
+
+    bulk_create would run pre_save and let auto_now/auto_now_add replace
+    the generated timestamps with the insert time.
+    """
+    model = dataset.model(table)
+    fields = [model._meta.get_field(name) for name in dataset.columns(table)]
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    sql = (
+        f'INSERT INTO {connection.ops.quote_name(model._meta.db_table)} ({columns}) '
+        f'VALUES ({placeholders})'
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, [
+                [field.get_db_prep_save(value, connection) for field, value in zip(fields, row)]
+                for row in rows[start:start + batch_size]
+            ])
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate reproducible synthetic users, doctors, patients and "
+        "patient-doctor mappings. PostgreSQL: COPY FROM STDIN from parallel "
+        "worker processes; other databases: batched INSERTs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--doctors', type=int, default=10_000)
+        parser.add_argument('--patients', type=int, default=100_000)
+        parser.add_argument('--mappings-per-patient', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Same seed and sizes give the same rows')
+        parser.add_argument('--prefix', default='seed',
+                            help='Email domain prefix: user<id>@<prefix>.example.com')
+        parser.add_argument('--as-of', default='2026-01-01',
+                            help='Date the generated timestamps lead up to')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='COPY worker processes (PostgreSQL only)')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per INSERT batch (non-PostgreSQL)')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['doctors'] < 1:
+            raise CommandError('--users and --doctors must be at least 1')
+
+        as_of = datetime.fromisoformat(options['as_of'])
+        if timezone.is_naive(as_of):
+            as_of = timezone.make_aware(as_of, dt_timezone.utc)
+
+        offsets = {
+            table: SyntheticDataset.model(table).objects.aggregate(top=Max('pk'))['top'] or 0
+            for table in SyntheticDataset.tables
+        }
+        try:
+            dataset = SyntheticDataset(
+                users=options['users'],
+                doctors=options['doctors'],
+                patients=options['patients'],
+                mappings_per_patient=options['mappings_per_patient'],
+                seed=options['seed'],
+                prefix=options['prefix'],
+                as_of=as_of,
+                id_offsets=offsets,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        start = time.perf_counter()
+        # Users first, then what references them
+        phases = [('user',), ('doctor', 'patient'), ('mapping',)]
+        for tables in phases:
+            phase_start = time.perf_counter()
+            if connection.vendor == 'postgresql':
+                written = self.copy_tables(dataset, tables, options['workers'])
+            else:
+                written = self.insert_tables(dataset, tables, options['batch_size'])
+            elapsed = time.perf_counter() - phase_start
+            total = sum(written.values())
+            self.stdout.write(
+                ', '.join(f'{count} {table}s' for table, count in written.items())
+                + f' in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} rows/s)'
+            )
+
+        if connection.vendor == 'postgresql':
+            self.finish_postgresql(dataset)
+        # COPY skips the model signals that keep the directory cache fresh
+        doctor_directory_cache.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {sum(dataset.counts.values())} rows in {time.perf_counter() - start:.1f}s '
+            f'(seed={options["seed"]}, prefix={options["prefix"]})'
+        ))
+
+    def copy_tables(self, dataset, tables, workers):
+        tasks = [
+            (dataset.params(), table, chunk)
+            for table in tables
+            for chunk in dataset.chunks(table)
+        ]
+        written = dict.fromkeys(tables, 0)
+        # Children must not share the parent's connection socket
+        connection.close()
+        with multiprocessing.Pool(
+            workers, initializer=_init_worker, initargs=(connection.settings_dict['NAME'],)
+        ) as pool:
+            for table, count in pool.imap_unordered(_copy_chunk, tasks):
+                written[table] += count
+        return written
+
+    def insert_tables(self, dataset, tables, batch_size):
+        written = dict.fromkeys(tables, 0)
+        for table in tables:
+            for chunk in dataset.chunks(table):
+                rows = list(dataset.rows(table, chunk))
+                insert_rows(dataset, table, rows, batch_size)
+                written[table] += len(rows)
+        return written
+
+    def finish_postgresql(self, dataset):
+        """
+        Move id sequences past the explicit ids and refresh planner stats
+        """
+        with connection.cursor() as cursor:
+            for table in dataset.tables:
+                db_table = dataset.model(table)._meta.db_table
+                quoted = connection.ops.quote_name(db_table)
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {quoted}))",
+                    [quoted]
+                )
+                cursor.execute(f'ANALYZE {quoted}')
@@ -0,0 +1,135 @@
+"""
+Prometheus metrics for the API
+
+With PROMETHEUS_MULTIPROC_DIR set (before the process starts) every
+worker writes its samples to memory-mapped files in that directory and
+the /metrics view merges them, so counts and histograms add up across
+gunicorn workers. Without it, metrics are per process.
+"""
+import os
+import re
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Seconds; API reads are expected to land in the 5-250ms range
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55, 89)
+# Seconds; a healthy pool hands out a connection without waiting
+POOL_WAIT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+REQUESTS = Counter(
+    'http_requests_total',
+    'HTTP requests by route, method and status code',
+    ['route', 'method', 'status']
+)
+LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Time from the first middleware to the response',
+    ['route', 'method'],
+    buckets=LATENCY_BUCKETS
+)
+QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database queries per request',
+    ['route', 'method'],
+    buckets=QUERY_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    'http_requests_in_flight',
+    'Requests currently being handled',
+    multiprocess_mode='livesum'
+)
+CACHE_REQUESTS = Counter(
+    'response_cache_requests_total',
+    'Response cache lookups by cache and result (hit/miss)',
+    ['cache', 'result']
+)
+
+# Connection pool (core.db.pool), labelled with the database alias
+DB_POOL_CHECKOUTS = Counter(
+    'db_pool_checkouts_total',
+    'Connections handed out by the pool',
+    ['pool']
+)
+DB_POOL_WAIT = Histogram(
+    'db_pool_wait_seconds',
+    'Time spent waiting for a free pooled connection',
+    ['pool'],
+    buckets=POOL_WAIT_BUCKETS
+)
+DB_POOL_TIMEOUTS = Counter(
+    'db_pool_timeouts_total',
+    'Checkouts that gave up after the pool timeout',
+    ['pool']
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'db_pool_connections',
+    'Open pooled connections by state (idle, in_use)',
+    ['pool', 'state'],
+    multiprocess_mode='livesum'
+)
+DB_POOL_SATURATION = Gauge(
+    'db_pool_saturation',
+    'Checked-out connections as a fraction of max_size (busiest process)',
+    ['pool'],
+    multiprocess_mode='livemax'
+)
+
+UNMATCHED_ROUTE = 'unmatched'
+
+_route_cache = {}
+_named_group = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+
+
+def route_label(request):
+    """
+    URL pattern of the resolved view, e.g. 'api/mappings/patient/<patient_id>/'
+
+    Unresolved paths share one label so 404 scans can't blow up the
+    number of series.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.route:
+        return UNMATCHED_ROUTE
+
+    route = _route_cache.get(match.route)
+    if route is None:
+        route = _named_group.sub(r'<\1>', match.route).replace('^', '').replace('$', '')
+        _route_cache[match.route] = route
+    return route
+
+
+def observe_request(request, status, duration, queries):
+    route = route_label(request)
+    method = request.method
+    REQUESTS.labels(route, method, str(status)).inc()
+    LATENCY.labels(route, method).observe(duration)
+    QUERIES.labels(route, method).observe(queries)
+
+
+def observe_cache(namespace, hit):
+    CACHE_REQUESTS.labels(namespace, 'hit' if hit else 'miss').inc()
+
+
+def render_metrics():
+    """
+    Exposition-format payload and its content type
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,155 @@
+import json
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.urls import URLResolver
+from django.utils.decorators import decorator_from_middleware
+from django.utils.module_loading import import_string
+from . import metrics as prometheus
+from .instrumentation import RequestMetrics, current_metrics
+
+logger = logging.getLogger('core.requests')
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Per-request query count, SQL time, serialize time and view time
+
+    Results go to a Server-Timing header and a JSON log line on the
+    'core.requests' logger, tagged with the resolved view and action
+    (e.g. PatientDoctorMappingViewSet.by_patient). Requests above
+    QUERY_BUDGET queries or repeating one SELECT N_PLUS_ONE_THRESHOLD
+    times are logged as warnings. Queries are counted by an execute
+    wrapper (core.instrumentation), so this works with DEBUG=False.
+
+    The same numbers feed the Prometheus metrics in core.metrics.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = request._metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        prometheus.IN_FLIGHT.inc()
+        try:
+            response = self.get_response(request)
+        finally:
+            prometheus.IN_FLIGHT.dec()
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = request._metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        prometheus.IN_FLIGHT.inc()
+        try:
+            response = await self.get_response(request)
+        finally:
+            prometheus.IN_FLIGHT.dec()
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, '_metrics', None)
+        if metrics is not None:
+            metrics.view = view_name(view_func, request.method)
+            metrics.view_started = time.perf_counter()
+        return None
+
+    def finish(self, request, response, metrics):
+        finished = time.perf_counter()
+        total_ms = (finished - metrics.started) * 1000
+        view_ms = (finished - metrics.view_started) * 1000 if metrics.view_started else 0.0
+        db_ms = metrics.db_time * 1000
+        serialize_ms = metrics.phases['serialize'] * 1000
+        prometheus.observe_request(request, response.status_code, total_ms / 1000, metrics.queries)
+
+        if getattr(settings, 'SERVER_TIMING', True):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={db_ms:.1f};desc="{metrics.queries} queries"',
+                f'serialize;dur={serialize_ms:.1f}',
+                f'view;dur={view_ms:.1f}',
+                f'total;dur={total_ms:.1f}',
+            ])
+
+        budget = getattr(settings, 'QUERY_BUDGET', 20)
+        repeated = metrics.repeated_statements(getattr(settings, 'N_PLUS_ONE_THRESHOLD', 5))
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': metrics.view,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(db_ms, 2),
+            'serialize_ms': round(serialize_ms, 2),
+            'view_ms': round(view_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }
+
+        flags = []
+        if budget and metrics.queries > budget:
+            flags.append('query_budget')
+        if repeated:
+            flags.append('n_plus_one')
+            record['repeated'] = [
+                {'sql': item['sql'][:300], 'count': item['count']} for item in repeated[:5]
+            ]
+
+        if flags:
+            record['flags'] = flags
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+        return response
+
+
+def view_name(view_func, method):
+    """
+    'ViewClass.action' for DRF viewsets and the async read views,
+    'ViewClass.method' for other class-based views, else the function
+    """
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__qualname__}'
+
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        return f'{view_class.__name__}.{actions.get(method.lower(), method.lower())}'
+
+    # core.async_views.AsyncViewSetView mirrors a viewset action on GET
+    viewset_class = getattr(view_class, 'viewset_class', None)
+    if viewset_class is not None and method == 'GET':
+        return f'{viewset_class.__name__}.{view_class.action}'
+
+    return f'{view_class.__name__}.{method.lower()}'
+
+
+def apply_middleware(urls, middleware):
+    """
+    Wrap every view of an include() target, e.g. admin.site.urls, in
+    old-style middleware (listed outermost first, like MIDDLEWARE)
+
+    Lets one mount keep middleware the rest of the site runs without.
+    """
+    decorators = [decorator_from_middleware(import_string(name)) for name in reversed(middleware)]
+
+    def wrap(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                wrap(pattern.url_patterns)
+                continue
+            for decorator in decorators:
+                pattern.callback = decorator(pattern.callback)
+
+    patterns, app_name, namespace = urls
+    wrap(patterns)
+    return patterns, app_name, namespace
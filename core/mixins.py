@@ -0,0 +1,33 @@
+class ActionQuerysetMixin:
+    """
+    Let each viewset action declare the relations it reads
+
+    `related_by_action` maps an action name to the relations passed to
+    select_related(), `only_by_action` maps it to the columns passed to
+    only(). Actions without an entry get the plain queryset.
+    """
+    related_by_action = {}
+    only_by_action = {}
+
+    def get_queryset(self):
+        """
+        Apply the current action's select_related/only declarations
+        """
+        queryset = super().get_queryset()
+        return self.apply_action_relations(queryset)
+
+    def apply_action_relations(self, queryset, action=None):
+        """
+        Load only what `action` (default: current action) serializes
+        """
+        action = action or self.action
+
+        related = self.related_by_action.get(action)
+        if related:
+            queryset = queryset.select_related(*related)
+
+        fields = self.only_by_action.get(action)
+        if fields:
+            queryset = queryset.only(*fields)
+
+        return queryset
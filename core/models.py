@@ -0,0 +1,25 @@
+from django.db import models
+
+
+class IdempotencyRecord(models.Model):
+    """
+    First response to an Idempotency-Key (DatabaseIdempotencyStore)
+
+    status_code is NULL while the first request is still running.
+    """
+    # sha256 of user, method, path and the client's key
+    key = models.CharField(max_length=80, primary_key=True)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def as_entry(self):
+        response = self.response or {}
+        return {
+            'fingerprint': self.fingerprint,
+            'status': self.status_code,
+            'data': response.get('data'),
+            'headers': response.get('headers', {}),
+        }
@@ -0,0 +1,92 @@
+"""
+Nested objects shared between the rows of one response
+
+Every patient in a user's list has the same `created_by`, and the
+mappings of one patient all embed that patient. SharedRepresentationMixin
+serializes each such object once per response and reuses the dict;
+IncludedMixin lets clients ask (`?normalize=true`) for each object to
+appear once, in an `included` section keyed by id, with the rows holding
+only the id.
+"""
+from rest_framework import serializers
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+class SharedRepresentationMixin:
+    """
+    Serialize each related object once per response when nested
+
+    Used as a nested field, the serializer keeps what it built on the
+    root serializer, keyed by primary key, and returns the same dict for
+    every later row pointing at the same object. At the top level (a
+    detail response or the rows of a list) it behaves as usual.
+    """
+
+    def to_representation(self, instance):
+        if not isinstance(self.parent, serializers.Serializer) or instance.pk is None:
+            return super().to_representation(instance)
+        memo = self.root.__dict__.setdefault('_shared_representations', {})
+        key = (self, instance.pk)
+        if key not in memo:
+            memo[key] = super().to_representation(instance)
+        return memo[key]
+
+
+def normalize(rows, relations):
+    """
+    Move the nested objects of `rows` into an `included` section
+
+    `relations` maps a nested field to its collection, e.g.
+    {'doctor': 'doctors', 'created_by': 'users'}. Each nested object is
+    replaced by its id and stored once under included[collection][id],
+    itself normalized the same way. Returns (rows, included); the input
+    dicts, which may be shared, are left untouched.
+    """
+    included = {}
+
+    def flatten(data):
+        data = dict(data)
+        for field, collection in relations.items():
+            nested = data.get(field)
+            if not isinstance(nested, dict):
+                continue
+            data[field] = nested['id']
+            objects = included.setdefault(collection, {})
+            key = str(nested['id'])
+            if key not in objects:
+                objects[key] = flatten(nested)
+        return data
+
+    return [flatten(row) for row in rows], included
+
+
+class IncludedMixin:
+    """
+    `?normalize=true` on list responses: nested objects by id, once each
+
+    `included_relations` maps nested fields to collection names. list()
+    is handled here; custom list-like actions pass their rows through
+    normalize_rows() and merge the extra keys into their response.
+    """
+    included_relations = {}
+    normalize_query_param = 'normalize'
+
+    def normalize_rows(self, rows):
+        """
+        (rows, extra response keys): unchanged unless normalizing was
+        asked for, else rows holding ids and {'included': ...}
+        """
+        requested = self.request.query_params.get(self.normalize_query_param, '')
+        if requested.lower() not in TRUE_VALUES or not self.included_relations:
+            return rows, {}
+        rows, included = normalize(rows, self.included_relations)
+        return rows, {'included': included}
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if isinstance(response.data, dict) and 'results' in response.data:
+            rows, extra = self.normalize_rows(response.data['results'])
+            response.data['results'] = rows
+            response.data.update(extra)
+        return response
@@ -0,0 +1,34 @@
+from django.contrib.postgres.operations import AddIndexConcurrently as PostgresAddIndexConcurrently
+from django.db.migrations.operations import AddIndex
+
+
+class AddIndexConcurrently(PostgresAddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL, a plain CREATE INDEX elsewhere
+
+    With `postgres_only=True` other backends skip the index altogether,
+    for index types they don't have (GIN, trigram opclasses, ...). The
+    migration must set `atomic = False`.
+    """
+
+    def __init__(self, model_name, index, postgres_only=False):
+        super().__init__(model_name, index)
+        self.postgres_only = postgres_only
+
+    def deconstruct(self):
+        name, args, kwargs = super().deconstruct()
+        if self.postgres_only:
+            kwargs['postgres_only'] = True
+        return name, args, kwargs
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        elif not self.postgres_only:
+            AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        elif not self.postgres_only:
+            AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,214 @@
+import base64
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.settings import api_settings
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .nested import TRUE_VALUES
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor (keyset) pagination
+
+    Pages are keyed on the model's Meta.ordering plus an `id` tiebreaker,
+    so page N is a `WHERE (ordering) > (last row)` index range scan
+    instead of an OFFSET. Views may override `page_size`,
+    `max_page_size` and `keyset_ordering`; @action(page_size=...) works
+    too since action kwargs become view attributes. Totals are a full
+    COUNT(*), so envelopes only carry one when asked (`?count=true`).
+    """
+    page_size = api_settings.PAGE_SIZE or 50
+    max_page_size = 500  # hard cap, no view can go above it
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        return self.build_page(list(queryset))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the ordered, filtered and sliced queryset for one page
+
+        Split from paginate_queryset() so callers can evaluate it
+        themselves (e.g. with the async ORM).
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_page_size(request, view)
+        self.ordering = self.get_ordering(queryset, view)
+        self.position, self.reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self._invert(field) for field in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._after(ordering, self.position))
+
+        # One extra row tells us whether there is another page
+        return queryset[:self.limit + 1]
+
+    def build_page(self, rows):
+        """
+        Trim the extra row and work out the next/previous positions
+        """
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request, view):
+        page_size = getattr(view, 'page_size', None) or self.page_size
+        max_page_size = min(
+            getattr(view, 'max_page_size', None) or self.max_page_size,
+            self.max_page_size
+        )
+
+        requested = request.query_params.get(self.page_size_query_param)
+        if requested:
+            try:
+                page_size = int(requested)
+            except ValueError:
+                pass
+
+        return max(1, min(page_size, max_page_size))
+
+    def get_ordering(self, queryset, view):
+        """
+        View's `keyset_ordering`, else Meta.ordering, always ending in id
+        """
+        ordering = list(
+            getattr(view, 'keyset_ordering', None)
+            or queryset.model._meta.ordering
+            or ['id']
+        )
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
+
+    def get_page_links(self):
+        """
+        next/previous URLs, for responses that use their own envelope
+        """
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._link(self.page[0], reverse=True)
+
+    def count_requested(self):
+        requested = self.request.query_params.get(self.count_query_param, '')
+        return requested.lower() in TRUE_VALUES
+
+    def get_count(self, queryset):
+        """
+        {'count': rows in `queryset`} when asked for, else {}
+        """
+        return {'count': queryset.count()} if self.count_requested() else {}
+
+    async def aget_count(self, queryset):
+        return {'count': await queryset.acount()} if self.count_requested() else {}
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values = payload['p']
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return position, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': position}
+        if reverse:
+            payload['r'] = 1
+        data = json.dumps(payload, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def get_position(self, row):
+        """
+        Ordering values of a row (model instance or values() dict)
+        """
+        fields = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[field] for field in fields]
+        return [getattr(row, field) for field in fields]
+
+    def _link(self, row, reverse):
+        position = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in self.get_position(row)
+        ]
+        cursor = self.encode_cursor(position, reverse)
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def _after(self, ordering, position):
+        """
+        Rows strictly after `position` in `ordering` (row-value comparison)
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
@@ -0,0 +1,244 @@
+"""
+Read-only list representations built straight from values() rows
+
+A Projection compiles a ModelSerializer's readable fields once into the
+values() lookups they read and a converter per column. It is used instead
+of instantiating a model and running every field's to_representation for
+each row. The output is the same dict the serializer would produce, so
+the rendered JSON is byte-identical:
+
+- dotted sources (`patient.name`) become `patient__name` lookups
+- `get_<field>_display` becomes a dict lookup on the field's choices
+- nested serializers become nested dicts, None when the relation is null,
+  built once per related row and shared (see core.nested)
+- str, int and bool columns are used as they come back from the database
+- ISO 8601 datetimes are converted to the current timezone looked up once
+  per list, not once per value
+- anything else (dates, decimals, custom fields) goes through the
+  serializer field's own to_representation
+
+Serializers with method fields, `source='*'`, many=True nesting or
+sources that aren't model fields can't be projected; compiling one
+raises ImproperlyConfigured.
+"""
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+from .instrumentation import timed
+
+# Fields whose to_representation returns database values unchanged
+PASSTHROUGH = {
+    serializers.CharField.to_representation,
+    serializers.IntegerField.to_representation,
+    serializers.BooleanField.to_representation,
+    serializers.ChoiceField.to_representation,
+}
+
+
+class IsoDateTime:
+    """
+    DateTimeField.to_representation with the timezone resolved up front
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    @classmethod
+    def supports(cls, field):
+        field_class = type(field)
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        return (
+            field_class.to_representation is serializers.DateTimeField.to_representation
+            and field_class.enforce_timezone is serializers.DateTimeField.enforce_timezone
+            and isinstance(output_format, str) and output_format.lower() == ISO_8601
+        )
+
+    def bind(self):
+        field = self.field
+        tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if tz is None:
+            return field.to_representation
+
+        def convert(value):
+            if value.tzinfo is None:
+                return field.to_representation(value)
+            value = value.astimezone(tz).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+
+
+class Projection:
+    """
+    One serializer class compiled into values() lookups and converters
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.lookups = []
+        model = serializer_class.Meta.model
+        self.plan = self._compile(serializer_class(), model, ())
+        # Keyset pagination reads the ordering columns off each row
+        for name in [*model._meta.ordering, 'id']:
+            self._lookup((name.lstrip('-'),))
+
+    def project(self, queryset):
+        """
+        `queryset` reduced to the columns the serializer reads
+        """
+        return queryset.values(*self.lookups)
+
+    def represent(self, row):
+        return self._represent(self._bind(self.plan), row, {})
+
+    def represent_many(self, rows):
+        with timed('serialize'):
+            plan = self._bind(self.plan)
+            # (foreign key lookup, id) -> nested dict, shared by the rows
+            shared = {}
+            return [self._represent(plan, row, shared) for row in rows]
+
+    def _bind(self, plan):
+        """
+        `plan` with converters that depend on the request (the current
+        timezone) resolved
+        """
+        return [
+            (
+                name, key,
+                convert.bind() if isinstance(convert, IsoDateTime) else convert,
+                nested and self._bind(nested),
+            )
+            for name, key, convert, nested in plan
+        ]
+
+    def _represent(self, plan, row, shared):
+        data = {}
+        for name, key, convert, nested in plan:
+            value = row[key]
+            if value is None:
+                data[name] = None
+            elif nested is not None:
+                if (key, value) not in shared:
+                    shared[key, value] = self._represent(nested, row, shared)
+                data[name] = shared[key, value]
+            elif convert is None:
+                data[name] = value
+            else:
+                data[name] = convert(value)
+        return data
+
+    def _compile(self, serializer, model, path):
+        plan = []
+        for field in serializer._readable_fields:
+            attrs = tuple(field.source_attrs)
+            if not attrs or isinstance(field, (serializers.SerializerMethodField, serializers.ListSerializer)):
+                raise self._unsupported(field)
+
+            if isinstance(field, serializers.BaseSerializer):
+                related = self._resolve(model, attrs).related_model
+                if related is None:
+                    raise self._unsupported(field)
+                # The foreign key column: None when there is no related row
+                key = self._lookup(path + attrs)
+                plan.append((field.field_name, key, None, self._compile(field, related, path + attrs)))
+                continue
+
+            *relations, name = attrs
+            if name.startswith('get_') and name.endswith('_display'):
+                model_field = self._resolve(model, (*relations, name[4:-8]), field)
+                if not model_field.choices:
+                    raise self._unsupported(field)
+                labels = {value: str(label) for value, label in model_field.flatchoices}
+                key = self._lookup(path + (*relations, model_field.name))
+                plan.append((field.field_name, key, self._label(labels), None))
+                continue
+
+            model_field = self._resolve(model, attrs, field)
+            if model_field.is_relation:
+                raise self._unsupported(field)
+            if type(field).to_representation in PASSTHROUGH:
+                convert = None
+            elif IsoDateTime.supports(field):
+                convert = IsoDateTime(field)
+            else:
+                convert = field.to_representation
+            plan.append((field.field_name, self._lookup(path + attrs), convert, None))
+        return plan
+
+    def _resolve(self, model, attrs, field=None):
+        """
+        Model field at the end of `attrs`, following forward relations
+        """
+        try:
+            for attr in attrs[:-1]:
+                relation = model._meta.get_field(attr)
+                if not (relation.many_to_one or relation.one_to_one) or relation.auto_created:
+                    raise FieldDoesNotExist(attr)
+                model = relation.related_model
+            if attrs[-1] == 'pk':
+                return model._meta.pk
+            return model._meta.get_field(attrs[-1])
+        except FieldDoesNotExist:
+            raise self._unsupported(field or attrs)
+
+    def _lookup(self, attrs):
+        key = '__'.join(attrs)
+        if key not in self.lookups:
+            self.lookups.append(key)
+        return key
+
+    @staticmethod
+    def _label(labels):
+        def convert(value):
+            # get_FOO_display falls back to the value itself
+            label = labels.get(value)
+            return str(value) if label is None else label
+        return convert
+
+    def _unsupported(self, field):
+        return ImproperlyConfigured(
+            f'{self.serializer_class.__name__}: {getattr(field, "field_name", field)!r} '
+            f'cannot be read from values()'
+        )
+
+
+_projections = {}
+
+
+def projection_for(serializer_class):
+    """
+    Compiled Projection for `serializer_class`, cached per process
+    """
+    if serializer_class not in _projections:
+        _projections[serializer_class] = Projection(serializer_class)
+    return _projections[serializer_class]
+
+
+class ProjectionMixin:
+    """
+    Serve `projected_actions` (default: list) from values() rows
+
+    The action's serializer class is compiled into a Projection; the
+    queryset, filtering and pagination are the viewset's own. Writes,
+    detail views and every other action keep using the serializer.
+    """
+    projected_actions = ('list',)
+
+    def get_projection(self):
+        if self.action not in self.projected_actions:
+            return None
+        return projection_for(self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        projection = self.get_projection()
+        if projection is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = projection.project(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(projection.represent_many(page))
+        return Response(projection.represent_many(queryset))
@@ -0,0 +1,167 @@
+"""
+Read replicas: safe viewset reads go to a replica, everything else to
+the primary
+
+ReplicaReadMixin picks the database once per request and ReplicaRouter
+applies the choice to every read the request makes. A successful write
+pins its author (or everyone, for shared data) to the primary for
+REPLICA_STICKY_SECONDS so they read their own writes; replicas further
+behind than REPLICA_MAX_LAG, or unreachable, are skipped.
+"""
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+# Alias the current request reads from; None is the primary
+read_alias = ContextVar('read_alias', default=None)
+
+
+class ReplicaRouter:
+    """
+    DATABASE_ROUTERS entry: reads follow read_alias, writes the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Even for instances read from a replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema from the primary
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class ReplicaLagMonitor:
+    """
+    Replication lag per replica, measured at most once every
+    REPLICA_LAG_CHECK_INTERVAL seconds per process
+    """
+    # Seconds behind the primary: 0 once everything received is replayed,
+    # and on a server that isn't a standby
+    LAG_SQL = (
+        'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+        'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+    )
+
+    def __init__(self):
+        # alias -> (lag in seconds or None if unreachable, measured at)
+        self._lag = {}
+        self._locks = {}
+
+    def healthy(self, alias):
+        measured = self._lag.get(alias)
+        if measured is None or time.monotonic() - measured[1] >= settings.REPLICA_LAG_CHECK_INTERVAL:
+            lock = self._locks.setdefault(alias, threading.Lock())
+            # One thread measures; the others go by the last result
+            if lock.acquire(blocking=False):
+                try:
+                    self.record(alias, self.check(alias))
+                finally:
+                    lock.release()
+            measured = self._lag.get(alias)
+        if measured is None:
+            return False
+        lag = measured[0]
+        return lag is not None and lag <= settings.REPLICA_MAX_LAG
+
+    def check(self, alias):
+        try:
+            lag = self.measure(alias)
+        except DatabaseError:
+            logger.warning('Replica %s is unreachable; reading from the primary', alias, exc_info=True)
+            return None
+        if lag > settings.REPLICA_MAX_LAG:
+            logger.warning('Replica %s is %.1fs behind; reading from the primary', alias, lag)
+        return lag
+
+    def measure(self, alias):
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            # e.g. a copy of an SQLite file standing in for a replica
+            return 0.0
+        with connection.cursor() as cursor:
+            cursor.execute(self.LAG_SQL)
+            return float(cursor.fetchone()[0])
+
+    def record(self, alias, lag):
+        self._lag[alias] = (lag, time.monotonic())
+
+
+lag_monitor = ReplicaLagMonitor()
+
+
+def pin_key(user_id=None):
+    return f'replica:pin:{"*" if user_id is None else user_id}'
+
+
+def pin_to_primary(user_id=None):
+    """
+    Send `user_id`'s reads, or everyone's, to the primary for
+    REPLICA_STICKY_SECONDS
+    """
+    if settings.REPLICA_DATABASES and settings.REPLICA_STICKY_SECONDS:
+        caches[settings.REPLICA_PIN_CACHE_ALIAS].set(
+            pin_key(user_id), True, settings.REPLICA_STICKY_SECONDS
+        )
+
+
+def choose_replica(user_id):
+    """
+    Replica alias for this user's reads, or None for the primary
+    """
+    replicas = settings.REPLICA_DATABASES
+    if not replicas:
+        return None
+    if caches[settings.REPLICA_PIN_CACHE_ALIAS].get_many([pin_key(user_id), pin_key()]):
+        return None
+    healthy = [alias for alias in replicas if lag_monitor.healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+class ReplicaReadMixin:
+    """
+    Serve this viewset's GET/HEAD requests from a replica
+
+    The replica is picked after authentication, so the user lookup itself
+    reads the primary. A successful write pins its author to the primary,
+    or everyone with `replica_pin_scope = 'all'` (data every user reads).
+    """
+    replica_pin_scope = 'user'
+
+    def dispatch(self, request, *args, **kwargs):
+        token = read_alias.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            read_alias.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            read_alias.set(choose_replica(request.user.pk))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            if self.replica_pin_scope == 'all':
+                pin_to_primary()
+            elif request.user.is_authenticated:
+                pin_to_primary(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
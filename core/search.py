@@ -0,0 +1,96 @@
+import operator
+from functools import reduce
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+
+class SearchMixin:
+    """
+    Adds GET {prefix}/search/?q=... ranked, typo-tolerant search
+
+    On PostgreSQL a row matches when any `search_trigram_fields` entry is
+    word-similar to the query (pg_trgm `<%`), any `search_contains_fields`
+    entry contains it, or `search_vector` matches it as a websearch query.
+    Each predicate is backed by a GIN index declared in the model's
+    Meta.indexes, so the index on `search_vector` must use the very same
+    expression. Rows are ranked by the sum of trigram similarities and ts_rank.
+    Other backends fall back to icontains on the same fields.
+
+    Scoping comes from the viewset's own get_queryset().
+
+    Query params:
+    - q=...     search text (required)
+    - limit=N   rows returned (default 20, max 100)
+    """
+    search_trigram_fields = ()
+    search_contains_fields = ()
+    search_vector = None
+    search_vector_fields = ()  # columns of search_vector, for the fallback
+    search_config = 'english'
+    search_results_key = 'results'
+    search_default_limit = 20
+    search_max_limit = 100
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Best matches for ?q= among the rows visible to the current user
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({
+                'error': 'Please provide q parameter'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        results = self.search_queryset(self.get_queryset(), query)
+        results = results[:self.get_search_limit(request)]
+        serializer = self.get_serializer(results, many=True)
+
+        return Response({
+            'query': query,
+            self.search_results_key: serializer.data,
+            'count': len(serializer.data)
+        }, status=status.HTTP_200_OK)
+
+    def get_search_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.search_default_limit))
+        except ValueError:
+            limit = self.search_default_limit
+        return max(1, min(limit, self.search_max_limit))
+
+    def search_queryset(self, queryset, query):
+        if connections[queryset.db].vendor != 'postgresql':
+            return self.fallback_search_queryset(queryset, query)
+
+        condition = Q()
+        ranks = []
+        for field in self.search_trigram_fields:
+            condition |= Q(**{f'{field}__trigram_word_similar': query})
+            ranks.append(TrigramWordSimilarity(query, field))
+        for field in self.search_contains_fields:
+            condition |= Q(**{f'{field}__contains': query})
+
+        if self.search_vector is not None:
+            search_query = SearchQuery(query, search_type='websearch', config=self.search_config)
+            queryset = queryset.annotate(search_document=self.search_vector)
+            condition |= Q(search_document=search_query)
+            ranks.append(SearchRank(F('search_document'), search_query))
+
+        rank = reduce(operator.add, ranks)
+        return queryset.filter(condition).annotate(search_rank=rank).order_by('-search_rank', 'pk')
+
+    def fallback_search_queryset(self, queryset, query):
+        condition = Q()
+        fields = (
+            *self.search_trigram_fields,
+            *self.search_contains_fields,
+            *self.search_vector_fields,
+        )
+        for field in dict.fromkeys(fields):
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition).order_by('pk')
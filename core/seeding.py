@@ -0,0 +1,221 @@
+import csv
+import hashlib
+import io
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from doctors.models import Doctor
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+from .benchmarking import CONDITIONS, FIRST_NAMES, LAST_NAMES, STREETS
+
+CITIES = ('Pune', 'Mumbai', 'Delhi', 'Bengaluru', 'Chennai', 'Austin', 'Leeds', 'Toronto')
+QUALIFICATIONS = ('MBBS', 'MBBS, MD', 'MBBS, MS', 'MBBS, DNB', 'MD, DM', 'MBBS, MD, FRCP')
+NOTES = ('Follow-up in 3 months', 'Referred by GP', 'Second opinion', 'Post-operative care')
+
+
+class SyntheticDataset:
+    """
+    Reproducible synthetic rows for users, doctors, patients and mappings
+
+    Tables are cut into fixed-size chunks and each chunk has its own
+    random generator seeded from (seed, table, chunk), so the data does
+    not depend on how chunks are spread over worker processes. Rows get
+    explicit ids above `id_offsets`, which is what lets patients and
+    mappings reference rows written by other workers.
+    """
+    chunk_size = 50_000
+    default_password = 'seed-Password-42'
+    tables = ('user', 'doctor', 'patient', 'mapping')
+
+    def __init__(self, users, doctors, patients, mappings_per_patient=2, seed=42,
+                 prefix='seed', as_of=None, id_offsets=None, password=None):
+        if mappings_per_patient > doctors:
+            raise ValueError('mappings_per_patient cannot exceed the number of doctors')
+        self.counts = {
+            'user': users,
+            'doctor': doctors,
+            'patient': patients,
+            'mapping': patients * mappings_per_patient,
+        }
+        self.mappings_per_patient = mappings_per_patient
+        self.seed = seed
+        self.prefix = prefix
+        self.as_of = as_of or datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        self.id_offsets = id_offsets or dict.fromkeys(self.tables, 0)
+        self.password = password or self.default_password
+        self._password_hash = None
+
+    def params(self):
+        """
+        Constructor arguments, to rebuild the dataset in a worker process
+        """
+        return {
+            'users': self.counts['user'],
+            'doctors': self.counts['doctor'],
+            'patients': self.counts['patient'],
+            'mappings_per_patient': self.mappings_per_patient,
+            'seed': self.seed,
+            'prefix': self.prefix,
+            'as_of': self.as_of,
+            'id_offsets': self.id_offsets,
+            'password': self.password,
+        }
+
+    @staticmethod
+    def model(table):
+        return {
+            'user': get_user_model(),
+            'doctor': Doctor,
+            'patient': Patient,
+            'mapping': PatientDoctorMapping,
+        }[table]
+
+    def columns(self, table):
+        """
+        Model attribute names, in the order rows() yields values
+        """
+        return {
+            'user': (
+                'id', 'password', 'last_login', 'is_superuser', 'username', 'first_name',
+                'last_name', 'is_staff', 'is_active', 'date_joined', 'email', 'name',
+            ),
+            'doctor': (
+                'id', 'name', 'specialization', 'contact', 'email', 'experience_years',
+                'qualification', 'available', 'created_at', 'updated_at',
+            ),
+            'patient': (
+                'id', 'name', 'age', 'gender', 'contact', 'address', 'medical_history',
+                'created_by_id', 'created_at', 'updated_at',
+            ),
+            'mapping': (
+                'id', 'patient_id', 'doctor_id', 'assigned_date', 'notes', 'is_active', 'updated_at',
+            ),
+        }[table]
+
+    def chunks(self, table):
+        """
+        Chunk numbers of `table`
+        """
+        total = self.counts['patient'] if table == 'mapping' else self.counts[table]
+        per_chunk = self._chunk_rows(table)
+        return range((total + per_chunk - 1) // per_chunk)
+
+    def rows(self, table, chunk):
+        """
+        Value tuples of one chunk, in columns() order
+        """
+        rng = random.Random(f'{self.seed}:{table}:{chunk}')
+        total = self.counts['patient'] if table == 'mapping' else self.counts[table]
+        start = chunk * self._chunk_rows(table)
+        stop = min(start + self._chunk_rows(table), total)
+        return getattr(self, f'{table}_rows')(rng, start, stop)
+
+    def _chunk_rows(self, table):
+        # Mappings are chunked by patient so each patient's doctors are
+        # picked together
+        if table == 'mapping':
+            return max(1, self.chunk_size // self.mappings_per_patient)
+        return self.chunk_size
+
+    def user_rows(self, rng, start, stop):
+        if self._password_hash is None:
+            # One hash for every user keeps runs reproducible and fast; the
+            # salt is long enough that login does not rehash it (must_update)
+            salt = hashlib.sha256(f'{self.prefix}:{self.seed}'.encode()).hexdigest()[:22]
+            self._password_hash = make_password(self.password, salt=salt)
+        for i in range(start, stop):
+            pk = self.id_offsets['user'] + i + 1
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            email = f'user{pk}@{self.prefix}.example.com'
+            yield (
+                pk, self._password_hash, None, False, email, first, last, False, True,
+                self._timestamp(rng, days=730), email, f'{first} {last}',
+            )
+
+    def doctor_rows(self, rng, start, stop):
+        specializations = [code for code, _ in Doctor.SPECIALIZATION_CHOICES]
+        for i in range(start, stop):
+            pk = self.id_offsets['doctor'] + i + 1
+            created = self._timestamp(rng, days=1460)
+            yield (
+                pk,
+                f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                rng.choice(specializations),
+                self._phone(rng),
+                f'doctor{pk}@{self.prefix}.example.com',
+                rng.randint(0, 45),
+                rng.choice(QUALIFICATIONS),
+                rng.random() < 0.8,
+                created,
+                self._later(rng, created),
+            )
+
+    def patient_rows(self, rng, start, stop):
+        genders = [code for code, _ in Patient.GENDER_CHOICES]
+        users = self.counts['user']
+        for i in range(start, stop):
+            created = self._timestamp(rng, days=730)
+            yield (
+                self.id_offsets['patient'] + i + 1,
+                f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                int(min(max(rng.gauss(42, 22), 0), 100)),
+                rng.choices(genders, weights=(48, 48, 4))[0],
+                self._phone(rng),
+                f'{rng.randint(1, 999)} {rng.choice(STREETS)} Street, {rng.choice(CITIES)}',
+                rng.choice(CONDITIONS) or None,
+                self.id_offsets['user'] + rng.randrange(users) + 1,
+                created,
+                self._later(rng, created),
+            )
+
+    def mapping_rows(self, rng, start, stop):
+        doctors = self.counts['doctor']
+        per_patient = self.mappings_per_patient
+        # Distinct doctors per patient keeps unique_together intact
+        stride = max(1, doctors // per_patient)
+        for i in range(start, stop):
+            first = rng.randrange(doctors)
+            for k in range(per_patient):
+                assigned = self._timestamp(rng, days=365)
+                yield (
+                    self.id_offsets['mapping'] + i * per_patient + k + 1,
+                    self.id_offsets['patient'] + i + 1,
+                    self.id_offsets['doctor'] + (first + k * stride) % doctors + 1,
+                    assigned,
+                    rng.choice(NOTES) if rng.random() < 0.3 else None,
+                    rng.random() < 0.85,
+                    self._later(rng, assigned),
+                )
+
+    def to_csv(self, rows):
+        """
+        Rows as CSV text for COPY ... WITH (FORMAT csv); None becomes NULL
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(['' if value is None else self._csv_value(value) for value in row])
+        buffer.seek(0)
+        return buffer
+
+    @staticmethod
+    def _csv_value(value):
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def _timestamp(self, rng, days):
+        return self.as_of - timedelta(seconds=rng.randrange(days * 86400))
+
+    def _later(self, rng, moment):
+        if rng.random() < 0.7:
+            return moment
+        return min(self.as_of, moment + timedelta(seconds=rng.randrange(90 * 86400)))
+
+    @staticmethod
+    def _phone(rng):
+        return str(rng.randint(10 ** 9, 10 ** 12 - 1))
@@ -0,0 +1,66 @@
+"""
+Startup probe run in a fresh interpreter by `manage.py bench_startup`
+
+    python -m core.startup_probe [requests]
+
+Prints one JSON line: milliseconds spent importing the settings, in
+django.setup() and loading the WSGI handler and URLconf (every view,
+serializer and middleware), the number of modules loaded, and the latency
+of an unauthenticated API request. That request gets DRF's 401 without
+touching the database, so it measures the middleware and dispatch
+overhead of the stack alone. Peak RSS comes last.
+"""
+import json
+import sys
+import time
+
+
+def main(requests):
+    start = time.perf_counter()
+    import django
+    from django.conf import settings
+    settings.INSTALLED_APPS
+    imported = time.perf_counter()
+
+    django.setup()
+    set_up = time.perf_counter()
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.urls import get_resolver
+    WSGIHandler()
+    get_resolver().url_patterns
+    loaded = time.perf_counter()
+    modules = len(sys.modules)
+
+    import logging
+    from django.test import Client
+    # Both log every 401; keep the timing to the stack itself
+    for name in ('core.requests', 'django.request'):
+        logging.getLogger(name).disabled = True
+    client = Client()
+    warmup = max(requests // 10, 1)
+    latencies = []
+    for _ in range(warmup + requests):
+        begin = time.perf_counter()
+        response = client.get('/api/patients/')
+        latencies.append(time.perf_counter() - begin)
+    if response.status_code != 401:
+        raise SystemExit(f'Expected a 401 from /api/patients/, got {response.status_code}')
+    latencies = sorted(latencies[warmup:])
+
+    from core.benchmarking import peak_rss_mb
+
+    print(json.dumps({
+        'import_ms': (imported - start) * 1000,
+        'setup_ms': (set_up - imported) * 1000,
+        'load_ms': (loaded - set_up) * 1000,
+        'startup_ms': (loaded - start) * 1000,
+        'modules': modules,
+        'request_us': latencies[len(latencies) // 2] * 1e6,
+        'middleware': len(settings.MIDDLEWARE),
+        'rss_mb': peak_rss_mb(),
+    }))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,1275 @@
+import json
+import os
+from io import StringIO
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from unittest import skipUnless
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import User
+from core.benchmarking import find_regressions
+from core.cache import ResponseCache
+from core.seeding import SyntheticDataset
+from core.db.pool import IDLE, INERROR, ConnectionPool, PoolTimeout
+from core.idempotency import get_store
+from core.middleware import QueryInstrumentationMiddleware, apply_middleware
+from core.pagination import KeysetPagination
+from core.replicas import ReplicaRouter, lag_monitor
+from core.models import IdempotencyRecord
+from core.projection import Projection, projection_for
+from doctors.models import Doctor
+from mappings.models import PatientDoctorMapping
+from patients.models import Patient
+
+# The production profile's URLconf, for LeanStackTests
+urlpatterns = [
+    path('admin/', apply_middleware(admin.site.urls, settings.ADMIN_MIDDLEWARE)),
+    path('api/patients/', include('patients.urls')),
+]
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN every SELECT the hot viewset actions run on a seeded dataset
+    and fail if the plan scans one of the large tables sequentially
+
+    Runs on PostgreSQL (EXPLAIN FORMAT JSON) and SQLite (EXPLAIN QUERY PLAN).
+    QUERY_PLAN_SCALE=N multiplies the dataset, e.g. to check plans at
+    production-like sizes.
+    """
+    scale = int(os.environ.get('QUERY_PLAN_SCALE', 1))
+    users = 40 * scale
+    patients_per_user = 250
+    doctors = 5000 * scale
+    mappings_per_patient = 3
+
+    large_tables = (
+        Patient._meta.db_table,
+        Doctor._meta.db_table,
+        PatientDoctorMapping._meta.db_table,
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        specializations = [code for code, _ in Doctor.SPECIALIZATION_CHOICES]
+        doctors = Doctor.objects.bulk_create([
+            Doctor(
+                name=f'Doctor {i:05d}',
+                specialization=specializations[i % len(specializations)],
+                contact='9876543210',
+                email=f'doctor{i}@example.com',
+                experience_years=i % 40,
+                qualification='MBBS',
+                available=i % 3 != 0
+            )
+            for i in range(cls.doctors)
+        ])
+        owners = User.objects.bulk_create([
+            User(email=f'owner{i}@example.com', username=f'owner{i}@example.com', name=f'Owner {i}')
+            for i in range(cls.users)
+        ])
+        patients = Patient.objects.bulk_create([
+            Patient(
+                name=f'Patient {u}-{i}',
+                age=1 + i % 90,
+                gender='MFO'[i % 3],
+                contact='9876543210',
+                address='1 Main Street',
+                created_by=owner
+            )
+            for u, owner in enumerate(owners)
+            for i in range(cls.patients_per_user)
+        ])
+        PatientDoctorMapping.objects.bulk_create([
+            PatientDoctorMapping(
+                patient=patient,
+                doctor=doctors[(i * 7 + k) % len(doctors)],
+                is_active=(i + k) % 4 != 0
+            )
+            for i, patient in enumerate(patients)
+            for k in range(cls.mappings_per_patient)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        cls.user = owners[0]
+        cls.patient = Patient.objects.owned_by(cls.user).first()
+        cls.mapping = PatientDoctorMapping.objects.filter(patient=cls.patient).first()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_patient_actions(self):
+        self.assertNoSequentialScans('/api/patients/')
+        self.assertNoSequentialScans(f'/api/patients/{self.patient.id}/')
+        self.assertNoSequentialScans('/api/patients/export/')
+
+    def test_doctor_actions(self):
+        self.assertNoSequentialScans('/api/doctors/')
+        self.assertNoSequentialScans('/api/doctors/available/')
+        self.assertNoSequentialScans('/api/doctors/by_specialization/?specialization=NEUROLOGY')
+
+    def test_mapping_actions(self):
+        self.assertNoSequentialScans('/api/mappings/')
+        self.assertNoSequentialScans(f'/api/mappings/{self.mapping.id}/')
+        self.assertNoSequentialScans(f'/api/mappings/patient/{self.patient.id}/')
+        self.assertNoSequentialScans('/api/mappings/active/')
+
+    def assertNoSequentialScans(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+
+        for query in ctx.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or self.is_directory_aggregate(sql):
+                continue
+            scanned = self.sequential_scans(sql)
+            self.assertEqual(scanned, [], f'GET {url} scans {scanned} sequentially:\n{sql}')
+
+    def is_directory_aggregate(self, sql):
+        """
+        Counting all (or most) of the shared doctor directory reads every
+        row whatever the indexes; its row fetches are still checked
+        """
+        return sql.startswith('SELECT COUNT(') and f'FROM "{Doctor._meta.db_table}"' in sql
+
+    def sequential_scans(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return sorted(self._postgresql_seq_scans(plan[0]['Plan']))
+
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            scanned = []
+            for row in cursor.fetchall():
+                # 'SCAN table' is a full scan, 'SCAN table USING INDEX' or
+                # 'SEARCH table ...' are not
+                words = row[-1].split()
+                if words[0] == 'SCAN' and 'USING' not in words and words[1] in self.large_tables:
+                    scanned.append(words[1])
+            return sorted(scanned)
+
+    def _postgresql_seq_scans(self, node):
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in self.large_tables:
+            yield node['Relation Name']
+        for child in node.get('Plans', ()):
+            yield from self._postgresql_seq_scans(child)
+
+
+class BaselineComparisonTests(SimpleTestCase):
+    """
+    find_regressions() decides whether bench_api fails a run
+    """
+    baseline = {'1k': {'patients.list': {
+        'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0, 'throughput': 100.0, 'queries': 2,
+    }}}
+
+    def run_with(self, **changes):
+        metrics = {**self.baseline['1k']['patients.list'], **changes}
+        return find_regressions({'1k': {'patients.list': metrics}}, self.baseline, threshold=0.25)
+
+    def test_within_threshold(self):
+        self.assertEqual(self.run_with(p95_ms=24.0, throughput=80.0), [])
+
+    def test_latency_and_throughput_regressions(self):
+        regressions = self.run_with(p95_ms=26.0, throughput=70.0)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn('1k patients.list p95_ms', regressions[0])
+
+    def test_small_latency_changes_are_noise(self):
+        baseline = {'1k': {'doctors.list': {'p50_ms': 1.0}}}
+        fast = {'1k': {'doctors.list': {'p50_ms': 2.5}}}
+        slow = {'1k': {'doctors.list': {'p50_ms': 3.5}}}
+        self.assertEqual(find_regressions(fast, baseline, threshold=0.25), [])
+        self.assertEqual(len(find_regressions(slow, baseline, threshold=0.25)), 1)
+
+    def test_any_extra_query_regresses(self):
+        self.assertEqual(len(self.run_with(queries=3)), 1)
+
+    def test_unknown_endpoints_are_skipped(self):
+        results = {'100k': {'patients.list': {'p95_ms': 1000.0}}}
+        self.assertEqual(find_regressions(results, self.baseline, threshold=0.25), [])
+
+
+class IdempotencyTests(TestCase):
+    """
+    POST endpoints replay the first response to a repeated Idempotency-Key
+    """
+    payload = {
+        'name': 'John Doe', 'age': 45, 'gender': 'M',
+        'contact': '9876543210', 'address': '1 Main Street',
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password=None
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, payload, key='key-1'):
+        return self.client.post('/api/patients/', payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_without_creating(self):
+        first = self.post(self.payload)
+        retry = self.post(self.payload)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry.data), (201, first.data))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Patient.objects.count(), 1)
+
+        # Keys are per user and route, and optional
+        self.assertEqual(self.post(self.payload, key='key-2').status_code, 201)
+        self.assertEqual(self.client.post('/api/patients/', self.payload, format='json').status_code, 201)
+        self.assertEqual(Patient.objects.count(), 3)
+
+    def test_different_body_is_rejected(self):
+        self.post(self.payload)
+        response = self.post({**self.payload, 'age': 46})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Patient.objects.count(), 1)
+
+    def test_validation_errors_are_replayed(self):
+        invalid = {**self.payload, 'age': 200}
+        first = self.post(invalid)
+        retry = self.post(invalid)
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual((retry.status_code, retry.data), (400, first.data))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+    def test_in_flight_duplicate_conflicts(self):
+        # Claim the key the way a concurrent first request would
+        self.post(self.payload, key='other')
+        IdempotencyRecord.objects.update(status_code=None, response=None)
+        response = self.client.post('/api/patients/', self.payload, format='json', HTTP_IDEMPOTENCY_KEY='other')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+
+        # An abandoned claim is taken over once it expires
+        IdempotencyRecord.objects.update(expires_at=timezone.now())
+        self.assertEqual(self.post(self.payload, key='other').status_code, 201)
+
+    def test_prune_bounds_the_table(self):
+        for index in range(5):
+            self.post(self.payload, key=f'key-{index}')
+        store = get_store()
+        store.max_entries, max_entries = 2, store.max_entries
+        try:
+            store.prune()
+        finally:
+            store.max_entries = max_entries
+        self.assertEqual(IdempotencyRecord.objects.count(), 2)
+
+    @override_settings(IDEMPOTENCY_STORE='core.idempotency.CacheIdempotencyStore')
+    def test_cache_store(self):
+        first = self.post(self.payload)
+        retry = self.post(self.payload)
+        self.assertEqual((retry.status_code, retry.data), (201, first.data))
+        self.assertEqual(self.post({**self.payload, 'age': 46}).status_code, 422)
+        self.assertEqual(Patient.objects.count(), 1)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    MIDDLEWARE=[name for name in settings.MIDDLEWARE if name not in settings.ADMIN_MIDDLEWARE],
+    SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies',
+    SESSION_COOKIE_PATH='/admin/',
+)
+class LeanStackTests(TestCase):
+    """
+    Production profile: the API skips the session stack, the admin keeps it
+    """
+
+    def test_api_runs_without_session_middleware(self):
+        response = self.client.get('/api/patients/')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(response.has_header('X-Frame-Options'))
+        self.assertFalse(response.cookies)
+
+    def test_admin_login(self):
+        User.objects.create_superuser(
+            email='admin@example.com', username='admin', name='Admin', password='admin-Password-1'
+        )
+        response = self.client.post(
+            '/admin/login/?next=/admin/', {'username': 'admin@example.com', 'password': 'admin-Password-1'}
+        )
+        self.assertRedirects(response, '/admin/', fetch_redirect_response=False)
+        self.assertEqual(response.cookies[settings.SESSION_COOKIE_NAME]['path'], '/admin/')
+
+        response = self.client.get('/admin/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.info = SimpleNamespace(transaction_status=IDLE)
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """
+    core.db.pool.ConnectionPool with stand-in connections
+    """
+
+    def make_pool(self, **options):
+        pool = ConnectionPool('test', **{'min_size': 0, 'max_size': 2, 'timeout': 0.05, **options})
+        self.opened = []
+        return pool
+
+    def connect(self):
+        connection = FakeConnection()
+        self.opened.append(connection)
+        return connection
+
+    def test_reuses_returned_connections(self):
+        pool = self.make_pool()
+        first = pool.getconn(self.connect)
+        pool.putconn(first)
+        self.assertIs(pool.getconn(self.connect), first)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(pool.stats()['checkouts'], 2)
+
+    def test_waits_for_a_free_connection_up_to_the_timeout(self):
+        pool = self.make_pool(timeout=5)
+        held = [pool.getconn(self.connect), pool.getconn(self.connect)]
+        threading.Timer(0.05, pool.putconn, [held[0]]).start()
+        self.assertIs(pool.getconn(self.connect), held[0])
+        stats = pool.stats()
+        self.assertEqual((stats['in_use'], stats['saturation']), (2, 1.0))
+        self.assertGreater(stats['max_wait_seconds'], 0.01)
+
+        pool.timeout = 0.05
+        with self.assertRaises(PoolTimeout):
+            pool.getconn(self.connect)
+        self.assertEqual(len(self.opened), 2)
+
+    def test_returned_connections_are_reset_or_discarded(self):
+        pool = self.make_pool()
+        in_error = pool.getconn(self.connect)
+        in_error.info.transaction_status = INERROR
+        pool.putconn(in_error)
+        self.assertEqual(in_error.rollbacks, 1)
+        self.assertIs(pool.getconn(self.connect), in_error)
+
+        in_error.closed = 2
+        pool.putconn(in_error)
+        self.assertIsNot(pool.getconn(self.connect), in_error)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_failed_health_check_opens_a_replacement(self):
+        def check(connection):
+            if connection is self.opened[0]:
+                raise OSError('server closed the connection')
+
+        pool = self.make_pool(check=check)
+        stale = pool.getconn(self.connect)
+        pool.putconn(stale)
+        with self.assertLogs('core.db.pool', 'WARNING'):
+            fresh = pool.getconn(self.connect)
+        self.assertIsNot(fresh, stale)
+        self.assertTrue(stale.closed)
+        self.assertEqual((pool.stats()['size'], pool.stats()['failed_checks']), (1, 1))
+
+    def test_idle_connections_expire_down_to_min_size(self):
+        pool = self.make_pool(min_size=1, max_size=3, max_idle=0.01)
+        first, second, third = (pool.getconn(self.connect) for _ in range(3))
+        pool.putconn(first)
+        pool.putconn(second)
+        time.sleep(0.02)
+        pool.putconn(third)
+        self.assertEqual(pool.stats()['size'], 1)
+        self.assertEqual([bool(c.closed) for c in (first, second, third)], [True, True, False])
+
+    def test_close(self):
+        pool = self.make_pool()
+        idle, held = pool.getconn(self.connect), pool.getconn(self.connect)
+        pool.putconn(idle)
+        pool.close()
+        self.assertTrue(idle.closed)
+        pool.putconn(held)
+        self.assertTrue(held.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+
+class RecordingRouter(ReplicaRouter):
+    """
+    Records where ReplicaRouter sends each read, but runs it on the test
+    database
+    """
+
+    def __init__(self):
+        self.reads = []
+
+    def db_for_read(self, model, **hints):
+        self.reads.append((model._meta.label, super().db_for_read(model, **hints) or 'default'))
+        return None
+
+    def targets(self, label):
+        return {alias for model, alias in self.reads if model == label}
+
+
+ROUTER = RecordingRouter()
+
+
+@override_settings(
+    DATABASE_ROUTERS=[ROUTER],
+    REPLICA_DATABASES=['replica'],
+    REPLICA_STICKY_SECONDS=10,
+    REPLICA_MAX_LAG=5,
+    REPLICA_LAG_CHECK_INTERVAL=3600,
+)
+class ReplicaRoutingTests(TestCase):
+    """
+    Safe reads go to a healthy replica unless the user recently wrote
+    """
+
+    def setUp(self):
+        cache.clear()
+        lag_monitor.record('replica', 0.0)
+        ROUTER.reads.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password=None
+        )
+        self.other = User.objects.create_user(
+            email='other@example.com', username='other@example.com', name='Other', password=None
+        )
+        self.patient = Patient.objects.create(
+            name='Patient', age=40, gender='F', contact='9876543210',
+            address='1 Main Street', created_by=self.user
+        )
+        self.doctor = Doctor.objects.create(
+            name='Doctor', specialization='GENERAL', contact='9876543210',
+            email='doctor@example.com', experience_years=5, qualification='MBBS'
+        )
+
+    def get(self, user, path):
+        client = APIClient()
+        client.force_authenticate(user)
+        ROUTER.reads.clear()
+        self.assertEqual(client.get(path).status_code, 200)
+        return ROUTER
+
+    def test_writes_pin_their_author_to_the_primary(self):
+        self.assertEqual(self.get(self.user, '/api/patients/').targets('patients.Patient'), {'replica'})
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        ROUTER.reads.clear()
+        response = client.post(
+            '/api/mappings/', {'patient_id': self.patient.id, 'doctor_id': self.doctor.id}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('replica', {alias for _, alias in ROUTER.reads})
+
+        self.assertEqual(self.get(self.user, '/api/mappings/').targets('mappings.PatientDoctorMapping'), {'default'})
+        self.assertEqual(self.get(self.other, '/api/mappings/').targets('mappings.PatientDoctorMapping'), {'replica'})
+
+    def test_shared_data_writes_pin_everyone(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.patch(f'/api/doctors/{self.doctor.id}/', {'available': False}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(self.other, '/api/doctors/').targets('doctors.Doctor'), {'default'})
+
+    def test_lagging_or_unreachable_replica_falls_back_to_primary(self):
+        for lag in (30.0, None):
+            lag_monitor.record('replica', lag)
+            self.assertEqual(self.get(self.user, '/api/doctors/').targets('doctors.Doctor'), {'default'})
+            cache.clear()
+
+    def test_routing_ends_with_the_request(self):
+        self.get(self.user, '/api/patients/')
+        self.assertEqual(Patient.objects.all().db, 'default')
+
+
+class ProjectionTests(TestCase):
+    """
+    values() projections render the same bytes as their serializers
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password=None
+        )
+        doctors = [
+            Doctor.objects.create(
+                name=f'Doctor {code}', specialization=code, contact='9876543210',
+                email=f'{code.lower()}@example.com', experience_years=i,
+                qualification='MBBS', available=bool(i % 2)
+            )
+            for i, (code, _) in enumerate(Doctor.SPECIALIZATION_CHOICES)
+        ]
+        for i, (code, _) in enumerate(Patient.GENDER_CHOICES):
+            patient = Patient.objects.create(
+                name=f'Patient "{i}" \u00e9', age=30 + i, gender=code, contact='9876543210',
+                address='1 Main Street', medical_history=None if i % 2 else 'Asthma',
+                created_by=cls.user
+            )
+            PatientDoctorMapping.objects.create(patient=patient, doctor=doctors[i], notes='')
+
+    def assertSameJSON(self, serializer_class, queryset):
+        projection = projection_for(serializer_class)
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        projected = JSONRenderer().render(projection.represent_many(projection.project(queryset)))
+        self.assertEqual(projected, expected)
+
+    def test_list_serializers_match(self):
+        from doctors.serializers import DoctorSerializer
+        from mappings.serializers import PatientDoctorMappingListSerializer, PatientDoctorMappingSerializer
+        from patients.serializers import PatientSerializer
+
+        # Datetimes are rendered in the current timezone
+        for zone in ('UTC', 'Asia/Kolkata'):
+            with self.subTest(zone=zone), timezone.override(zone):
+                self.assertSameJSON(PatientSerializer, Patient.objects.all())
+                self.assertSameJSON(DoctorSerializer, Doctor.objects.all())
+                self.assertSameJSON(PatientDoctorMappingListSerializer, PatientDoctorMapping.objects.all())
+                # Nested serializers, two levels deep
+                self.assertSameJSON(PatientDoctorMappingSerializer, PatientDoctorMapping.objects.all())
+
+    def test_list_endpoints_read_the_page_in_one_query(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for path in ('/api/patients/', '/api/doctors/', '/api/mappings/'):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path, {'page_size': 2})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), 2)
+            # The ETag validators, then the page itself
+            self.assertEqual(len(queries), 2, path)
+
+            # Keyset cursors come from the projected rows
+            following = client.get(response.data['next'])
+            self.assertEqual(following.status_code, 200)
+            self.assertTrue(following.data['results'])
+
+    def test_unsupported_fields_are_rejected(self):
+        class MethodSerializer(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Doctor
+                fields = ['id', 'label']
+
+            def get_label(self, doctor):
+                return doctor.name
+
+        with self.assertRaises(ImproperlyConfigured):
+            Projection(MethodSerializer)
+
+
+class SharedNestedTests(TestCase):
+    """
+    Nested objects are built once per response, or listed once under
+    `included` with ?normalize=true
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password=None
+        )
+        cls.patients = [
+            Patient.objects.create(
+                name=f'Patient {i}', age=40, gender='F', contact='9876543210',
+                address='1 Main Street', created_by=cls.user
+            )
+            for i in range(2)
+        ]
+        cls.doctors = [
+            Doctor.objects.create(
+                name=f'Doctor {i}', specialization='GENERAL', contact='9876543210',
+                email=f'doctor{i}@example.com', experience_years=5, qualification='MBBS'
+            )
+            for i in range(3)
+        ]
+        for patient in cls.patients:
+            for doctor in cls.doctors:
+                PatientDoctorMapping.objects.create(patient=patient, doctor=doctor)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_nested_serializers_reuse_representations(self):
+        from mappings.serializers import PatientDoctorMappingSerializer
+        mappings = PatientDoctorMapping.objects.select_related('patient__created_by', 'doctor')
+        data = PatientDoctorMappingSerializer(mappings, many=True).data
+
+        patients = {id(row['patient']) for row in data}
+        doctors = {id(row['doctor']) for row in data}
+        owners = {id(row['patient']['created_by']) for row in data}
+        self.assertEqual((len(patients), len(doctors), len(owners)), (2, 3, 1))
+
+    def test_projected_rows_share_nested_objects(self):
+        from patients.serializers import PatientSerializer
+        projection = projection_for(PatientSerializer)
+        rows = projection.represent_many(projection.project(Patient.objects.all()))
+        self.assertIs(rows[0]['created_by'], rows[1]['created_by'])
+
+    def test_normalized_mappings(self):
+        patient = self.patients[0]
+        inline = self.client.get(f'/api/mappings/patient/{patient.id}/')
+        normalized = self.client.get(f'/api/mappings/patient/{patient.id}/', {'normalize': 'true'})
+        self.assertNotIn('included', inline.data)
+        self.assertLess(len(normalized.content), len(inline.content))
+
+        rows = normalized.data['doctors']
+        self.assertEqual({row['patient'] for row in rows}, {patient.id})
+        self.assertEqual({row['doctor'] for row in rows}, {doctor.id for doctor in self.doctors})
+        included = normalized.data['included']
+        self.assertEqual(set(included['patients']), {str(patient.id)})
+        self.assertEqual(len(included['doctors']), 3)
+        self.assertEqual(included['patients'][str(patient.id)]['created_by'], self.user.id)
+        self.assertEqual(included['users'][str(self.user.id)]['email'], self.user.email)
+        # Same objects as the inline form, moved
+        self.assertEqual(
+            included['doctors'][str(rows[0]['doctor'])], inline.data['doctors'][0]['doctor']
+        )
+
+        active = self.client.get('/api/mappings/active/', {'normalize': '1'})
+        self.assertEqual(len(active.data['mappings']), 6)
+        self.assertEqual(len(active.data['included']['patients']), 2)
+
+    def test_normalized_patient_list(self):
+        response = self.client.get('/api/patients/', {'normalize': 'true'})
+        self.assertEqual({row['created_by'] for row in response.data['results']}, {self.user.id})
+        self.assertEqual(list(response.data['included']), ['users'])
+        self.assertEqual(response.data['included']['users'][str(self.user.id)]['name'], 'Owner')
+
+
+class SeedDataTests(TestCase):
+    """
+    seed_data writes exactly the rows SyntheticDataset generates
+    """
+    TIMESTAMPS = {
+        'user': ('date_joined',),
+        'doctor': ('created_at', 'updated_at'),
+        'patient': ('created_at', 'updated_at'),
+        'mapping': ('assigned_date', 'updated_at'),
+    }
+
+    def test_generated_timestamps_are_kept(self):
+        sizes = {'users': 3, 'doctors': 4, 'patients': 5, 'mappings_per_patient': 2}
+        call_command('seed_data', seed=7, workers=1, stdout=StringIO(), **sizes)
+
+        dataset = SyntheticDataset(seed=7, **sizes)
+        for table, fields in self.TIMESTAMPS.items():
+            columns = dataset.columns(table)
+            expected = {
+                row[0]: tuple(row[columns.index(field)] for field in fields)
+                for chunk in dataset.chunks(table)
+                for row in dataset.rows(table, chunk)
+            }
+            stored = {
+                row[0]: row[1:]
+                for row in dataset.model(table).objects.values_list('id', *fields)
+            }
+            self.assertEqual(stored, expected, table)
+            # Spread over time, not all stamped with the insert time
+            self.assertGreater(len({values[0] for values in stored.values()}), 1, table)
+
+
+class ExportTests(TestCase):
+    """
+    GET {prefix}/export/: scoping, columns, updated_since and both formats
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password=None
+        )
+        other = User.objects.create_user(
+            email='other@example.com', username='other@example.com', name='Other', password=None
+        )
+        cls.patients = [
+            Patient.objects.create(
+                name=f'Patient {i}', age=30 + i, gender='F', contact='9876543210',
+                address=f'{i}, Main Street', created_by=cls.user
+            )
+            for i in range(3)
+        ]
+        Patient.objects.create(
+            name='Not mine', age=50, gender='M', contact='9876543210',
+            address='Elsewhere', created_by=other
+        )
+        # Older than the cut-off used below
+        Patient.objects.filter(pk=cls.patients[0].pk).update(
+            updated_at=timezone.make_aware(timezone.datetime(2020, 1, 1))
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, **params):
+        response = self.client.get('/api/patients/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_is_scoped_to_the_user(self):
+        lines = self.export(fields='id,name,address').splitlines()
+        self.assertEqual(lines[0], 'id,name,address')
+        self.assertEqual(lines[1:], [
+            f'{patient.id},{patient.name},"{patient.address}"' for patient in self.patients
+        ])
+
+    def test_ndjson_and_updated_since(self):
+        body = self.export(output='ndjson', fields='id,age', updated_since='2024-01-01')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(rows, [{'id': patient.id, 'age': patient.age} for patient in self.patients[1:]])
+
+    def test_invalid_parameters(self):
+        for params in ({'fields': 'id,password'}, {'output': 'xml'}, {'updated_since': 'yesterday'}):
+            response = self.client.get('/api/patients/export/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertEqual(list(response.data), list(params))
+
+    async def test_asgi_streams_asynchronously(self):
+        token = str(RefreshToken.for_user(self.user).access_token)
+        response = await AsyncClient().get(
+            '/api/patients/export/', {'fields': 'id'}, headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        # A sync iterator would be buffered whole by Django's ASGI handler
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(body.splitlines(), ['id'] + [str(patient.id) for patient in self.patients])
+
+
+class AsyncViewTests(TestCase):
+    """
+    The native async GET views answer exactly as the sync viewsets do
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password=None
+        )
+        other = User.objects.create_user(
+            email='other@example.com', username='other@example.com', name='Other', password=None
+        )
+        doctors = [
+            Doctor.objects.create(
+                name=f'Dr {code}', specialization=code, contact='9876543210',
+                email=f'{code}@example.com', experience_years=i, qualification='MBBS', available=bool(i % 2)
+            )
+            for i, (code, _) in enumerate(Doctor.SPECIALIZATION_CHOICES[:3])
+        ]
+        cls.patient = Patient.objects.create(
+            name='Mine', age=40, gender='F', contact='9876543210', address='1 Main Street', created_by=cls.user
+        )
+        cls.other_patient = Patient.objects.create(
+            name='Not mine', age=50, gender='M', contact='9876543210', address='Elsewhere', created_by=other
+        )
+        for doctor in doctors:
+            PatientDoctorMapping.objects.create(patient=cls.patient, doctor=doctor)
+            PatientDoctorMapping.objects.create(patient=cls.other_patient, doctor=doctor)
+        cls.specialization = doctors[0].specialization
+
+    def setUp(self):
+        cache.clear()
+        token = RefreshToken.for_user(self.user).access_token
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def paths(self):
+        return [
+            '/api/patients/',
+            f'/api/patients/{self.patient.pk}/',
+            f'/api/patients/{self.other_patient.pk}/',
+            '/api/doctors/?page_size=2',
+            '/api/doctors/available/',
+            f'/api/doctors/by_specialization/?specialization={self.specialization}',
+            '/api/doctors/by_specialization/',
+            f'/api/mappings/patient/{self.patient.pk}/?normalize=true',
+            f'/api/mappings/patient/{self.other_patient.pk}/',
+            '/api/mappings/active/',
+        ]
+
+    def sync_get(self, path, **headers):
+        return APIClient().get(path, headers={**self.headers, **headers})
+
+    def async_get(self, path, **headers):
+        with override_settings(ROOT_URLCONF='healthcare_backend.asgi_urls'):
+            return async_to_sync(AsyncClient().get)(path, headers={**self.headers, **headers})
+
+    def sync_head(self, path, **headers):
+        return APIClient().head(path, headers={**self.headers, **headers})
+
+    def async_head(self, path, **headers):
+        with override_settings(ROOT_URLCONF='healthcare_backend.asgi_urls'):
+            return async_to_sync(AsyncClient().head)(path, headers={**self.headers, **headers})
+
+    def test_same_responses_as_the_sync_views(self):
+        for path in self.paths():
+            with self.subTest(path=path):
+                cache.clear()
+                expected = self.sync_get(path)
+                cache.clear()
+                response = self.async_get(path)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(json.loads(response.content), json.loads(expected.content))
+                for header in ('Content-Type', 'ETag', 'Last-Modified', 'X-Cache'):
+                    self.assertEqual(response.get(header), expected.get(header), header)
+        self.assertEqual(
+            self.async_get(f'/api/patients/{self.other_patient.pk}/').status_code, 404
+        )
+
+    def test_head(self):
+        for path in self.paths():
+            with self.subTest(path=path):
+                cache.clear()
+                expected = self.sync_head(path)
+                cache.clear()
+                response = self.async_head(path)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.content, b'')
+                for header in ('Content-Type', 'Content-Length', 'ETag', 'Last-Modified', 'X-Cache'):
+                    self.assertEqual(response.get(header), expected.get(header), header)
+                if expected.status_code == 200:
+                    # A cache hit and a 304 answer HEAD too
+                    self.assertEqual(self.async_head(path)['X-Cache'], 'HIT')
+                    not_modified = self.async_head(path, If_None_Match=expected['ETag'])
+                    self.assertEqual(not_modified.status_code, 304)
+
+    def test_authentication_errors(self):
+        self.headers = {'Authorization': 'Bearer not-a-token'}
+        expected = self.sync_get('/api/patients/')
+        response = self.async_get('/api/patients/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), expected.json())
+        for header in ('Content-Type', 'WWW-Authenticate'):
+            self.assertEqual(response[header], expected[header], header)
+
+    def test_cache_entries_and_validators_are_shared(self):
+        for path in self.paths():
+            with self.subTest(path=path):
+                expected = self.sync_get(path)
+                if expected.status_code != 200:
+                    continue
+                with CaptureQueriesContext(connection) as queries:
+                    hit = self.async_get(path)
+                    not_modified = self.async_get(path, If_None_Match=expected['ETag'])
+                self.assertEqual(len(queries), 0)
+                self.assertEqual(hit['X-Cache'], 'HIT')
+                self.assertEqual(json.loads(hit.content), json.loads(expected.content))
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertEqual(not_modified['ETag'], expected['ETag'])
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Cursor round-trips, the id tiebreaker, page-size caps and the custom
+    list actions
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password=None
+        )
+        # Three doctors per name: only the id tells them apart
+        cls.doctors = [
+            Doctor.objects.create(
+                name=f'Dr {"ABC"[i % 3]}', specialization='CARDIOLOGY', contact='9876543210',
+                email=f'doctor{i}@example.com', experience_years=i, qualification='MBBS', available=True
+            )
+            for i in range(9)
+        ]
+        cls.patient = Patient.objects.create(
+            name='Mine', age=40, gender='F', contact='9876543210', address='1 Main Street', created_by=cls.user
+        )
+        for doctor in cls.doctors:
+            PatientDoctorMapping.objects.create(patient=cls.patient, doctor=doctor)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, key='results', link='next'):
+        """
+        Pages from `url` on, following `link`: lists of ids
+        """
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.data[key]])
+            url = response.data[link]
+        return pages, response
+
+    def test_cursor_round_trip(self):
+        pages, last = self.walk('/api/doctors/?page_size=2')
+        ordered = [doctor.id for doctor in sorted(self.doctors, key=lambda doctor: (doctor.name, doctor.id))]
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 2, 1])
+        self.assertEqual(sum(pages, []), ordered)
+
+        # previous from the last page walks back over the same pages
+        backwards, first = self.walk(last.data['previous'], link='previous')
+        self.assertEqual(backwards, pages[-2::-1])
+        self.assertIsNone(first.data['previous'])
+
+    def test_id_breaks_ties(self):
+        pages, _ = self.walk('/api/doctors/?page_size=1')
+        ids = sum(pages, [])
+        self.assertEqual(len(ids), len(set(ids)))
+        for name in 'ABC':
+            same_name = [doctor.id for doctor in self.doctors if doctor.name == f'Dr {name}']
+            self.assertEqual([pk for pk in ids if pk in same_name], sorted(same_name))
+
+    def test_page_size_is_capped(self):
+        from core.pagination import KeysetPagination
+        from mappings.views import PatientDoctorMappingViewSet
+        paginator = KeysetPagination()
+        for view, requested, expected in (
+            (None, '10000', 500),
+            (None, '0', 1),
+            (None, 'many', 50),
+            # The view's own cap, never above the paginator's
+            (PatientDoctorMappingViewSet(), '10000', 100),
+            (SimpleNamespace(max_page_size=10_000), '10000', 500),
+            (SimpleNamespace(page_size=5), None, 5),
+        ):
+            with self.subTest(view=view, requested=requested):
+                params = {'page_size': requested} if requested else {}
+                request = Request(APIRequestFactory().get('/', params))
+                self.assertEqual(paginator.get_page_size(request, view), expected)
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', 'eyJwIjpbMV19'):  # the second decodes to {"p":[1]}
+            response = self.client.get('/api/doctors/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_custom_actions(self):
+        for url, key in (
+            ('/api/doctors/available/?page_size=4', 'doctors'),
+            ('/api/doctors/by_specialization/?specialization=CARDIOLOGY&page_size=4', 'doctors'),
+            ('/api/mappings/active/?page_size=4', 'mappings'),
+            (f'/api/mappings/patient/{self.patient.pk}/?page_size=4', 'doctors'),
+        ):
+            with self.subTest(url=url):
+                pages, last = self.walk(url, key)
+                self.assertEqual([len(page) for page in pages], [4, 4, 1])
+                self.assertEqual(len(set(sum(pages, []))), 9)
+                self.assertNotIn('count', last.data)
+
+                # The total costs a COUNT(*) and is only run on request
+                cache.clear()
+                with CaptureQueriesContext(connection) as without_count:
+                    self.client.get(url)
+                cache.clear()
+                with CaptureQueriesContext(connection) as with_count:
+                    response = self.client.get(url + '&count=true')
+                self.assertEqual(response.data['count'], 9)
+                self.assertEqual(len(with_count), len(without_count) + 1)
+
+
+class ResponseCacheTests(TestCase):
+    """
+    Generation keys: per-user scoping, dependencies and commit-time bumps
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.directory = ResponseCache('test-directory')
+        self.per_user = ResponseCache('test-owned', per_user=True, depends_on=[self.directory])
+
+    def make_key(self, user_id, **params):
+        request = Request(APIRequestFactory().get('/', params))
+        request.user = SimpleNamespace(pk=user_id)
+        return self.per_user.make_key(request, 'list', {})
+
+    def test_invalidation_is_scoped_to_the_user(self):
+        mine, theirs = self.make_key(1), self.make_key(2)
+        self.assertNotEqual(mine, theirs)
+        self.per_user.invalidate(1)
+        self.assertNotEqual(self.make_key(1), mine)
+        self.assertEqual(self.make_key(2), theirs)
+        self.assertNotEqual(self.make_key(1, page_size=5), self.make_key(1))
+
+    def test_dependencies_invalidate_every_user(self):
+        keys = [self.make_key(1), self.make_key(2)]
+        self.directory.invalidate()
+        self.assertNotIn(self.make_key(1), keys)
+        self.assertNotIn(self.make_key(2), keys)
+
+    def test_bumped_again_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.per_user.invalidate_users([1, 1, 2])
+        # Once per distinct user
+        self.assertEqual(len(callbacks), 2)
+        during = self.make_key(1)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(self.make_key(1), during)
+
+    def test_evicted_generation_does_not_restart_low(self):
+        before = self.per_user.generation(1)
+        self.per_user.invalidate(1)
+        cache.delete(self.per_user.generation_key(1))
+        self.assertGreater(self.per_user.generation(1), before)
+
+
+class QueryInstrumentationTests(TestCase):
+    """
+    Per-request query counts, Server-Timing and the N+1 / budget flags
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password=None
+        )
+
+    def run_request(self, repeat, others=0):
+        """
+        One request running `repeat` identical queries and `others`
+        distinct ones: (response, logged record, log level)
+        """
+        def view(request):
+            for _ in range(repeat):
+                User.objects.filter(pk=self.user.pk).exists()
+            for i in range(others):
+                list(User.objects.filter(pk=self.user.pk).values_list('id')[:i + 1])
+            return HttpResponse()
+
+        middleware = QueryInstrumentationMiddleware(view)
+        with self.assertLogs('core.requests', 'INFO') as logs:
+            response = middleware(RequestFactory().get('/probe/'))
+        [entry] = logs.records
+        return response, json.loads(entry.getMessage()), entry.levelname
+
+    @override_settings(N_PLUS_ONE_THRESHOLD=3, QUERY_BUDGET=10)
+    def test_counts_queries(self):
+        response, record, level = self.run_request(repeat=2, others=2)
+        self.assertEqual(record['queries'], 4)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('desc="4 queries"', response['Server-Timing'])
+        self.assertEqual(level, 'INFO')
+        self.assertNotIn('flags', record)
+
+    @override_settings(N_PLUS_ONE_THRESHOLD=3, QUERY_BUDGET=10)
+    def test_flags_repeated_statements(self):
+        _, record, level = self.run_request(repeat=3, others=2)
+        self.assertEqual(level, 'WARNING')
+        self.assertEqual(record['flags'], ['n_plus_one'])
+        [repeated] = record['repeated']
+        self.assertEqual(repeated['count'], 3)
+        self.assertIn('accounts_user', repeated['sql'])
+
+    @override_settings(N_PLUS_ONE_THRESHOLD=3, QUERY_BUDGET=10)
+    def test_batched_writes_are_not_flagged(self):
+        def view(request):
+            # One INSERT per batch: the same statement four times
+            Patient.objects.bulk_create([
+                Patient(
+                    name=f'Patient {i}', age=30, gender='M', contact='9876543210',
+                    address='1 Main Street', created_by=self.user
+                )
+                for i in range(4)
+            ], batch_size=1)
+            return HttpResponse()
+
+        with self.assertLogs('core.requests', 'INFO') as logs:
+            QueryInstrumentationMiddleware(view)(RequestFactory().post('/probe/'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertGreaterEqual(record['queries'], 4)
+        self.assertNotIn('flags', record)
+
+    @override_settings(N_PLUS_ONE_THRESHOLD=3, QUERY_BUDGET=2)
+    def test_flags_the_query_budget(self):
+        _, record, level = self.run_request(repeat=0, others=3)
+        self.assertEqual((level, record['flags']), ('WARNING', ['query_budget']))
+
+    def test_api_request_counts_match_the_database(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertLogs('core.requests', 'INFO') as logs:
+                client.get('/api/mappings/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['queries'], len(queries))
+        self.assertEqual(record['view'], 'PatientDoctorMappingViewSet.list')
+
+
+class MetricsViewTests(TestCase):
+    """
+    GET /metrics: the bearer token and the Prometheus output
+    """
+
+    @override_settings(METRICS_TOKEN='')
+    def test_output(self):
+        self.client.get('/api/patients/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        for name in ('http_requests_total', 'http_request_duration_seconds', 'http_requests_in_flight'):
+            self.assertIn(f'# TYPE {name}', body)
+        self.assertRegex(body, r'http_requests_total\{[^}]*route="api/patients/"[^}]*status="401"')
+        self.assertEqual(self.client.post('/metrics').status_code, 405)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_token(self):
+        for header in (None, 'Bearer wrong', 'scrape-secret', 'Basic scrape-secret'):
+            with self.subTest(header=header):
+                headers = {'Authorization': header} if header else {}
+                response = self.client.get('/metrics', headers=headers)
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="metrics"')
+                self.assertEqual(response.content, b'')
+
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_production_requires_a_token(self):
+        env = {
+            **os.environ,
+            'SETTINGS_PROFILE': 'production',
+            'SECRET_KEY': 'metrics-test',
+            'DB_NAME': 'x', 'DB_USER': 'x', 'DB_PASSWORD': 'x', 'DB_HOST': 'x', 'DB_PORT': '5432',
+        }
+        for token, error in (('', 'METRICS_TOKEN must be set'), ('scrape-secret', '')):
+            with self.subTest(token=token):
+                completed = subprocess.run(
+                    [sys.executable, '-c', 'import healthcare_backend.settings'],
+                    cwd=settings.BASE_DIR, env={**env, 'METRICS_TOKEN': token},
+                    capture_output=True, text=True
+                )
+                self.assertEqual(completed.returncode != 0, bool(error), completed.stderr[-500:])
+                self.assertIn(error, completed.stderr)
+
+
+class SearchTests(TestCase):
+    """
+    GET {prefix}/search/: matching fields, scoping, limits and ranking
+    (icontains off PostgreSQL)
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password=None
+        )
+        other = User.objects.create_user(
+            email='other@example.com', username='other@example.com', name='Other', password=None
+        )
+        cls.john, cls.jane, cls.asthma = [
+            Patient.objects.create(created_by=cls.user, gender='M', **fields)
+            for fields in (
+                {'name': 'John Carter', 'age': 40, 'contact': '5550001111', 'address': '1 Harbour Road'},
+                {'name': 'Jane Doe', 'age': 35, 'contact': '5550002222', 'address': '2 Mill Lane'},
+                {'name': 'Sam Reed', 'age': 60, 'contact': '5550003333', 'address': '3 Mill Lane',
+                 'medical_history': 'Chronic asthma'},
+            )
+        ]
+        Patient.objects.create(
+            name='John Carter', age=41, gender='M', contact='5550001111',
+            address='1 Harbour Road', created_by=other
+        )
+        Doctor.objects.create(
+            name='Dr Grey', specialization='CARDIOLOGY', contact='9876543210',
+            email='grey@example.com', experience_years=10, qualification='MBBS, MD Cardiology'
+        )
+        Doctor.objects.create(
+            name='Dr Shepherd', specialization='NEUROLOGY', contact='9876543210',
+            email='shepherd@example.com', experience_years=12, qualification='MBBS'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, prefix='/api/patients/', **params):
+        response = self.client.get(f'{prefix}search/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def ids(self, data, key='patients'):
+        self.assertEqual(data['count'], len(data[key]))
+        return [row['id'] for row in data[key]]
+
+    def test_matches_each_field_of_own_patients(self):
+        for query, expected in (
+            ('John Carter', [self.john]),
+            ('0002222', [self.jane]),
+            ('Mill Lane', [self.jane, self.asthma]),
+            ('asthma', [self.asthma]),
+            ('nobody', []),
+        ):
+            with self.subTest(q=query):
+                data = self.search(q=query)
+                self.assertEqual(data['query'], query)
+                # Another user's identical patient is never returned
+                self.assertCountEqual(self.ids(data), [patient.id for patient in expected])
+
+    def test_results_use_the_list_serializer(self):
+        [row] = self.search(q='Jane')['patients']
+        self.assertEqual(row['name'], 'Jane Doe')
+        self.assertEqual(row['created_by']['id'], self.user.id)
+
+    def test_limit(self):
+        # Clamped to 1..search_max_limit; unparseable falls back to the default
+        for limit, count in (('1', 1), ('0', 1), ('many', 2), ('1000', 2)):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.search(q='Lane', limit=limit)['count'], count)
+
+    def test_query_is_required(self):
+        for params in ({}, {'q': '   '}):
+            response = self.client.get('/api/patients/search/', params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_doctor_directory(self):
+        self.assertEqual(self.ids(self.search('/api/doctors/', q='cardio'), 'doctors'), [
+            Doctor.objects.get(name='Dr Grey').id
+        ])
+        self.assertEqual(self.search('/api/doctors/', q='shepherd')['count'], 1)
+
+    @skipUnless(connection.vendor == 'postgresql', 'trigram and full-text ranking need PostgreSQL')
+    def test_typos_and_ranking(self):
+        self.assertEqual(self.ids(self.search(q='Jon Carter'))[0], self.john.id)
+        # Full-text (websearch) match on medical_history, words in any order
+        self.assertEqual(self.ids(self.search(q='asthma chronic')), [self.asthma.id])
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from .metrics import render_metrics
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus scrape endpoint
+
+    With METRICS_TOKEN set, scrapers must send `Authorization: Bearer <token>`.
+    The production profile refuses to start without one.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        header = request.headers.get('Authorization', '')
+        if not constant_time_compare(header, f'Bearer {token}'):
+            response = HttpResponse(status=401)
+            response['WWW-Authenticate'] = 'Bearer realm="metrics"'
+            return response
+
+    payload, content_type = render_metrics()
+    return HttpResponse(payload, content_type=content_type)
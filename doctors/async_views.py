@@ -0,0 +1,67 @@
+from rest_framework import status
+from core.async_views import AsyncViewSetView, apaginate
+from .views import DoctorViewSet
+
+
+class DoctorListView(AsyncViewSetView):
+    """
+    GET /api/doctors/ on the async ORM; POST goes to DoctorViewSet
+    """
+    viewset_class = DoctorViewSet
+    basename = 'doctor'
+    action = 'list'
+    fallback_actions = {'post': 'create'}
+
+    async def read(self, viewset, request):
+        # Same values() fast path as the sync list
+        projection = viewset.get_projection()
+        page, paginator = await apaginate(viewset, projection.project(viewset.get_queryset()))
+        return self.render({**paginator.get_page_links(), 'results': projection.represent_many(page)})
+
+
+class DoctorAvailableView(AsyncViewSetView):
+    """
+    GET /api/doctors/available/
+    """
+    viewset_class = DoctorViewSet
+    basename = 'doctor'
+    action = 'available'
+
+    async def read(self, viewset, request):
+        available_doctors = viewset.get_queryset().filter(available=True)
+        projection = viewset.get_projection()
+        page, paginator = await apaginate(viewset, projection.project(available_doctors))
+
+        return self.render({
+            'doctors': projection.represent_many(page),
+            **await paginator.aget_count(available_doctors),
+            **paginator.get_page_links()
+        })
+
+
+class DoctorBySpecializationView(AsyncViewSetView):
+    """
+    GET /api/doctors/by_specialization/?specialization=...
+    """
+    viewset_class = DoctorViewSet
+    basename = 'doctor'
+    action = 'by_specialization'
+
+    async def read(self, viewset, request):
+        specialization = request.query_params.get('specialization', None)
+
+        if not specialization:
+            return self.render({
+                'error': 'Please provide specialization parameter'
+            }, status.HTTP_400_BAD_REQUEST)
+
+        doctors = viewset.get_queryset().filter(specialization=specialization)
+        projection = viewset.get_projection()
+        page, paginator = await apaginate(viewset, projection.project(doctors))
+
+        return self.render({
+            'specialization': specialization,
+            'doctors': projection.represent_many(page),
+            **await paginator.aget_count(doctors),
+            **paginator.get_page_links()
+        })
@@ -0,0 +1,4 @@
+from core.cache import ResponseCache
+
+# Doctor directory responses are the same for every user
+doctor_directory_cache = ResponseCache('doctors', timeout=600)
@@ -0,0 +1,75 @@
+from core.imports import DIGITS, EMAIL, StagedImport
+from .cache import doctor_directory_cache
+from .models import Doctor
+
+
+class DoctorImport(StagedImport):
+    """
+    Doctor roster import, upserted on email
+
+    Rules mirror DoctorSerializer, except that an email already in the
+    table updates that doctor instead of failing validate_email. An email
+    repeated within the file is an error on its later rows.
+    """
+    model = Doctor
+    columns = (
+        'name', 'specialization', 'contact', 'email', 'experience_years',
+        'qualification', 'available',
+    )
+    required_columns = columns[:-1]
+
+    def rules(self):
+        specializations = [code for code, _ in Doctor.SPECIALIZATION_CHOICES]
+        return [
+            self.blank('name'),
+            self.too_long('name', 100),
+            self.blank('specialization'),
+            self.not_in('specialization', specializations, 'Not a valid choice.'),
+            self.blank('contact'),
+            self.not_matching('contact', DIGITS, 'Contact must contain only digits'),
+            self.length_outside('contact', 10, 15, 'Contact must be 10-15 digits'),
+            self.blank('email'),
+            self.not_matching('email', EMAIL, 'Enter a valid email address.'),
+            self.too_long('email', 254),
+            self.repeated('email', 'This email is already used on an earlier row'),
+            self.integer('experience_years'),
+            self.integer_where('experience_years', '<', 0, 'Experience cannot be negative'),
+            self.integer_where('experience_years', '>', 70, 'Experience seems unrealistic (max 70 years)'),
+            self.blank('qualification'),
+            self.too_long('qualification', 255),
+            self.boolean_rule('available'),
+        ]
+
+    def write(self, now):
+        table = self.q(Doctor._meta.db_table)
+        email = self.q('email')
+        updated = self.fetch_value(
+            f'SELECT COUNT(*) FROM {self.staging} WHERE EXISTS '
+            f'(SELECT 1 FROM {table} WHERE {table}.{email} = {self.col("email")})'
+        )
+
+        values = {
+            'name': self.col('name'),
+            'specialization': self.col('specialization'),
+            'contact': self.col('contact'),
+            'email': self.col('email'),
+            'experience_years': self.as_integer('experience_years'),
+            'qualification': self.col('qualification'),
+            'available': self.as_boolean('available'),
+        }
+        # An existing doctor keeps the columns the file leaves out
+        updates = [name for name in values if name in self.header and name != 'email']
+        self.execute(
+            f"INSERT INTO {table} ({', '.join(self.q(name) for name in values)}, "
+            f"{self.q('created_at')}, {self.q('updated_at')}) "
+            # WHERE true: SQLite needs it to parse ON CONFLICT after a SELECT
+            f"SELECT {', '.join(values.values())}, %s, %s FROM {self.staging} WHERE true "
+            f'ON CONFLICT ({email}) DO UPDATE SET '
+            + ', '.join(f'{self.q(name)} = EXCLUDED.{self.q(name)}' for name in [*updates, 'updated_at']),
+            [now, now]
+        )
+        return self.cursor.rowcount - updated, updated
+
+    def invalidate_caches(self):
+        # Mapping caches depend on the directory generation
+        doctor_directory_cache.invalidate()
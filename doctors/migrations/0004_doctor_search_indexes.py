@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:16
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+from django.db import migrations
+import core.operations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('doctors', '0003_alter_doctor_id'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        core.operations.AddIndexConcurrently(
+            model_name='doctor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='doctor_name_trgm', opclasses=['gin_trgm_ops']),
+            postgres_only=True,
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='doctor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['qualification'], name='doctor_qualification_trgm', opclasses=['gin_trgm_ops']),
+            postgres_only=True,
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='doctor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['specialization'], name='doctor_specialization_trgm', opclasses=['gin_trgm_ops']),
+            postgres_only=True,
+        ),
+    ]
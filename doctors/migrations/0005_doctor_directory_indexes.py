@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:19
+
+from django.db import migrations, models
+import core.operations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('doctors', '0004_doctor_search_indexes'),
+    ]
+
+    operations = [
+        core.operations.AddIndexConcurrently(
+            model_name='doctor',
+            index=models.Index(fields=['name', 'id'], name='doctor_name_idx'),
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='doctor',
+            index=models.Index(condition=models.Q(('available', True)), fields=['name', 'id'], name='doctor_available_name_idx'),
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='doctor',
+            index=models.Index(fields=['specialization', 'name', 'id'], name='doctor_specialization_name_idx'),
+        ),
+    ]
@@ -1,4 +1,33 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.utils import timezone
+
+class DoctorQuerySet(models.QuerySet):
+    """
+    Bulk operations skip model signals, so they invalidate the
+    directory cache themselves
+    """
+    def update(self, **kwargs):
+        # auto_now is not applied by update(); keep updated_at honest for ETags
+        kwargs.setdefault('updated_at', timezone.now())
+        rows = super().update(**kwargs)
+        self._invalidate_directory()
+        return rows
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super().bulk_create(*args, **kwargs)
+        self._invalidate_directory()
+        return objs
+
+    def bulk_update(self, *args, **kwargs):
+        rows = super().bulk_update(*args, **kwargs)
+        self._invalidate_directory()
+        return rows
+
+    def _invalidate_directory(self):
+        from .cache import doctor_directory_cache
+        doctor_directory_cache.invalidate()
+
 
 # Create your models here.
 class Doctor(models.Model):
@@ -20,8 +49,20 @@ class Doctor(models.Model):
     created_at = models.DateTimeField(auto_now_add = True)
     updated_at = models.DateTimeField(auto_now = True)
 
+    objects = DoctorQuerySet.as_manager()
+
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Directory pages in name order: all, available=True, by specialization
+            models.Index(fields=['name', 'id'], name='doctor_name_idx'),
+            models.Index(fields=['name', 'id'], condition=models.Q(available=True), name='doctor_available_name_idx'),
+            models.Index(fields=['specialization', 'name', 'id'], name='doctor_specialization_name_idx'),
+            # Typo-tolerant search, PostgreSQL only (see migration 0004)
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='doctor_name_trgm'),
+            GinIndex(fields=['qualification'], opclasses=['gin_trgm_ops'], name='doctor_qualification_trgm'),
+            GinIndex(fields=['specialization'], opclasses=['gin_trgm_ops'], name='doctor_specialization_trgm'),
+        ]
         # verbose = 'Doctor'
         # verbose_name_plural = 'Doctors'
 
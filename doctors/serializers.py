@@ -1,11 +1,14 @@
 from rest_framework import serializers
 from .models import Doctor
+from core.instrumentation import TimedRepresentationMixin
+from core.nested import SharedRepresentationMixin
 
-class DoctorSerializer(serializers.ModelSerializer):
+class DoctorSerializer(SharedRepresentationMixin, TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for Doctor model
     
-    Handles all CRUD operations for doctors
+    Handles all CRUD operations for doctors. Nested in mappings, each
+    doctor is serialized once per response.
     """
 
     # Display specialization name
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import doctor_directory_cache
+from .models import Doctor
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def invalidate_doctor_directory(sender, **kwargs):
+    """
+    Any doctor write makes every cached directory page stale
+    """
+    doctor_directory_cache.invalidate()
@@ -1,3 +1,134 @@
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from rest_framework.test import APIClient
+from accounts.models import User
+from .models import Doctor
 
-# Create your tests here.
+HEADER = 'name,specialization,contact,email,experience_years,qualification,available\n'
+
+
+class DoctorConditionalTests(TestCase):
+    """
+    The directory is one cache entry for every user, and so is its ETag
+    """
+
+    def setUp(self):
+        cache.clear()
+        Doctor.objects.create(
+            name='Doctor', specialization='GENERAL', contact='9876543210',
+            email='doctor@example.com', experience_years=5, qualification='MBBS'
+        )
+        self.clients = []
+        for email in ('first@example.com', 'second@example.com'):
+            user = User.objects.create_user(email=email, username=email, name='User', password=None)
+            client = APIClient()
+            client.force_authenticate(user)
+            self.clients.append(client)
+
+    def test_etag_revalidates_across_users(self):
+        first, second = self.clients
+        for path in ('/api/doctors/', '/api/doctors/available/', '/api/doctors/by_specialization/?specialization=GENERAL'):
+            with self.subTest(path=path):
+                etag = first.get(path)['ETag']
+                # From the shared cache entry, then computed again on a miss
+                for clear in (False, True):
+                    if clear:
+                        cache.clear()
+                    response = second.get(path, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 304)
+                    self.assertEqual(response['ETag'], etag)
+
+
+class DoctorImportTests(TestCase):
+    """
+    POST /api/doctors/import/ validates in SQL and upserts on email
+    """
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(
+            email='admin@example.com', username='admin@example.com', name='Admin', password=None
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def upload(self, content, **fields):
+        upload = SimpleUploadedFile('roster.csv', content.encode(), content_type='text/csv')
+        return self.client.post('/api/doctors/import/', {'file': upload, **fields}, format='multipart')
+
+    def test_creates_and_updates_on_email(self):
+        Doctor.objects.create(
+            name='Old Name', specialization='GENERAL', contact='9876543210',
+            email='a@example.com', experience_years=3, qualification='MBBS', available=False
+        )
+        response = self.upload(
+            'name,specialization,contact,email,experience_years,qualification\n'
+            'New Name,CARDIOLOGY,9876543210,a@example.com,4,MD\n'
+            ' Dr B ,NEUROLOGY,9876543211,b@example.com,12,MBBS\n'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+
+        updated = Doctor.objects.get(email='a@example.com')
+        self.assertEqual((updated.name, updated.experience_years), ('New Name', 4))
+        # Column absent from the file: kept on update, model default on insert
+        self.assertFalse(updated.available)
+        created = Doctor.objects.get(email='b@example.com')
+        self.assertEqual(created.name, 'Dr B')
+        self.assertTrue(created.available)
+
+    def test_invalid_rows_block_the_import(self):
+        response = self.upload(
+            HEADER
+            + 'Dr A,CARDIOLOGY,9876543210,a@example.com,10,MBBS,yes\n'
+            + 'Dr B,CARDIO,98765,b@example.com,-1,MD,maybe\n'
+            + 'Dr C,NEUROLOGY,98765x,not-an-email,abc,,no\n'
+            + 'Dr D,GENERAL,9876543210,a@example.com,80,MBBS,\n'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Doctor.objects.exists())
+        self.assertEqual(response.data['invalid_rows'], 3)
+        errors = {entry['row']: entry['errors'] for entry in response.data['errors']}
+        self.assertEqual(errors[2], {
+            'available': ['Must be a valid boolean.'],
+            'contact': ['Contact must be 10-15 digits'],
+            'experience_years': ['Experience cannot be negative'],
+            'specialization': ['Not a valid choice.'],
+        })
+        self.assertEqual(errors[3], {
+            'contact': ['Contact must contain only digits'],
+            'email': ['Enter a valid email address.'],
+            'experience_years': ['A valid integer is required.'],
+            'qualification': ['This field may not be blank.'],
+        })
+        self.assertEqual(errors[4], {
+            'email': ['This email is already used on an earlier row'],
+            'experience_years': ['Experience seems unrealistic (max 70 years)'],
+        })
+
+    def test_partial_mode_imports_valid_rows(self):
+        response = self.upload(
+            HEADER
+            + 'Dr A,CARDIOLOGY,9876543210,a@example.com,10,MBBS,yes\n'
+            + 'Dr B,CARDIO,9876543210,b@example.com,10,MD,no\n',
+            mode='partial'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(Doctor.objects.values_list('email', flat=True)), ['a@example.com'])
+
+    def test_dry_run_writes_nothing(self):
+        response = self.upload(HEADER + 'Dr A,CARDIOLOGY,9876543210,a@example.com,10,MBBS,\n', dry_run='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['valid_rows'], 1)
+        self.assertFalse(Doctor.objects.exists())
+
+    def test_bad_header_rejects_the_file(self):
+        response = self.upload('name,specialty\nDr A,CARDIOLOGY\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('unknown column(s) specialty', response.data['file'][0])
+
+    def test_ragged_row_rejects_the_file(self):
+        response = self.upload(HEADER + 'Dr A,CARDIOLOGY\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('file', response.data)
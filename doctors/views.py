@@ -4,8 +4,18 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import Doctor
 from .serializers import DoctorSerializer
+from .cache import doctor_directory_cache
+from .imports import DoctorImport
+from core.cache import cache_response
+from core.conditional import ConditionalRequestMixin, conditional_response
+from core.export import ExportMixin
+from core.idempotency import idempotent
+from core.imports import ImportMixin
+from core.projection import ProjectionMixin
+from core.replicas import ReplicaReadMixin
+from core.search import SearchMixin
 
-class DoctorViewSet(viewsets.ModelViewSet):
+class DoctorViewSet(ReplicaReadMixin, ConditionalRequestMixin, ExportMixin, ImportMixin, SearchMixin, ProjectionMixin, viewsets.ModelViewSet):
     """
     ViewSet for Doctor CRUD operations
     """
@@ -13,7 +23,34 @@ class DoctorViewSet(viewsets.ModelViewSet):
     queryset = Doctor.objects.all()
     serializer_class = DoctorSerializer
     permission_classes = [IsAuthenticated]
+    export_fields = (
+        'id', 'name', 'specialization', 'contact', 'email', 'experience_years',
+        'qualification', 'available', 'created_at', 'updated_at',
+    )
+    # POST /api/doctors/import/ upserts a roster CSV on email
+    import_class = DoctorImport
+    # Backed by the trigram indexes in Doctor.Meta.indexes
+    search_trigram_fields = ('name', 'qualification', 'specialization')
+    search_results_key = 'doctors'
+    # Read-only directory lists served from values() rows
+    projected_actions = ('list', 'available', 'by_specialization')
+    # Every user reads the directory, so a write sends everyone's reads to
+    # the primary until the replicas have it
+    replica_pin_scope = 'all'
     
+    @conditional_response
+    @cache_response(doctor_directory_cache)
+    def list(self, request, *args, **kwargs):
+        """
+        List doctors, served from the shared directory cache when possible
+        """
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
+    @idempotent
     def create(self, request, *args, **kwargs):
         """
         Create new doctor with custom response
@@ -54,19 +91,25 @@ class DoctorViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'])
+    @conditional_response
+    @cache_response(doctor_directory_cache)
     def available(self, request):
         """
         Custom endpoint to get only available doctors
         """
-        available_doctors = self.queryset.filter(available=True)
-        serializer = self.get_serializer(available_doctors, many=True)
+        available_doctors = self.get_queryset().filter(available=True)
+        projection = self.get_projection()
+        page = self.paginate_queryset(projection.project(available_doctors))
         
         return Response({
-            'doctors': serializer.data,
-            'count': available_doctors.count()
+            'doctors': projection.represent_many(page),
+            **self.paginator.get_count(available_doctors),
+            **self.paginator.get_page_links()
         }, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'])
+    @conditional_response
+    @cache_response(doctor_directory_cache)
     def by_specialization(self, request):
         """
         Custom endpoint to filter doctors by specialization
@@ -78,11 +121,13 @@ class DoctorViewSet(viewsets.ModelViewSet):
                 'error': 'Please provide specialization parameter'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        doctors = self.queryset.filter(specialization=specialization)
-        serializer = self.get_serializer(doctors, many=True)
+        doctors = self.get_queryset().filter(specialization=specialization)
+        projection = self.get_projection()
+        page = self.paginate_queryset(projection.project(doctors))
         
         return Response({
             'specialization': specialization,
-            'doctors': serializer.data,
-            'count': doctors.count()
+            'doctors': projection.represent_many(page),
+            **self.paginator.get_count(doctors),
+            **self.paginator.get_page_links()
         }, status=status.HTTP_200_OK)
\ No newline at end of file
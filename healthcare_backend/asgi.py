@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'healthcare_backend.settings')
+# Serve the native async views where they exist
+os.environ.setdefault('ROOT_URLCONF', 'healthcare_backend.asgi_urls')
 
 application = get_asgi_application()
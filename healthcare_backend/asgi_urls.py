@@ -0,0 +1,26 @@
+"""
+URL configuration used by the ASGI entry point (healthcare_backend.asgi)
+
+Same routes as healthcare_backend.urls, with native async views placed
+first for the paths that have one so they win over the sync DRF views.
+Detail ids are matched as digits so list-level actions (export/, bulk/)
+still fall through to the routers.
+"""
+from django.urls import path, re_path
+from accounts import async_views
+from doctors.async_views import DoctorListView, DoctorAvailableView, DoctorBySpecializationView
+from mappings.async_views import MappingsByPatientView, ActiveMappingsView
+from patients.async_views import PatientListView, PatientDetailView
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/auth/register/', async_views.register),
+    path('api/auth/login/', async_views.login),
+    path('api/patients/', PatientListView.as_view()),
+    re_path(r'^api/patients/(?P<pk>[0-9]+)/$', PatientDetailView.as_view()),
+    path('api/doctors/', DoctorListView.as_view()),
+    path('api/doctors/available/', DoctorAvailableView.as_view()),
+    path('api/doctors/by_specialization/', DoctorBySpecializationView.as_view()),
+    re_path(r'^api/mappings/patient/(?P<patient_id>[^/.]+)/$', MappingsByPatientView.as_view()),
+    path('api/mappings/active/', ActiveMappingsView.as_view()),
+] + sync_urlpatterns
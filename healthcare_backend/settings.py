@@ -11,8 +11,9 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -20,13 +21,24 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
 
+# development (default) or production: DEBUG off, secrets from the
+# environment and an API-only request path (see MIDDLEWARE below)
+SETTINGS_PROFILE = config('SETTINGS_PROFILE', default='development')
+if SETTINGS_PROFILE not in ('development', 'production'):
+    raise ImproperlyConfigured(f'Unknown SETTINGS_PROFILE {SETTINGS_PROFILE!r}')
+PRODUCTION = SETTINGS_PROFILE == 'production'
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-zuy6745l=t64=8qshe5@o72l=r008(l$(hv(rq*5zvlrek^4hx'
+if PRODUCTION:
+    SECRET_KEY = config('SECRET_KEY')
+else:
+    SECRET_KEY = config('SECRET_KEY', default='django-insecure-zuy6745l=t64=8qshe5@o72l=r008(l$(hv(rq*5zvlrek^4hx')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# (DEBUG also keeps every SQL statement in connection.queries)
+DEBUG = False if PRODUCTION else config('DEBUG', default=True, cast=bool)
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='', cast=Csv())
 
 
 # Application definition
@@ -38,6 +50,8 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
+    'core',
     'accounts',
     'patients',
     'doctors',
@@ -45,6 +59,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First so its total covers every other middleware
+    'core.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,7 +70,29 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'healthcare_backend.urls'
+# Only the admin needs these: the API authenticates with JWT alone
+ADMIN_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+if PRODUCTION:
+    # healthcare_backend.urls applies ADMIN_MIDDLEWARE to the /admin/ mount
+    # alone, and the admin session lives in a signed cookie scoped to it,
+    # so API requests skip the session stack and the sessions app goes
+    MIDDLEWARE = [name for name in MIDDLEWARE if name not in ADMIN_MIDDLEWARE]
+    INSTALLED_APPS.remove('django.contrib.sessions')
+    SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+    SESSION_COOKIE_PATH = CSRF_COOKIE_PATH = '/admin/'
+    SESSION_COOKIE_SECURE = CSRF_COOKIE_SECURE = True
+    # The admin's middleware checks only look at MIDDLEWARE
+    SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
+# asgi.py switches this to healthcare_backend.asgi_urls
+ROOT_URLCONF = config('ROOT_URLCONF', default='healthcare_backend.urls')
 
 TEMPLATES = [
     {
@@ -77,14 +115,68 @@ WSGI_APPLICATION = 'healthcare_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# DB_POOL: requests check connections out of a bounded per-process pool
+# (core.db) instead of opening a new one each time
+DB_POOL = config('DB_POOL', default=True, cast=bool)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db' if DB_POOL else 'django.db.backends.postgresql',
         'NAME': config('DB_NAME'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
+        # Pooled connections run SELECT 1 before they're reused
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+if DB_POOL:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            # Seconds idle before a connection above min_size is closed
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=int),
+            # Seconds to wait for a free connection before failing
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        },
+    }
+
+# Read replicas (core.replicas): DB_REPLICA_HOSTS=host[:port],... adds the
+# aliases replica1, replica2, ... with the primary's database and credentials
+DB_REPLICA_HOSTS = config('DB_REPLICA_HOSTS', default='', cast=Csv())
+REPLICA_DATABASES = []
+for index, replica in enumerate(DB_REPLICA_HOSTS, start=1):
+    host, _, port = replica.partition(':')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        # No test database of its own; run the test suite without replicas
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# Seconds a writer's reads stay on the primary, so they see their writes
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+# Replicas further behind than this (seconds) are skipped
+REPLICA_MAX_LAG = config('REPLICA_MAX_LAG', default=5, cast=float)
+REPLICA_LAG_CHECK_INTERVAL = config('REPLICA_LAG_CHECK_INTERVAL', default=5, cast=float)
+# Pins have to reach every worker: use a shared cache with several workers
+REPLICA_PIN_CACHE_ALIAS = config('REPLICA_PIN_CACHE_ALIAS', default='default')
+
+
+# Cache
+# Local memory by default; CACHE_BACKEND/CACHE_LOCATION switch it, e.g. to
+# django.core.cache.backends.filebased.FileBasedCache so gunicorn workers share it
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='healthcare-backend'),
     }
 }
 
@@ -109,18 +201,67 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Threads used by the async auth views for PBKDF2 (default: CPU count)
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=0, cast=int)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
+if PRODUCTION:
+    # No browsable API, so API requests never load a template
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = ('rest_framework.renderers.JSONRenderer',)
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Embed a password hash in tokens so a password change revokes them
+    'CHECK_REVOKE_TOKEN': True,
+}
+
+# Seconds an authenticated user row is reused before re-reading it
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30, cast=int)
+
+# Request instrumentation (core.middleware.QueryInstrumentationMiddleware)
+SERVER_TIMING = config('SERVER_TIMING', default=True, cast=bool)
+QUERY_BUDGET = config('QUERY_BUDGET', default=20, cast=int)  # 0 disables the check
+N_PLUS_ONE_THRESHOLD = config('N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+
+# Idempotency-Key support on POST endpoints (core.idempotency)
+# core.idempotency.CacheIdempotencyStore needs a cache shared by all workers
+IDEMPOTENCY_STORE = config('IDEMPOTENCY_STORE', default='core.idempotency.DatabaseIdempotencyStore')
+IDEMPOTENCY_TTL = config('IDEMPOTENCY_TTL', default=86400, cast=int)  # seconds a response is replayed
+IDEMPOTENCY_MAX_ENTRIES = config('IDEMPOTENCY_MAX_ENTRIES', default=100_000, cast=int)
+IDEMPOTENCY_CACHE_ALIAS = config('IDEMPOTENCY_CACHE_ALIAS', default='default')
+
+# Bearer token required by /metrics. Only development may leave it empty
+# (open to anyone who can reach the server)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+if PRODUCTION and not METRICS_TOKEN:
+    raise ImproperlyConfigured('METRICS_TOKEN must be set in the production profile')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # One JSON line per request at INFO; WARNING (the default outside
+        # production) only logs flagged requests
+        'core.requests': {
+            'handlers': ['console'],
+            'level': config('REQUEST_LOG_LEVEL', default='INFO' if PRODUCTION else 'WARNING'),
+            'propagate': False,
+        },
+    },
 }
 
 
@@ -14,13 +14,23 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
+from core.middleware import apply_middleware
+from core.views import metrics
+
+admin_urls = admin.site.urls
+# Production profile: the session stack runs for the admin only
+admin_only = [name for name in settings.ADMIN_MIDDLEWARE if name not in settings.MIDDLEWARE]
+if admin_only:
+    admin_urls = apply_middleware(admin_urls, admin_only)
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    path('admin/', admin_urls),
     path('api/auth/', include('accounts.urls')),
     path('api/patients/', include('patients.urls')),
     path('api/doctors/', include('doctors.urls')),
     path('api/mappings/', include('mappings.urls')),
+    path('metrics', metrics),
 ]
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class MappingsConfig(AppConfig):
     name = 'mappings'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,64 @@
+from django.core.exceptions import ValidationError
+from rest_framework import status
+from core.async_views import AsyncViewSetView, apaginate
+from patients.models import Patient
+from .views import PatientDoctorMappingViewSet
+
+
+class MappingsByPatientView(AsyncViewSetView):
+    """
+    GET /api/mappings/patient/{patient_id}/
+    """
+    viewset_class = PatientDoctorMappingViewSet
+    basename = 'mapping'
+    action = 'by_patient'
+
+    async def read(self, viewset, request, patient_id):
+        # Check if patient exists and belongs to current user
+        try:
+            patient = await Patient.objects.only('id', 'name').aget(
+                id=patient_id,
+                created_by=request.user
+            )
+        except (Patient.DoesNotExist, ValueError, ValidationError):
+            return self.render({
+                'error': 'Patient not found or you do not have permission'
+            }, status.HTTP_404_NOT_FOUND)
+
+        mappings = viewset.get_queryset().filter(patient_id=patient_id)
+        projection = viewset.get_projection()
+        page, paginator = await apaginate(viewset, projection.project(mappings))
+        doctors, included = viewset.normalize_rows(projection.represent_many(page))
+
+        return self.render({
+            'patient': {
+                'id': patient.id,
+                'name': patient.name
+            },
+            'doctors': doctors,
+            **await paginator.aget_count(mappings),
+            **paginator.get_page_links(),
+            **included
+        })
+
+
+class ActiveMappingsView(AsyncViewSetView):
+    """
+    GET /api/mappings/active/
+    """
+    viewset_class = PatientDoctorMappingViewSet
+    basename = 'mapping'
+    action = 'active'
+
+    async def read(self, viewset, request):
+        active_mappings = viewset.get_queryset().filter(is_active=True)
+        projection = viewset.get_projection()
+        page, paginator = await apaginate(viewset, projection.project(active_mappings))
+        mappings, included = viewset.normalize_rows(projection.represent_many(page))
+
+        return self.render({
+            'mappings': mappings,
+            **await paginator.aget_count(active_mappings),
+            **paginator.get_page_links(),
+            **included
+        })
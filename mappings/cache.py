@@ -0,0 +1,10 @@
+from core.cache import ResponseCache
+from doctors.cache import doctor_directory_cache
+
+# Mapping responses embed doctors, so any doctor write (including the
+# cascading delete of its mappings) also makes them stale
+mapping_cache = ResponseCache(
+    'mappings',
+    per_user=True,
+    depends_on=[doctor_directory_cache]
+)
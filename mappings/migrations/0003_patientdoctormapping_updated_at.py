@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mappings', '0002_patientdoctormapping_delete_patienddoctormapping'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patientdoctormapping',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Last change, used for ETag/Last-Modified'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:19
+
+from django.db import migrations, models
+import core.operations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('mappings', '0003_patientdoctormapping_updated_at'),
+    ]
+
+    operations = [
+        core.operations.AddIndexConcurrently(
+            model_name='patientdoctormapping',
+            index=models.Index(fields=['patient', '-assigned_date', '-id'], name='mapping_patient_assigned_idx'),
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='patientdoctormapping',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['patient', '-assigned_date', '-id'], name='mapping_active_patient_idx'),
+        ),
+    ]
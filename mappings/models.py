@@ -1,7 +1,83 @@
-from django.db import models
+from django.db import models, router
+from django.db.models import Subquery
+from django.utils import timezone
 from patients.models import Patient
 from doctors.models import Doctor
 
+class PatientDoctorMappingQuerySet(models.QuerySet):
+    def owned_by(self, user):
+        """
+        Mappings whose patient was created by `user` (joined, no subquery)
+        """
+        return self.filter(patient__created_by=user)
+
+    # Bulk operations skip model signals, so they invalidate the owners'
+    # response caches themselves
+
+    def update(self, **kwargs):
+        # auto_now is not applied by update(); keep the change marker moving
+        kwargs.setdefault('updated_at', timezone.now())
+        owners = set(self.values_list('patient__created_by_id', flat=True).distinct())
+        rows = super().update(**kwargs)
+        self._invalidate_owners(owners)
+        return rows
+
+    def delete(self):
+        # The post_delete receiver skips rows deleted from a queryset
+        owners = set(self.values_list('patient__created_by_id', flat=True).distinct())
+        result = super().delete()
+        self._invalidate_owners(owners)
+        return result
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._invalidate_patient_owners(obj.patient_id for obj in objs)
+        return objs
+
+    def bulk_update(self, objs, *args, **kwargs):
+        rows = super().bulk_update(objs, *args, **kwargs)
+        self._invalidate_patient_owners(obj.patient_id for obj in objs)
+        return rows
+
+    def _invalidate_patient_owners(self, patient_ids):
+        patient_ids = set(patient_ids)
+        if patient_ids:
+            self._invalidate_owners(
+                Patient.objects.filter(id__in=patient_ids)
+                .values_list('created_by_id', flat=True)
+                .distinct()
+            )
+
+    def _invalidate_owners(self, owners):
+        from .cache import mapping_cache
+        mapping_cache.invalidate_users(owners)
+
+    def load_pair(self, patient_id, doctor_id):
+        """
+        Fetch a patient and a doctor, in one query when the patient exists
+
+        The doctor's columns are scalar subqueries on the patient row.
+        Returns (patient, doctor); either is None if the row does not
+        exist. Used on the write path, so it reads from the write database.
+        """
+        db = router.db_for_write(self.model)
+        doctors = Doctor.objects.using(db).filter(pk=doctor_id)
+        columns = {
+            f'pair_doctor_{field.attname}': Subquery(doctors.values(field.attname))
+            for field in Doctor._meta.concrete_fields
+        }
+        patient = Patient.objects.using(db).filter(pk=patient_id).annotate(**columns).first()
+        if patient is None:
+            # Still say whether the doctor exists
+            return None, doctors.first()
+
+        values = [patient.__dict__.pop(name) for name in columns]
+        if values[0] is None:
+            return patient, None
+        attnames = [field.attname for field in Doctor._meta.concrete_fields]
+        return patient, Doctor.from_db(db, attnames, values)
+
+
 # Create your models here.
 class PatientDoctorMapping(models.Model):
     patient = models.ForeignKey(
@@ -21,10 +97,22 @@ class PatientDoctorMapping(models.Model):
     assigned_date = models.DateTimeField(auto_now_add=True, help_text = "When assignment was made")
     notes = models.TextField(blank=True, null=True, help_text = "Special notes about this assignment")
     is_active = models.BooleanField(default=True, help_text = "Is this assignment currently active")
+    updated_at = models.DateTimeField(auto_now=True, help_text = "Last change, used for ETag/Last-Modified")
+
+    objects = PatientDoctorMappingQuerySet.as_manager()
 
     class Meta:
         unique_together = ('patient', 'doctor')
         ordering = ['-assigned_date']
+        indexes = [
+            # by_patient and active pages, newest assignment first (keyset order)
+            models.Index(fields=['patient', '-assigned_date', '-id'], name='mapping_patient_assigned_idx'),
+            models.Index(
+                fields=['patient', '-assigned_date', '-id'],
+                condition=models.Q(is_active=True),
+                name='mapping_active_patient_idx'
+            ),
+        ]
         verbose_name = 'Patient-Doctor Mapping'
         verbose_name_plural = 'Patient-Doctor Mappings'
 
@@ -1,9 +1,20 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from .models import PatientDoctorMapping
 from patients.serializers import PatientSerializer
 from doctors.serializers import DoctorSerializer
+from core.instrumentation import TimedRepresentationMixin
 
-class PatientDoctorMappingSerializer(serializers.ModelSerializer):
+# AutoField's range on PostgreSQL; larger ids can't exist and would make
+# the lookups fail instead of reporting a missing row
+MAX_ID = 2**31 - 1
+
+
+def id_field(**kwargs):
+    return serializers.IntegerField(min_value=1, max_value=MAX_ID, **kwargs)
+
+
+class PatientDoctorMappingSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for Patient-Doctor Mapping
     """
@@ -28,90 +39,68 @@ class PatientDoctorMappingCreateSerializer(serializers.ModelSerializer):
     Serializer for creating mappings
     """
 
-    patient_id = serializers.IntegerField(write_only=True)
-    doctor_id = serializers.IntegerField(write_only = True)
+    patient_id = id_field(write_only=True)
+    doctor_id = id_field(write_only=True)
 
     class Meta:
         model = PatientDoctorMapping
         fields = ['id', 'patient_id', 'doctor_id', 'notes', 'is_active']
         read_only_fields = ['id']
 
-    def validate_patient_id(self, value):
-        """
-        Check if patient exists
-        """
-        from patients.models import Patient
-        
-        if not Patient.objects.filter(id=value).exists():
-            raise serializers.ValidationError(f"Patient with ID {value} does not exist")
-
-        return value
-
-    def validate_doctor_id(self, value):
-        """
-        Check if doctor exists
-        """
-        from doctors.models import Doctor
-
-        if not Doctor.objects.filter(id=value).exists():
-            raise serializers.ValidationError(f"Patient with ID {value} does not exist")
-        return value
-
     def validate(self, attrs):
         """
         Object-level validation
-        """
-        from patients.models import Patient
-        from doctors.models import Doctor
 
+        Patient ownership and doctor existence are checked with one
+        lookup (see load_pair); duplicates are left to the unique_together
+        constraint at insert time (see create()).
+        """
         patient_id = attrs.get('patient_id')
         doctor_id = attrs.get('doctor_id')
-
-        # Check if patient belongs to current user
-        patient = Patient.objects.filter(id=patient_id).first()
         request = self.context.get('request')
 
-        if patient and request and patient.created_by != request.user:
-            raise serializers.ValidationError({
-                "patient_id": "You can only assign your own patients to doctors"
-            })
+        patient, doctor = PatientDoctorMapping.objects.load_pair(patient_id, doctor_id)
 
-        # Check if mapping already exists
-        if PatientDoctorMapping.objects.filter(
-            patient_id=patient_id,
-            doctor_id=doctor_id
-        ).exists():
-            raise serializers.ValidationError(
-                "This patient is already assigned to this doctor"
-            )
+        errors = {}
+        if patient is None:
+            errors['patient_id'] = f"Patient with ID {patient_id} does not exist"
+        elif request and patient.created_by_id != request.user.id:
+            errors['patient_id'] = "You can only assign your own patients to doctors"
+        if doctor is None:
+            errors['doctor_id'] = f"Doctor with ID {doctor_id} does not exist"
+        if errors:
+            raise serializers.ValidationError(errors)
 
+        if request:
+            # Ownership was just checked, so the response needs no user query
+            patient.created_by = request.user
+
+        attrs['patient'] = patient
+        attrs['doctor'] = doctor
         return attrs
 
     def create(self, validated_data):
         """
-        Create mapping with patient and doctor objects
+        Insert the mapping, letting the unique constraint reject duplicates
+
+        Two concurrent requests can both pass validation; only one insert
+        wins and the other gets the same 400 as a sequential duplicate.
         """
-        from patients.models import Patient
-        from doctors.models import Doctor
-        
-        # Get IDs
-        patient_id = validated_data.pop('patient_id')
-        doctor_id = validated_data.pop('doctor_id')
-        
-        # Get actual objects
-        patient = Patient.objects.get(id=patient_id)
-        doctor = Doctor.objects.get(id=doctor_id)
-        
-        # Create mapping
-        mapping = PatientDoctorMapping.objects.create(
-            patient=patient,
-            doctor=doctor,
-            **validated_data
-        )
-        
+        validated_data.pop('patient_id')
+        validated_data.pop('doctor_id')
+
+        mapping = PatientDoctorMapping(**validated_data)
+        try:
+            with transaction.atomic():
+                mapping.save(force_insert=True)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                'non_field_errors': ["This patient is already assigned to this doctor"]
+            })
+
         return mapping
 
-class PatientDoctorMappingListSerializer(serializers.ModelSerializer):
+class PatientDoctorMappingListSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Simplified serializer for listing mappings
     """
@@ -139,3 +128,202 @@ class PatientDoctorMappingListSerializer(serializers.ModelSerializer):
         ]
 
 
+class AssignmentSerializer(serializers.Serializer):
+    """
+    One (patient, doctor) pair inside a bulk assignment
+    """
+    patient_id = id_field()
+    doctor_id = id_field()
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    is_active = serializers.BooleanField(required=False, default=True)
+
+
+class PatientDoctorMappingBulkCreateSerializer(serializers.Serializer):
+    """
+    Serializer for assigning many doctors to many patients at once
+
+    Accepts either an explicit `assignments` list or `patient_ids` x
+    `doctor_ids` (cross product). Existence, ownership and existing pairs
+    are checked with one IN query per table, then new rows go in with a
+    single bulk_create. A pair inserted concurrently by another request
+    fails the whole batch, unless `ignore_conflicts` is set; then it is
+    reported under `existing`.
+    """
+    MAX_PAIRS = 1000
+
+    assignments = AssignmentSerializer(many=True, required=False, max_length=MAX_PAIRS)
+    patient_ids = serializers.ListField(
+        child=id_field(), required=False, max_length=MAX_PAIRS
+    )
+    doctor_ids = serializers.ListField(
+        child=id_field(), required=False, max_length=MAX_PAIRS
+    )
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    ignore_conflicts = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        """
+        Expand the request into a flat list of pairs
+        """
+        assignments = attrs.get('assignments')
+        patient_ids = attrs.get('patient_ids')
+        doctor_ids = attrs.get('doctor_ids')
+
+        if assignments is not None:
+            if patient_ids is not None or doctor_ids is not None:
+                raise serializers.ValidationError(
+                    "Provide either assignments or patient_ids/doctor_ids, not both"
+                )
+            pairs = assignments
+        elif patient_ids and doctor_ids:
+            # Checked before the cross product is built
+            if len(patient_ids) * len(doctor_ids) > self.MAX_PAIRS:
+                raise serializers.ValidationError(
+                    f"At most {self.MAX_PAIRS} assignments per request"
+                )
+            pairs = [
+                {
+                    'patient_id': patient_id,
+                    'doctor_id': doctor_id,
+                    'notes': attrs.get('notes'),
+                    'is_active': True,
+                }
+                for patient_id in patient_ids
+                for doctor_id in doctor_ids
+            ]
+        else:
+            raise serializers.ValidationError(
+                "Provide assignments, or both patient_ids and doctor_ids"
+            )
+
+        if not pairs:
+            raise serializers.ValidationError("Nothing to assign")
+        if len(pairs) > self.MAX_PAIRS:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_PAIRS} assignments per request"
+            )
+
+        attrs['pairs'] = pairs
+        return attrs
+
+    def create(self, validated_data):
+        """
+        Check all pairs set-wise and insert the new ones
+
+        Returns a summary dict rather than a model instance.
+        """
+        from patients.models import Patient
+        from doctors.models import Doctor
+
+        pairs = validated_data['pairs']
+        user = self.context['request'].user
+
+        patient_ids = {pair['patient_id'] for pair in pairs}
+        doctor_ids = {pair['doctor_id'] for pair in pairs}
+
+        owned_patients = set(
+            Patient.objects.owned_by(user)
+            .filter(id__in=patient_ids)
+            .values_list('id', flat=True)
+        )
+        existing_doctors = set(
+            Doctor.objects.filter(id__in=doctor_ids).values_list('id', flat=True)
+        )
+        # Served by the unique_together (patient, doctor) index
+        existing_pairs = set(
+            PatientDoctorMapping.objects.filter(
+                patient_id__in=owned_patients,
+                doctor_id__in=existing_doctors
+            ).values_list('patient_id', 'doctor_id')
+        )
+
+        errors = []
+        existing = []
+        new_mappings = []
+        seen = set()
+        for index, pair in enumerate(pairs):
+            key = (pair['patient_id'], pair['doctor_id'])
+            if pair['patient_id'] not in owned_patients:
+                errors.append({'index': index, 'errors': {
+                    'patient_id': f"Patient with ID {pair['patient_id']} does not exist "
+                                  "or is not one of your patients"
+                }})
+            elif pair['doctor_id'] not in existing_doctors:
+                errors.append({'index': index, 'errors': {
+                    'doctor_id': f"Doctor with ID {pair['doctor_id']} does not exist"
+                }})
+            elif key in seen:
+                errors.append({'index': index, 'errors': {
+                    'non_field_errors': 'Duplicate assignment in request'
+                }})
+            elif key in existing_pairs:
+                existing.append({'patient_id': key[0], 'doctor_id': key[1]})
+            else:
+                seen.add(key)
+                new_mappings.append(PatientDoctorMapping(
+                    patient_id=key[0],
+                    doctor_id=key[1],
+                    notes=pair.get('notes'),
+                    is_active=pair.get('is_active', True)
+                ))
+
+        ignore_conflicts = validated_data['ignore_conflicts']
+        try:
+            with transaction.atomic():
+                created = PatientDoctorMapping.objects.bulk_create(
+                    new_mappings,
+                    batch_size=500,
+                    ignore_conflicts=ignore_conflicts
+                )
+        except IntegrityError:
+            # A concurrent request inserted one of the pairs first
+            raise serializers.ValidationError(
+                "One or more of these patients were assigned to the doctor concurrently"
+            )
+
+        if ignore_conflicts:
+            created, raced = self.find_inserted(new_mappings)
+            existing.extend(raced)
+
+        return {
+            'created': [
+                {
+                    'id': mapping.id,
+                    'patient_id': mapping.patient_id,
+                    'doctor_id': mapping.doctor_id,
+                }
+                for mapping in created
+            ],
+            'existing': existing,
+            'errors': errors,
+        }
+
+    def find_inserted(self, mappings):
+        """
+        Split `mappings` after an insert with ignore_conflicts into the
+        ones this request inserted (with their ids) and the pairs another
+        request inserted first
+
+        bulk_create returns no ids and no count in that mode, so the rows
+        are read back; ours are the ones with the assigned_date we set.
+        """
+        if not mappings:
+            return [], []
+        stored = {
+            (patient_id, doctor_id): (mapping_id, assigned_date)
+            for patient_id, doctor_id, mapping_id, assigned_date in
+            PatientDoctorMapping.objects.filter(
+                patient_id__in={mapping.patient_id for mapping in mappings},
+                doctor_id__in={mapping.doctor_id for mapping in mappings},
+            ).values_list('patient_id', 'doctor_id', 'id', 'assigned_date')
+        }
+
+        created, raced = [], []
+        for mapping in mappings:
+            mapping_id, assigned_date = stored.get((mapping.patient_id, mapping.doctor_id), (None, None))
+            if mapping_id is not None and assigned_date == mapping.assigned_date:
+                mapping.id = mapping_id
+                created.append(mapping)
+            else:
+                raced.append({'patient_id': mapping.patient_id, 'doctor_id': mapping.doctor_id})
+        return created, raced
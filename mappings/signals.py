@@ -0,0 +1,27 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from doctors.models import Doctor
+from patients.models import Patient
+from .cache import mapping_cache
+from .models import PatientDoctorMapping
+
+
+@receiver(post_save, sender=PatientDoctorMapping)
+def invalidate_on_save(sender, instance, **kwargs):
+    mapping_cache.invalidate(instance.patient.created_by_id)
+
+
+@receiver(post_delete, sender=PatientDoctorMapping)
+def invalidate_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Only a delete of this one mapping looks up its owner. Queryset
+    deletes invalidate their owners once (PatientDoctorMappingQuerySet.delete)
+    and cascades from a patient or doctor are covered by that model's
+    own invalidation.
+    """
+    if origin is not instance:
+        model = origin.model if isinstance(origin, QuerySet) else type(origin)
+        if issubclass(model, (PatientDoctorMapping, Patient, Doctor)):
+            return
+    mapping_cache.invalidate(instance.patient.created_by_id)
@@ -1,3 +1,427 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import User
+from patients.models import Patient
+from doctors.models import Doctor
+from .models import PatientDoctorMapping
+from .serializers import PatientDoctorMappingBulkCreateSerializer
 
-# Create your tests here.
+
+class MappingQueryCountTests(TestCase):
+    """
+    Mapping reads must not issue one query per row
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            username='owner@example.com',
+            name='Owner',
+            password='s3cure-pass-123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = self.make_patient('Base Patient')
+
+    def make_patient(self, name):
+        return Patient.objects.create(
+            name=name,
+            age=40,
+            gender='F',
+            contact='9876543210',
+            address='1 Main Street',
+            created_by=self.user
+        )
+
+    def add_mappings(self, count):
+        start = Doctor.objects.count()
+        for i in range(start, start + count):
+            doctor = Doctor.objects.create(
+                name=f'Doctor {i}',
+                specialization='GENERAL',
+                contact='9876543210',
+                email=f'doctor{i}@example.com',
+                experience_years=5,
+                qualification='MBBS'
+            )
+            PatientDoctorMapping.objects.create(patient=self.patient, doctor=doctor)
+            PatientDoctorMapping.objects.create(
+                patient=self.make_patient(f'Patient {i}'),
+                doctor=doctor
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def assertConstantQueries(self, url):
+        self.add_mappings(1)
+        small = self.count_queries(url)
+        self.add_mappings(20)
+        self.assertEqual(self.count_queries(url), small)
+
+    def test_list(self):
+        self.assertConstantQueries('/api/mappings/')
+
+    def test_active(self):
+        self.assertConstantQueries('/api/mappings/active/')
+
+    def test_by_patient(self):
+        self.assertConstantQueries(f'/api/mappings/patient/{self.patient.id}/')
+
+    def test_retrieve_and_destroy(self):
+        self.add_mappings(1)
+        mapping = PatientDoctorMapping.objects.first()
+        with self.assertNumQueries(1):
+            self.client.get(f'/api/mappings/{mapping.id}/')
+        # Joined lookup + delete, the names in the message come from the lookup
+        with self.assertNumQueries(2):
+            response = self.client.delete(f'/api/mappings/{mapping.id}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_is_scoped_to_owner(self):
+        self.add_mappings(2)
+        other = User.objects.create_user(
+            email='other@example.com',
+            username='other@example.com',
+            name='Other',
+            password='s3cure-pass-123'
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get('/api/mappings/').json()['results'], [])
+
+
+class MappingCreateTests(TestCase):
+    """
+    Single mapping create: one lookup, one insert, constraint-based duplicates
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            username='owner@example.com',
+            name='Owner',
+            password='s3cure-pass-123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = Patient.objects.create(
+            name='Patient',
+            age=40,
+            gender='F',
+            contact='9876543210',
+            address='1 Main Street',
+            created_by=self.user
+        )
+        self.doctor = Doctor.objects.create(
+            name='Doctor',
+            specialization='GENERAL',
+            contact='9876543210',
+            email='doctor@example.com',
+            experience_years=5,
+            qualification='MBBS'
+        )
+
+    def post(self, patient_id, doctor_id):
+        return self.client.post('/api/mappings/', {
+            'patient_id': patient_id,
+            'doctor_id': doctor_id
+        }, format='json')
+
+    def test_create_uses_two_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(self.patient.id, self.doctor.id)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['mapping']['patient']['created_by']['id'], self.user.id)
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 2)
+
+    def test_duplicate_is_rejected_by_constraint(self):
+        self.post(self.patient.id, self.doctor.id)
+        response = self.post(self.patient.id, self.doctor.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()['non_field_errors'],
+            ['This patient is already assigned to this doctor']
+        )
+        self.assertEqual(PatientDoctorMapping.objects.count(), 1)
+
+    def test_missing_and_foreign_rows(self):
+        other = User.objects.create_user(
+            email='other@example.com',
+            username='other@example.com',
+            name='Other',
+            password='s3cure-pass-123'
+        )
+        self.client.force_authenticate(other)
+        response = self.post(self.patient.id, 9999)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'patient_id', 'doctor_id'})
+
+    def test_out_of_range_ids(self):
+        for patient_id, doctor_id in ((2**64, self.doctor.id), (self.patient.id, 2**31), (0, -1)):
+            with self.subTest(patient_id=patient_id, doctor_id=doctor_id):
+                response = self.post(patient_id, doctor_id)
+                self.assertEqual(response.status_code, 400)
+        # The lookup itself reports them as missing rather than failing
+        self.assertEqual(PatientDoctorMapping.objects.load_pair(2**64, self.doctor.id), (None, self.doctor))
+        self.assertEqual(PatientDoctorMapping.objects.load_pair(self.patient.id, 2**64), (self.patient, None))
+        response = self.client.post('/api/mappings/bulk/', {
+            'patient_ids': [self.patient.id], 'doctor_ids': [2**64]
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PatientDoctorMapping.objects.exists())
+
+
+class MappingBulkAssignTests(TestCase):
+    """
+    POST /api/mappings/bulk/: request size limits and conflict reporting
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com',
+            username='owner@example.com',
+            name='Owner',
+            password='s3cure-pass-123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patients = [
+            Patient.objects.create(
+                name=f'Patient {i}', age=40, gender='F', contact='9876543210',
+                address='1 Main Street', created_by=self.user
+            )
+            for i in range(2)
+        ]
+        self.doctors = [
+            Doctor.objects.create(
+                name=f'Doctor {i}', specialization='GENERAL', contact='9876543210',
+                email=f'doctor{i}@example.com', experience_years=5, qualification='MBBS'
+            )
+            for i in range(2)
+        ]
+
+    def post(self, data):
+        return self.client.post('/api/mappings/bulk/', data, format='json')
+
+    def test_oversized_requests_are_rejected_before_expanding(self):
+        limit = PatientDoctorMappingBulkCreateSerializer.MAX_PAIRS
+        too_many = list(range(1, limit + 2))
+        response = self.post({'patient_ids': too_many, 'doctor_ids': [1]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('patient_ids', response.json())
+
+        response = self.post({'assignments': [{'patient_id': 1, 'doctor_id': 1}] * (limit + 1)})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('assignments', response.json())
+
+        # Each list is within the limit, their product is not
+        response = self.post({'patient_ids': list(range(1, 101)), 'doctor_ids': list(range(1, 12))})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()['non_field_errors'], [f'At most {limit} assignments per request']
+        )
+
+    def test_created_rows_have_ids(self):
+        PatientDoctorMapping.objects.create(patient=self.patients[0], doctor=self.doctors[0])
+        for ignore_conflicts in (False, True):
+            PatientDoctorMapping.objects.exclude(doctor=self.doctors[0], patient=self.patients[0]).delete()
+            response = self.post({
+                'patient_ids': [patient.id for patient in self.patients],
+                'doctor_ids': [doctor.id for doctor in self.doctors],
+                'ignore_conflicts': ignore_conflicts,
+            })
+            self.assertEqual(response.status_code, 201)
+            body = response.json()
+            self.assertEqual(body['message'], '3 assignments created successfully')
+            self.assertEqual(
+                {entry['id'] for entry in body['created']},
+                set(PatientDoctorMapping.objects.exclude(
+                    doctor=self.doctors[0], patient=self.patients[0]
+                ).values_list('id', flat=True))
+            )
+            self.assertEqual(
+                body['existing'], [{'patient_id': self.patients[0].id, 'doctor_id': self.doctors[0].id}]
+            )
+
+    def test_pairs_inserted_concurrently_are_reported_as_existing(self):
+        # What an ignore_conflicts insert leaves behind when another
+        # request won the race for one pair
+        ours = PatientDoctorMapping.objects.create(patient=self.patients[0], doctor=self.doctors[0])
+        theirs = PatientDoctorMapping.objects.create(patient=self.patients[1], doctor=self.doctors[0])
+        attempted = [
+            PatientDoctorMapping(patient_id=ours.patient_id, doctor_id=ours.doctor_id,
+                                 assigned_date=ours.assigned_date),
+            PatientDoctorMapping(patient_id=theirs.patient_id, doctor_id=theirs.doctor_id,
+                                 assigned_date=timezone.now()),
+        ]
+
+        created, raced = PatientDoctorMappingBulkCreateSerializer().find_inserted(attempted)
+        self.assertEqual([mapping.id for mapping in created], [ours.id])
+        self.assertEqual(raced, [{'patient_id': theirs.patient_id, 'doctor_id': theirs.doctor_id}])
+
+
+
+class MappingConditionalTests(TestCase):
+    """
+    Mapping validators follow the mapping and the patient/doctor it embeds
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password=None
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = Patient.objects.create(
+            name='Patient', age=40, gender='F', contact='9876543210',
+            address='1 Main Street', created_by=self.user
+        )
+        self.doctor = Doctor.objects.create(
+            name='Doctor', specialization='GENERAL', contact='9876543210',
+            email='doctor@example.com', experience_years=5, qualification='MBBS'
+        )
+        self.mapping = PatientDoctorMapping.objects.create(patient=self.patient, doctor=self.doctor)
+
+    def assertChanged(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response['ETag']
+
+    def test_not_modified_carries_validators(self):
+        url = f'/api/mappings/patient/{self.patient.id}/'
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_embedded_changes_move_the_etag(self):
+        url = f'/api/mappings/{self.mapping.id}/'
+        etag = self.client.get(url)['ETag']
+
+        # The mapping's own change marker
+        self.client.patch(url, {'notes': 'Follow up'}, format='json')
+        self.mapping.refresh_from_db()
+        self.assertGreater(self.mapping.updated_at, self.mapping.assigned_date)
+        etag = self.assertChanged(url, etag)
+
+        # The doctor it embeds
+        self.client.patch(f'/api/doctors/{self.doctor.id}/', {'available': False}, format='json')
+        etag = self.assertChanged(url, etag)
+
+        list_etag = self.client.get('/api/mappings/active/')['ETag']
+        self.client.patch(f'/api/patients/{self.patient.id}/', {'age': 41}, format='json')
+        self.assertChanged('/api/mappings/active/', list_etag)
+
+    def test_stale_if_match_is_rejected(self):
+        url = f'/api/mappings/{self.mapping.id}/'
+        etag = self.client.get(url)['ETag']
+        self.client.patch(url, {'notes': 'First'}, format='json', HTTP_IF_MATCH=etag)
+        response = self.client.patch(url, {'notes': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.mapping.refresh_from_db()
+        self.assertEqual(self.mapping.notes, 'First')
+
+
+class MappingCacheTests(TestCase):
+    """
+    Cached mapping reads follow their owner's writes and any doctor write
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.doctor = Doctor.objects.create(
+            name='Doctor', specialization='GENERAL', contact='9876543210',
+            email='doctor@example.com', experience_years=5, qualification='MBBS'
+        )
+        self.owners = [self.make_owner(f'owner{i}@example.com') for i in range(2)]
+        for _, client, patient in self.owners:
+            self.assertEqual(client.get(self.url(patient))['X-Cache'], 'MISS')
+
+    def make_owner(self, email):
+        user = User.objects.create_user(email=email, username=email, name='Owner', password=None)
+        patient = Patient.objects.create(
+            name='Patient', age=40, gender='F', contact='9876543210',
+            address='1 Main Street', created_by=user
+        )
+        PatientDoctorMapping.objects.create(patient=patient, doctor=self.doctor)
+        client = APIClient()
+        client.force_authenticate(user)
+        return user, client, patient
+
+    def url(self, patient):
+        return f'/api/mappings/patient/{patient.id}/'
+
+    def assertCached(self, owner, hit):
+        _, client, patient = owner
+        self.assertEqual(client.get(self.url(patient))['X-Cache'], 'HIT' if hit else 'MISS')
+
+    def test_doctor_delete_cascade_invalidates_every_owner(self):
+        client = self.owners[0][1]
+        self.assertEqual(client.delete(f'/api/doctors/{self.doctor.id}/').status_code, 200)
+        for _, client, patient in self.owners:
+            response = client.get(self.url(patient))
+            self.assertEqual(response['X-Cache'], 'MISS')
+            self.assertEqual(response.data['doctors'], [])
+
+    def test_write_invalidates_only_the_owner(self):
+        doctor = Doctor.objects.create(
+            name='Other Doctor', specialization='GENERAL', contact='9876543210',
+            email='other-doctor@example.com', experience_years=5, qualification='MBBS'
+        )
+        # The doctor write moved every owner's keys; warm them again
+        for owner in self.owners:
+            self.assertCached(owner, hit=False)
+
+        _, client, patient = self.owners[0]
+        response = client.post('/api/mappings/', {'patient_id': patient.id, 'doctor_id': doctor.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertCached(self.owners[0], hit=False)
+        self.assertCached(self.owners[1], hit=True)
+
+    def test_queryset_delete_looks_up_the_owners_once(self):
+        user, _, _ = self.owners[0]
+        for i in range(3):
+            patient = Patient.objects.create(
+                name=f'Patient {i}', age=40, gender='F', contact='9876543210',
+                address='1 Main Street', created_by=user
+            )
+            PatientDoctorMapping.objects.create(patient=patient, doctor=self.doctor)
+        self.assertCached(self.owners[0], hit=False)
+
+        with CaptureQueriesContext(connection) as queries:
+            deleted, _ = PatientDoctorMapping.objects.filter(patient__created_by=user).delete()
+        self.assertEqual(deleted, 4)
+        # No per-row patient lookup
+        self.assertEqual([q for q in queries if f'FROM "{Patient._meta.db_table}"' in q['sql']], [])
+        self.assertCached(self.owners[0], hit=False)
+        self.assertCached(self.owners[1], hit=True)
+
+    def test_bulk_operations_invalidate_the_owners(self):
+        _, _, patient = self.owners[0]
+        PatientDoctorMapping.objects.filter(patient=patient).update(is_active=False)
+        self.assertCached(self.owners[0], hit=False)
+        self.assertCached(self.owners[1], hit=True)
+
+        # A patient delete cascades to its mappings
+        _, client, _ = self.owners[0]
+        client.get('/api/mappings/')
+        self.assertEqual(client.get('/api/mappings/')['X-Cache'], 'HIT')
+        patient.delete()
+        response = client.get('/api/mappings/')
+        self.assertEqual((response['X-Cache'], response.data['results']), ('MISS', []))
+        self.assertCached(self.owners[1], hit=True)
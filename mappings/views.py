@@ -3,34 +3,67 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from .models import PatientDoctorMapping
+from .cache import mapping_cache
 from .serializers import (
     PatientDoctorMappingSerializer,
     PatientDoctorMappingCreateSerializer,
-    PatientDoctorMappingListSerializer
+    PatientDoctorMappingListSerializer,
+    PatientDoctorMappingBulkCreateSerializer
 )
 from patients.models import Patient
+from core.cache import cache_response
+from core.conditional import ConditionalRequestMixin, conditional_response
+from core.export import ExportMixin
+from core.idempotency import idempotent
+from core.mixins import ActionQuerysetMixin
+from core.nested import IncludedMixin
+from core.projection import ProjectionMixin
+from core.replicas import ReplicaReadMixin
 
-class PatientDoctorMappingViewSet(viewsets.ModelViewSet):
+class PatientDoctorMappingViewSet(ReplicaReadMixin, ConditionalRequestMixin, ActionQuerysetMixin, ExportMixin, IncludedMixin, ProjectionMixin, viewsets.ModelViewSet):
     """
     ViewSet for Patient-Doctor Mapping CRUD operations
     """
     
+    queryset = PatientDoctorMapping.objects.all()
     permission_classes = [IsAuthenticated]
+    max_page_size = 100  # nested patient/doctor payloads are large
+
+    # Relations each action serializes, loaded in the same query
+    related_by_action = {
+        'list': ('patient', 'doctor'),
+        'retrieve': ('patient__created_by', 'doctor'),
+        'by_patient': ('patient__created_by', 'doctor'),
+        'active': ('patient__created_by', 'doctor'),
+        'update': ('patient__created_by', 'doctor'),
+        'partial_update': ('patient__created_by', 'doctor'),
+        'destroy': ('patient', 'doctor'),
+    }
+    only_by_action = {
+        'list': (
+            'id', 'assigned_date', 'is_active',
+            'patient__name', 'doctor__name', 'doctor__specialization',
+        ),
+        # created_by is read by the cache invalidation signal
+        'destroy': ('id', 'patient__name', 'patient__created_by', 'doctor__name'),
+    }
+    export_fields = (
+        'id', 'patient_id', 'patient__name', 'doctor_id', 'doctor__name',
+        'doctor__specialization', 'assigned_date', 'notes', 'is_active', 'updated_at',
+    )
+    # Embedded patient/doctor changes must change the mapping validators too
+    modified_fields = ('updated_at', 'patient__updated_at', 'doctor__updated_at')
+    # ?normalize=true on by_patient/active: each patient, doctor and owner once
+    included_relations = {'patient': 'patients', 'doctor': 'doctors', 'created_by': 'users'}
+    # by_patient/active embed full patients and doctors: read from values() rows
+    projected_actions = ('list', 'by_patient', 'active')
     
     def get_queryset(self):
         """
         Return mappings for patients created by current user only
 
         """
-        # Get patient IDs created by current user
-        user_patient_ids = Patient.objects.filter(
-            created_by=self.request.user
-        ).values_list('id', flat=True)
-        
-        # Filter mappings by those patient IDs
-        return PatientDoctorMapping.objects.filter(
-            patient_id__in=user_patient_ids
-        )
+        return super().get_queryset().owned_by(self.request.user)
     
     def get_serializer_class(self):
         """
@@ -40,8 +73,21 @@ class PatientDoctorMappingViewSet(viewsets.ModelViewSet):
             return PatientDoctorMappingCreateSerializer
         elif self.action == 'list':
             return PatientDoctorMappingListSerializer
+        elif self.action == 'bulk_assign':
+            return PatientDoctorMappingBulkCreateSerializer
         return PatientDoctorMappingSerializer
     
+    @conditional_response
+    @cache_response(mapping_cache)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response
+    @cache_response(mapping_cache)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
+    @idempotent
     def create(self, request, *args, **kwargs):
         """
         Create new patient-doctor mapping
@@ -60,6 +106,33 @@ class PatientDoctorMappingViewSet(viewsets.ModelViewSet):
             'message': 'Doctor assigned to patient successfully'
         }, status=status.HTTP_201_CREATED)
     
+    @action(detail=False, methods=['post'], url_path='bulk')
+    @idempotent
+    def bulk_assign(self, request):
+        """
+        Assign many doctors to many patients
+
+        URL: POST /api/mappings/bulk/
+
+        Body: {"assignments": [{"patient_id": 1, "doctor_id": 2, "notes": ""}, ...]}
+           or {"patient_ids": [1, 2], "doctor_ids": [3, 4], "notes": ""}
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+
+        created = len(result['created'])
+        if not created and result['errors']:
+            return Response({
+                **result,
+                'message': 'No doctors assigned'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            **result,
+            'message': f'{created} assignments created successfully'
+        }, status=status.HTTP_201_CREATED)
+    
     def destroy(self, request, *args, **kwargs):
         """
         Remove doctor from patient
@@ -75,6 +148,8 @@ class PatientDoctorMappingViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'], url_path='patient/(?P<patient_id>[^/.]+)')
+    @conditional_response
+    @cache_response(mapping_cache)
     def by_patient(self, request, patient_id=None):
         """
         Get all doctors assigned to a specific patient
@@ -89,25 +164,31 @@ class PatientDoctorMappingViewSet(viewsets.ModelViewSet):
                 id=patient_id,
                 created_by=request.user
             )
-        except Patient.DoesNotExist:
+        except (Patient.DoesNotExist, ValueError):
             return Response({
                 'error': 'Patient not found or you do not have permission'
             }, status=status.HTTP_404_NOT_FOUND)
         
         # Get all mappings for this patient
         mappings = self.get_queryset().filter(patient_id=patient_id)
-        serializer = PatientDoctorMappingSerializer(mappings, many=True)
+        projection = self.get_projection()
+        page = self.paginate_queryset(projection.project(mappings))
+        doctors, included = self.normalize_rows(projection.represent_many(page))
         
         return Response({
             'patient': {
                 'id': patient.id,
                 'name': patient.name
             },
-            'doctors': serializer.data,
-            'count': mappings.count()
+            'doctors': doctors,
+            **self.paginator.get_count(mappings),
+            **self.paginator.get_page_links(),
+            **included
         }, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'])
+    @conditional_response
+    @cache_response(mapping_cache)
     def active(self, request):
         """
         Get all active mappings
@@ -115,9 +196,13 @@ class PatientDoctorMappingViewSet(viewsets.ModelViewSet):
         URL: GET /api/mappings/active/
         """
         active_mappings = self.get_queryset().filter(is_active=True)
-        serializer = self.get_serializer(active_mappings, many=True)
+        projection = self.get_projection()
+        page = self.paginate_queryset(projection.project(active_mappings))
+        mappings, included = self.normalize_rows(projection.represent_many(page))
         
         return Response({
-            'mappings': serializer.data,
-            'count': active_mappings.count()
+            'mappings': mappings,
+            **self.paginator.get_count(active_mappings),
+            **self.paginator.get_page_links(),
+            **included
         }, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,38 @@
+from core.async_views import AsyncViewSetView, apaginate, aget_object
+from .views import PatientViewSet
+
+
+class PatientListView(AsyncViewSetView):
+    """
+    GET /api/patients/ on the async ORM; POST goes to PatientViewSet
+    """
+    viewset_class = PatientViewSet
+    basename = 'patient'
+    action = 'list'
+    fallback_actions = {'post': 'create'}
+
+    async def read(self, viewset, request):
+        # Same values() fast path as the sync list
+        projection = viewset.get_projection()
+        page, paginator = await apaginate(viewset, projection.project(viewset.get_queryset()))
+        rows, included = viewset.normalize_rows(projection.represent_many(page))
+        return self.render({**paginator.get_page_links(), 'results': rows, **included})
+
+
+class PatientDetailView(AsyncViewSetView):
+    """
+    GET /api/patients/{id}/ on the async ORM; writes go to PatientViewSet
+    """
+    viewset_class = PatientViewSet
+    basename = 'patient'
+    action = 'retrieve'
+    detail = True
+    fallback_actions = {
+        'put': 'update',
+        'patch': 'partial_update',
+        'delete': 'destroy',
+    }
+
+    async def read(self, viewset, request, pk):
+        patient = await aget_object(viewset, pk=pk)
+        return self.render(viewset.get_serializer(patient).data)
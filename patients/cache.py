@@ -0,0 +1,4 @@
+from core.cache import ResponseCache
+
+# Patient responses are scoped to their owner
+patient_cache = ResponseCache('patients', per_user=True)
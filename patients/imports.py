@@ -0,0 +1,79 @@
+from core.imports import DIGITS, INTEGER, Rule, StagedImport
+from mappings.cache import mapping_cache
+from .cache import patient_cache
+from .models import Patient
+
+
+class PatientImport(StagedImport):
+    """
+    Patient list import for the uploading user
+
+    Patients have no natural key: rows without an `id` create a patient
+    owned by the user, rows with the id of one of the user's patients
+    update it (only the columns present in the file). Rules mirror
+    PatientCreateUpdateSerializer.
+    """
+    model = Patient
+    columns = ('id', 'name', 'age', 'gender', 'contact', 'address', 'medical_history')
+    required_columns = ('name', 'age', 'gender', 'contact', 'address')
+
+    def rules(self):
+        table = self.q(Patient._meta.db_table)
+        genders = [code for code, _ in Patient.GENDER_CHOICES]
+        return [
+            self.not_matching('id', INTEGER, 'A valid integer is required.'),
+            Rule(
+                'id', 'Patient not found.',
+                f"{self.col('id')} IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {table} "
+                f"WHERE {table}.{self.q('id')} = {self.as_integer('id')} "
+                f"AND {table}.{self.q('created_by_id')} = %s)",
+                (self.user.pk,)
+            ),
+            self.repeated('id', 'This patient is already updated on an earlier row'),
+            self.blank('name'),
+            self.too_long('name', 100),
+            self.integer('age'),
+            self.integer_where('age', '<', 0, 'Age must be between 0 and 150'),
+            self.integer_where('age', '>', 150, 'Age must be between 0 and 150'),
+            self.blank('gender'),
+            self.not_in('gender', genders, 'Not a valid choice.'),
+            self.blank('contact'),
+            self.not_matching('contact', DIGITS, 'Contact must contain only digits'),
+            self.length_outside('contact', 10, 15, 'Contact must be 10-15 digits'),
+            self.blank('address'),
+        ]
+
+    def write(self, now):
+        table = self.q(Patient._meta.db_table)
+        values = {
+            'name': self.col('name'),
+            'age': self.as_integer('age'),
+            'gender': self.col('gender'),
+            'contact': self.col('contact'),
+            'address': self.col('address'),
+            'medical_history': self.col('medical_history'),
+        }
+
+        updates = [name for name in values if name in self.header]
+        self.execute(
+            f'UPDATE {table} SET '
+            + ', '.join(f'{self.q(name)} = {values[name]}' for name in updates)
+            + f", {self.q('updated_at')} = %s FROM {self.staging} "
+            f"WHERE {table}.{self.q('id')} = {self.as_integer('id')}",
+            [now]
+        )
+        updated = self.cursor.rowcount
+
+        self.execute(
+            f"INSERT INTO {table} ({', '.join(self.q(name) for name in values)}, "
+            f"{self.q('created_by_id')}, {self.q('created_at')}, {self.q('updated_at')}) "
+            f"SELECT {', '.join(values.values())}, %s, %s, %s FROM {self.staging} "
+            f"WHERE {self.col('id')} IS NULL",
+            [self.user.pk, now, now]
+        )
+        return self.cursor.rowcount, updated
+
+    def invalidate_caches(self):
+        # Patients are embedded in mapping responses too
+        patient_cache.invalidate(self.user.pk)
+        mapping_cache.invalidate(self.user.pk)
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:16
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+from django.db import migrations
+import core.operations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('patients', '0002_alter_patient_id'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        core.operations.AddIndexConcurrently(
+            model_name='patient',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='patient_name_trgm', opclasses=['gin_trgm_ops']),
+            postgres_only=True,
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='patient',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['contact'], name='patient_contact_trgm', opclasses=['gin_trgm_ops']),
+            postgres_only=True,
+        ),
+        core.operations.AddIndexConcurrently(
+            model_name='patient',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', 'address', 'medical_history', config='english'), name='patient_search_vector'),
+            postgres_only=True,
+        ),
+    ]
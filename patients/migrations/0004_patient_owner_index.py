@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-18 03:19
+
+from django.db import migrations, models
+import core.operations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('patients', '0003_patient_search_indexes'),
+    ]
+
+    operations = [
+        core.operations.AddIndexConcurrently(
+            model_name='patient',
+            index=models.Index(fields=['created_by', '-created_at', '-id'], name='patient_owner_created_idx'),
+        ),
+    ]
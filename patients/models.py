@@ -1,7 +1,52 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
+from django.utils import timezone
 from django.conf import settings
 # Create your models here.
 
+# Full-text document of a patient; the GIN index must use the same expression
+PATIENT_SEARCH_VECTOR = SearchVector('name', 'address', 'medical_history', config='english')
+
+class PatientQuerySet(models.QuerySet):
+    def owned_by(self, user):
+        """
+        Patients created by `user`
+        """
+        return self.filter(created_by=user)
+
+    # Bulk operations skip model signals, so they invalidate the owners'
+    # response caches themselves
+
+    def update(self, **kwargs):
+        # auto_now is not applied by update(); keep updated_at honest for ETags
+        kwargs.setdefault('updated_at', timezone.now())
+        owners = set(self.values_list('created_by_id', flat=True).distinct())
+        rows = super().update(**kwargs)
+        new_owner = kwargs.get('created_by_id', kwargs.get('created_by'))
+        if new_owner is not None:
+            owners.add(getattr(new_owner, 'pk', new_owner))
+        self._invalidate_owners(owners)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._invalidate_owners(obj.created_by_id for obj in objs)
+        return objs
+
+    def bulk_update(self, objs, *args, **kwargs):
+        rows = super().bulk_update(objs, *args, **kwargs)
+        self._invalidate_owners(obj.created_by_id for obj in objs)
+        return rows
+
+    def _invalidate_owners(self, owners):
+        from mappings.cache import mapping_cache
+        from .cache import patient_cache
+        owners = set(owners)
+        patient_cache.invalidate_users(owners)
+        mapping_cache.invalidate_users(owners)
+
+
 class Patient(models.Model):
     GENDER_CHOICES = [
         ('M', 'Male'),
@@ -23,8 +68,19 @@ class Patient(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PatientQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # list/export: a user's patients, newest first (keyset order)
+            models.Index(fields=['created_by', '-created_at', '-id'], name='patient_owner_created_idx'),
+            # Search, PostgreSQL only (see migration 0003); trigram indexes
+            # also serve LIKE '%x%'
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='patient_name_trgm'),
+            GinIndex(fields=['contact'], opclasses=['gin_trgm_ops'], name='patient_contact_trgm'),
+            GinIndex(PATIENT_SEARCH_VECTOR, name='patient_search_vector'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.age}y {self.gender}"
@@ -1,10 +1,14 @@
 from rest_framework import serializers
 from .models import Patient
 from accounts.serializers import UserSerializer
+from core.instrumentation import TimedRepresentationMixin
+from core.nested import SharedRepresentationMixin
 
-class PatientSerializer(serializers.ModelSerializer):
+class PatientSerializer(SharedRepresentationMixin, TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for patient model
+
+    Nested in mappings, each patient is serialized once per response.
     """
     created_by = UserSerializer(read_only=True)
     gender_display = serializers.CharField(source='get_gender_display', read_only=True)
@@ -61,4 +65,27 @@ class PatientCreateUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Contact must contain only digits")
         if len(value) < 10 or len(value) > 15:
             raise serializers.ValidationError("Contact must be 10-15 digits")
-        return value
\ No newline at end of file
+        return value
+
+class PatientBulkCreateSerializer(serializers.Serializer):
+    """
+    Envelope for bulk patient creation
+
+    Rows are validated separately (see PatientViewSet.bulk_create) so
+    each row's errors can be reported against its index.
+    """
+    MAX_ROWS = 1000
+
+    patients = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=MAX_ROWS
+    )
+    mode = serializers.ChoiceField(
+        choices=['all_or_nothing', 'partial'],
+        default='all_or_nothing'
+    )
+    response = serializers.ChoiceField(
+        choices=['ids', 'full'],
+        default='ids'
+    )
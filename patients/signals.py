@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from mappings.cache import mapping_cache
+from .cache import patient_cache
+from .models import Patient
+
+
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=Patient)
+def invalidate_owner_caches(sender, instance, **kwargs):
+    """
+    Patients are embedded in mapping responses too
+    """
+    patient_cache.invalidate(instance.created_by_id)
+    mapping_cache.invalidate(instance.created_by_id)
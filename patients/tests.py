@@ -1,3 +1,304 @@
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from accounts.models import User
+from .models import Patient
+from .serializers import PatientBulkCreateSerializer
 
-# Create your tests here.
+
+class PatientImportTests(TestCase):
+    """
+    POST /api/patients/import/ creates the user's patients and updates
+    their own by id
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = self.make_user('owner@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_user(self, email):
+        return User.objects.create_user(email=email, username=email, name='Owner', password=None)
+
+    def make_patient(self, user):
+        return Patient.objects.create(
+            name='Existing', age=40, gender='F', contact='9876543210',
+            address='1 Main Street', medical_history='Asthma', created_by=user
+        )
+
+    def upload(self, content, **fields):
+        upload = SimpleUploadedFile('patients.csv', content.encode(), content_type='text/csv')
+        return self.client.post('/api/patients/import/', {'file': upload, **fields}, format='multipart')
+
+    def test_creates_and_updates_own_patients(self):
+        existing = self.make_patient(self.user)
+        response = self.upload(
+            'id,name,age,gender,contact,address\n'
+            f'{existing.id},Renamed,41,F,9876543210,2 Main Street\n'
+            ',New Patient,30,M,9876543211,3 Main Street\n'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+
+        existing.refresh_from_db()
+        self.assertEqual((existing.name, existing.age), ('Renamed', 41))
+        self.assertEqual(existing.medical_history, 'Asthma')  # not in the file
+        new = Patient.objects.get(name='New Patient')
+        self.assertEqual(new.created_by, self.user)
+
+        # The list reflects the import despite the response cache
+        names = {row['name'] for row in self.client.get('/api/patients/').data['results']}
+        self.assertEqual(names, {'Renamed', 'New Patient'})
+
+    def test_rules_mirror_the_serializer(self):
+        other = self.make_patient(self.make_user('other@example.com'))
+        response = self.upload(
+            'id,name,age,gender,contact,address,medical_history\n'
+            ',Pat One,30,M,9876543210,1 Road,\n'
+            ',Pat Two,200,X,123,,asthma\n'
+            f'{other.id},Pat Three,abc,F,9876543210,2 Road,\n'
+        )
+        self.assertEqual(response.status_code, 400)
+        errors = {entry['row']: entry['errors'] for entry in response.data['errors']}
+        self.assertEqual(errors[2], {
+            'address': ['This field may not be blank.'],
+            'age': ['Age must be between 0 and 150'],
+            'contact': ['Contact must be 10-15 digits'],
+            'gender': ['Not a valid choice.'],
+        })
+        self.assertEqual(errors[3], {
+            'age': ['A valid integer is required.'],
+            'id': ['Patient not found.'],
+        })
+        self.assertEqual(Patient.objects.count(), 1)
+
+
+class PatientConditionalTests(TestCase):
+    """
+    ETag / Last-Modified on patient reads, If-Match on writes
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password=None
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.patient = Patient.objects.create(
+            name='Patient', age=40, gender='F', contact='9876543210',
+            address='1 Main Street', created_by=self.user
+        )
+
+    def test_list_etag_is_per_user(self):
+        other = User.objects.create_user(
+            email='other@example.com', username='other@example.com', name='Other', password=None
+        )
+        Patient.objects.create(
+            name='Patient', age=40, gender='F', contact='9876543210',
+            address='1 Main Street', created_by=other
+        )
+        client = APIClient()
+        client.force_authenticate(other)
+        etag = self.client.get('/api/patients/')['ETag']
+        self.assertEqual(client.get('/api/patients/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_not_modified_without_queries(self):
+        first = self.client.get('/api/patients/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        etag = first['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+
+        # Validators are cached with the data: neither a hit nor a 304 queries
+        with CaptureQueriesContext(connection) as queries:
+            hit = self.client.get('/api/patients/')
+            not_modified = self.client.get('/api/patients/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual((hit['X-Cache'], hit['ETag']), ('HIT', etag))
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assertEqual(not_modified.content, b'')
+
+        # A write moves the ETag
+        self.client.patch(f'/api/patients/{self.patient.id}/', {'age': 41}, format='json')
+        changed = self.client.get('/api/patients/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_detail_validators(self):
+        url = f'/api/patients/{self.patient.id}/'
+        first = self.client.get(url)
+        etag, last_modified = first['ETag'], first['Last-Modified']
+        self.assertTrue(etag.startswith('"'))
+
+        for headers in ({'HTTP_IF_NONE_MATCH': etag}, {'HTTP_IF_MODIFIED_SINCE': last_modified}):
+            response = self.client.get(url, **headers)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual((response['ETag'], response['Last-Modified']), (etag, last_modified))
+
+    def test_if_match_on_writes(self):
+        url = f'/api/patients/{self.patient.id}/'
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.patch(url, {'age': 41}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # The first client's copy is stale now
+        response = self.client.patch(url, {'age': 42}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.patient.refresh_from_db()
+        self.assertEqual(self.patient.age, 41)
+
+
+class PatientCacheTests(TestCase):
+    """
+    Patient writes invalidate their owner's cached reads, and only theirs
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user, self.client = self.make_owner('owner@example.com')
+        self.other, self.other_client = self.make_owner('other@example.com')
+        # Warm both users' lists
+        for client in (self.client, self.other_client):
+            self.assertEqual(client.get('/api/patients/')['X-Cache'], 'MISS')
+
+    def make_owner(self, email):
+        user = User.objects.create_user(email=email, username=email, name='Owner', password=None)
+        Patient.objects.create(
+            name='Patient', age=40, gender='F', contact='9876543210',
+            address='1 Main Street', created_by=user
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        return user, client
+
+    def assertInvalidated(self, rows):
+        response = self.client.get('/api/patients/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), rows)
+        # The other user's entry survives
+        self.assertEqual(self.other_client.get('/api/patients/')['X-Cache'], 'HIT')
+
+    def test_write_invalidates_only_the_owner(self):
+        self.assertEqual(self.client.get('/api/patients/')['X-Cache'], 'HIT')
+        self.client.post('/api/patients/', {
+            'name': 'New', 'age': 30, 'gender': 'M', 'contact': '9876543210', 'address': '2 Main Street'
+        }, format='json')
+        self.assertInvalidated(2)
+
+    def test_bulk_create_invalidates(self):
+        row = {'name': 'Bulk', 'age': 30, 'gender': 'M', 'contact': '9876543210', 'address': '2 Main Street'}
+        response = self.client.post('/api/patients/bulk/', [row, row], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertInvalidated(3)
+
+    def test_csv_import_invalidates(self):
+        upload = SimpleUploadedFile(
+            'patients.csv',
+            b'name,age,gender,contact,address\nImported,30,M,9876543210,2 Main Street\n',
+            content_type='text/csv'
+        )
+        response = self.client.post('/api/patients/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.data['created'], 1)
+        self.assertInvalidated(2)
+
+    def test_queryset_update_invalidates(self):
+        Patient.objects.owned_by(self.user).update(age=41)
+        self.assertInvalidated(1)
+
+
+class PatientBulkCreateTests(TestCase):
+    """
+    POST /api/patients/bulk/: modes, per-row errors, the row cap and the
+    response shapes
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='owner@example.com', username='owner@example.com', name='Owner', password=None
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def row(self, i, **overrides):
+        return {
+            'name': f'Patient {i}', 'age': 30 + i % 50, 'gender': 'F',
+            'contact': '9876543210', 'address': f'{i} Main Street', **overrides
+        }
+
+    def post(self, data):
+        return self.client.post('/api/patients/bulk/', data, format='json')
+
+    def test_creates_every_row_in_one_insert(self):
+        rows = [self.row(i) for i in range(3)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post({'patients': rows})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(response.data['errors'], [])
+        self.assertNotIn('patients', response.data)
+
+        created = Patient.objects.owned_by(self.user).order_by('id')
+        self.assertEqual(response.data['ids'], [patient.id for patient in created])
+        self.assertEqual([patient.name for patient in created], [row['name'] for row in rows])
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "patients_patient"')]
+        self.assertEqual(len(inserts), 1)
+
+    def test_all_or_nothing_reports_row_indexes(self):
+        rows = [self.row(0), self.row(1, age=-1), self.row(2), self.row(3, gender='X', contact='12')]
+        response = self.post(rows)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 3])
+        self.assertIn('age', response.data['errors'][0]['errors'])
+        self.assertEqual(set(response.data['errors'][1]['errors']), {'gender', 'contact'})
+        self.assertFalse(Patient.objects.exists())
+
+    def test_partial_creates_the_valid_rows(self):
+        rows = [self.row(0), self.row(1, age=-1), self.row(2)]
+        response = self.post({'patients': rows, 'mode': 'partial'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+        self.assertEqual(
+            sorted(Patient.objects.values_list('name', flat=True)), ['Patient 0', 'Patient 2']
+        )
+
+        # Nothing valid: nothing created, still a 400
+        response = self.post({'patients': [self.row(3, age=-1)], 'mode': 'partial'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Patient.objects.count(), 2)
+
+    def test_row_cap(self):
+        limit = PatientBulkCreateSerializer.MAX_ROWS
+        response = self.post({'patients': [self.row(i) for i in range(limit + 1)]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('patients', response.data)
+        self.assertFalse(Patient.objects.exists())
+
+        response = self.post({'patients': [self.row(i) for i in range(limit)]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], limit)
+
+    def test_full_response(self):
+        response = self.post({'patients': [self.row(0), self.row(1)], 'response': 'full'})
+        self.assertEqual(response.status_code, 201)
+        patients = response.data['patients']
+        self.assertEqual([patient['id'] for patient in patients], response.data['ids'])
+        self.assertEqual(patients[1]['name'], 'Patient 1')
+        self.assertEqual(patients[0]['created_by']['id'], self.user.id)
+
+    def test_invalid_envelope(self):
+        for data in (
+            {'patients': []},
+            {'patients': [self.row(0)], 'mode': 'some'},
+            {'patients': [self.row(0)], 'response': 'all'},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.post(data).status_code, 400)
@@ -1,10 +1,28 @@
-from rest_framework import viewsets, status
+from django.db import transaction
+from rest_framework import viewsets, status, serializers
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import Patient
-from .serializers import PatientSerializer, PatientCreateUpdateSerializer
+from rest_framework.decorators import action
+from .models import Patient, PATIENT_SEARCH_VECTOR
+from .cache import patient_cache
+from .imports import PatientImport
+from .serializers import (
+    PatientSerializer,
+    PatientCreateUpdateSerializer,
+    PatientBulkCreateSerializer
+)
+from core.cache import cache_response
+from core.conditional import ConditionalRequestMixin, conditional_response
+from core.export import ExportMixin
+from core.idempotency import idempotent
+from core.imports import ImportMixin
+from core.mixins import ActionQuerysetMixin
+from core.nested import IncludedMixin
+from core.projection import ProjectionMixin
+from core.replicas import ReplicaReadMixin
+from core.search import SearchMixin
 
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientViewSet(ReplicaReadMixin, ConditionalRequestMixin, ActionQuerysetMixin, ExportMixin, ImportMixin, SearchMixin, IncludedMixin, ProjectionMixin, viewsets.ModelViewSet):
     """
     ViewSet for Patient CRUD operations
     
@@ -15,15 +33,42 @@ class PatientViewSet(viewsets.ModelViewSet):
     - PUT    /api/patients/{id}/    → update()
     - PATCH  /api/patients/{id}/    → partial_update()
     - DELETE /api/patients/{id}/    → destroy()
+    - POST   /api/patients/bulk/    → bulk_create()
+    - GET    /api/patients/export/  → export()
+    - POST   /api/patients/import/  → import_csv()
+    - GET    /api/patients/search/  → search()
     """
     queryset = Patient.objects.all()
     permission_classes = [IsAuthenticated]  # Only logged-in users
+
+    # Nested created_by is serialized in every read/update response
+    related_by_action = {
+        'list': ('created_by',),
+        'retrieve': ('created_by',),
+        'update': ('created_by',),
+        'partial_update': ('created_by',),
+        'search': ('created_by',),
+    }
+    export_fields = (
+        'id', 'name', 'age', 'gender', 'contact', 'address',
+        'medical_history', 'created_at', 'updated_at',
+    )
+    # Backed by the GIN indexes in Patient.Meta.indexes
+    search_trigram_fields = ('name',)
+    search_contains_fields = ('contact',)
+    search_vector = PATIENT_SEARCH_VECTOR
+    search_vector_fields = ('address', 'medical_history')
+    search_results_key = 'patients'
+    # Creates patients for request.user; an `id` column updates their own
+    import_class = PatientImport
+    # ?normalize=true lists the (single) owner once under `included`
+    included_relations = {'created_by': 'users'}
     
     def get_queryset(self):
         """
         Return patients created by current user only
         """
-        return Patient.objects.filter(created_by=self.request.user)
+        return super().get_queryset().owned_by(self.request.user)
     
     def get_serializer_class(self):
         """
@@ -31,8 +76,23 @@ class PatientViewSet(viewsets.ModelViewSet):
         """
         if self.action in ['create', 'update', 'partial_update']:
             return PatientCreateUpdateSerializer
+        if self.action == 'bulk_create':
+            return PatientBulkCreateSerializer
         return PatientSerializer
     
+    @conditional_response
+    @cache_response(patient_cache)
+    def list(self, request, *args, **kwargs):
+        """
+        List the user's patients, cached until one of them changes
+        """
+        return super().list(request, *args, **kwargs)
+
+    @conditional_response
+    @cache_response(patient_cache)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
     def perform_create(self, serializer):
         """
         Custom logic during creation
@@ -40,6 +100,7 @@ class PatientViewSet(viewsets.ModelViewSet):
         """
         serializer.save(created_by=self.request.user)
     
+    @idempotent
     def create(self, request, *args, **kwargs):
         """
         Override create method to add custom response message
@@ -78,4 +139,58 @@ class PatientViewSet(viewsets.ModelViewSet):
         
         return Response({
             'message': 'Patient deleted successfully'
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'], url_path='bulk')
+    @idempotent
+    def bulk_create(self, request):
+        """
+        Create many patients in one request
+
+        URL: POST /api/patients/bulk/
+
+        Body: {"patients": [...], "mode": "all_or_nothing" | "partial",
+               "response": "ids" | "full"}
+        A bare JSON array is treated as {"patients": [...]}.
+        """
+        data = request.data
+        if isinstance(data, list):
+            data = {'patients': data}
+
+        envelope = self.get_serializer(data=data)
+        envelope.is_valid(raise_exception=True)
+        rows = envelope.validated_data['patients']
+        mode = envelope.validated_data['mode']
+
+        # Validate every row with one serializer instance, keeping per-row errors
+        row_serializer = PatientCreateUpdateSerializer(context=self.get_serializer_context())
+        valid = []
+        errors = []
+        for index, row in enumerate(rows):
+            try:
+                valid.append(row_serializer.run_validation(row))
+            except serializers.ValidationError as exc:
+                errors.append({'index': index, 'errors': exc.detail})
+
+        if not valid or (errors and mode == 'all_or_nothing'):
+            return Response({
+                'errors': errors,
+                'message': 'No patients created'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            patients = Patient.objects.bulk_create(
+                [Patient(created_by=request.user, **row) for row in valid],
+                batch_size=500
+            )
+
+        body = {
+            'created': len(patients),
+            'ids': [patient.id for patient in patients],
+            'errors': errors,
+            'message': f'{len(patients)} patients created successfully'
+        }
+        if envelope.validated_data['response'] == 'full':
+            body['patients'] = PatientSerializer(patients, many=True).data
+
+        return Response(body, status=status.HTTP_201_CREATED)